@@ -1,43 +1,76 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import re
 import json
 from datetime import datetime, timedelta
-from io import BytesIO
 
-# For PDF generation
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
+from rebelle.ai_review import OPENAI_INSTALLED, ResponseCache, make_client, review_inventory
+from rebelle.categories import category_sort_key
+from rebelle.columns import ColumnDetectionError
+from rebelle.dtypes import frame_nbytes
+from rebelle.engine import (
+    LOW_DOH_FLAG,
+    PRIORITY_ASAP,
+    SKU_COLUMNS,
+    apply_forecast_settings,
+    build_base,
+    build_sku_base,
+    forecast_table,
+    prepare_inventory,
+    prepare_revenue,
+    prepare_sales,
+    stream_inventory_summary,
+    summarize_inventory,
+    summarize_revenue,
+    summarize_sales,
+)
+from rebelle.history import HISTORY_WINDOWS, SalesHistory
+from rebelle.profiling import RELEASE, StageProfiler
+from rebelle.purchase_orders import (
+    cached_po_pdf,
+    clean_po_lines,
+    empty_po_lines,
+    po_fingerprint,
+    read_po_lines,
+)
+from rebelle.readers import (
+    content_hash,
+    read_concurrently,
+    read_inventory_file,
+    read_sales_file,
+    read_table_file,
+    report_period,
+)
+from rebelle.schemas import get_profile
+from rebelle.velocity import (
+    DEFAULT_ALPHA,
+    FLAT_MODEL,
+    VELOCITY_MODELS,
+    base_velocity,
+    model_velocity,
+    period_matrix,
+)
+from rebelle.snapshots import PYARROW_AVAILABLE, SnapshotStore
+from rebelle.vendor_pos import build_vendor_pos, prepare_vendor_map, vendor_po_lines
 
 # ------------------------------------------------------------
-# OPTIONAL / SAFE IMPORT FOR PLOTLY
+# OPTIONAL OPENAI (AI INVENTORY CHECK)
 # ------------------------------------------------------------
+# The SDK is only imported when an AI check actually runs (see get_ai_client)
+OPENAI_API_KEY = ""
+OPENAI_BASE_URL = None
 try:
-    import plotly.express as px  # noqa: F401
-    PLOTLY_AVAILABLE = True
-except ImportError:
-    PLOTLY_AVAILABLE = False
+    # Read API key (and optional compatible endpoint, e.g. a local stub) from Streamlit secrets
+    OPENAI_API_KEY = (st.secrets.get("OPENAI_API_KEY", None) or "").strip()
+    OPENAI_BASE_URL = st.secrets.get("OPENAI_BASE_URL", None) or None
+except Exception:
+    pass
+OPENAI_AVAILABLE = bool(OPENAI_API_KEY) and OPENAI_INSTALLED
 
-# ------------------------------------------------------------
-# OPTIONAL / SAFE IMPORT FOR OPENAI (AI INVENTORY CHECK)
-# ------------------------------------------------------------
-OPENAI_AVAILABLE = False
-ai_client = None
-try:
-    from openai import OpenAI
 
-    # Read API key from Streamlit secrets
-    OPENAI_API_KEY = st.secrets.get("OPENAI_API_KEY", None)
+@st.cache_resource(show_spinner=False)
+def get_ai_client(api_key, base_url):
+    """One OpenAI client per process, shared by every session."""
+    return make_client(api_key, base_url)
 
-    if OPENAI_API_KEY and OPENAI_API_KEY.strip():
-        ai_client = OpenAI(api_key=OPENAI_API_KEY)
-        OPENAI_AVAILABLE = True
-    else:
-        OPENAI_AVAILABLE = False
-except Exception:
-    OPENAI_AVAILABLE = False
 
 # =========================
 # CONFIG & BRANDING
@@ -51,22 +84,13 @@ LICENSE_FOOTER = f"Licensed exclusively to {CLIENT_NAME} • Powered by MAVet710
 TRIAL_KEY = "Payup24"        # Rebelle 24-hour trial key
 TRIAL_DURATION_HOURS = 24
 
+# ⏱️ Admin profiling: how many reruns' stage profiles to keep for export
+PROFILE_HISTORY_SIZE = 50
+
 # 👑 ADMIN CREDS
 ADMIN_USERNAME = "God"
 ADMIN_PASSWORD = "Major420"
 
-# ✅ Canonical Rebelle category names (values, not column names)
-REB_CATEGORIES = [
-    "flower",
-    "pre rolls",
-    "vapes",
-    "edibles",
-    "beverages",
-    "concentrates",
-    "tinctures",
-    "topicals",
-]
-
 # Tab icon (favicon)
 page_icon_url = (
     "https://raw.githubusercontent.com/MAVet710/Rebelle-Purchasing-Dash/"
@@ -100,11 +124,72 @@ if "sales_raw_df" not in st.session_state:
     st.session_state.sales_raw_df = None
 if "extra_sales_df" not in st.session_state:
     st.session_state.extra_sales_df = None
+if "inv_summary_df" not in st.session_state:
+    st.session_state.inv_summary_df = None   # set by streamed (chunked) inventory reads
+if "inv_stream_rows" not in st.session_state:
+    st.session_state.inv_stream_rows = 0
+# Last processed upload / currently loaded source, per report
+for _key in [
+    "inv_upload_key", "inv_source_key",
+    "sales_upload_key", "sales_source_key",
+    "extra_sales_upload_key", "history_ingest_key",
+]:
+    if _key not in st.session_state:
+        st.session_state[_key] = None
+# Cached data-dependent forecast stage (see rebelle.engine.build_base)
+if "forecast_base_df" not in st.session_state:
+    st.session_state.forecast_base_df = None
+if "forecast_base_key" not in st.session_state:
+    st.session_state.forecast_base_key = None
+if "forecast_detail_df" not in st.session_state:
+    st.session_state.forecast_detail_df = None
+if "forecast_history_days" not in st.session_state:
+    st.session_state.forecast_history_days = 0   # days of history behind the cached base
+# SKU-level forecast base (inventory items matched to sales products)
+if "sku_base_df" not in st.session_state:
+    st.session_state.sku_base_df = None
+if "sku_base_key" not in st.session_state:
+    st.session_state.sku_base_key = None
+if "sku_history_days" not in st.session_state:
+    st.session_state.sku_history_days = 0
+# Group x period sales matrix for the EWMA / trend velocity models
+if "velocity_matrix" not in st.session_state:
+    st.session_state.velocity_matrix = None
+if "velocity_matrix_key" not in st.session_state:
+    st.session_state.velocity_matrix_key = None
+# Bulk vendor PO ZIP from the PO Builder and its per-vendor summary
+if "vendor_po_zip" not in st.session_state:
+    st.session_state.vendor_po_zip = None
+if "vendor_po_summary" not in st.session_state:
+    st.session_state.vendor_po_summary = None
+if "vendor_map_key" not in st.session_state:
+    st.session_state.vendor_map_key = None   # mapping file the ZIP was built from
+# PO Builder line-item grid (replaced on import / clear, edited in place otherwise)
+if "po_lines_df" not in st.session_state:
+    st.session_state.po_lines_df = empty_po_lines()
+if "po_lines_version" not in st.session_state:
+    st.session_state.po_lines_version = 0
+if "po_lines_upload_key" not in st.session_state:
+    st.session_state.po_lines_upload_key = None
+# Last PDF built in the PO Builder and the fingerprint of the PO it was built from
+if "po_pdf_key" not in st.session_state:
+    st.session_state.po_pdf_key = None
+if "po_pdf_bytes" not in st.session_state:
+    st.session_state.po_pdf_bytes = None
 if "theme" not in st.session_state:
     st.session_state.theme = "Dark"  # Dark by default
+if "profile_history" not in st.session_state:
+    st.session_state.profile_history = []   # admin pipeline profiles, newest last
 
 theme = st.session_state.theme
 
+# Per-stage timings for the admin profiling panel (no-op for everyone else)
+# Memory tracing slows traced stages several-fold, so it is opt-in (next rerun)
+profiler = StageProfiler(
+    enabled=st.session_state.is_admin,
+    trace_memory=st.session_state.get("profile_trace_memory", False),
+)
+
 # =========================
 # GLOBAL STYLING (theme-aware)
 # =========================
@@ -187,470 +272,76 @@ st.markdown(
 )
 
 # =========================
-# HELPER FUNCTIONS
-# =========================
-
-def normalize_col(col: str) -> str:
-    """Lower + strip non-alphanumerics for matching (no spaces, etc.)."""
-    return re.sub(r"[^a-z0-9]", "", str(col).lower())
-
-
-def detect_column(columns, aliases):
-    """
-    Auto-detect a column by comparing normalized names
-    against a list of alias keys (already normalized).
-    """
-    norm_map = {normalize_col(c): c for c in columns}
-    for alias in aliases:
-        if alias in norm_map:
-            return norm_map[alias]
-    return None
-
-
-def normalize_rebelle_category(raw):
-    """Map similar names to canonical Rebelle categories."""
-    s = str(raw).lower().strip()
-
-    # Flower
-    if any(k in s for k in ["flower", "bud", "buds", "cannabis flower"]):
-        return "flower"
-
-    # Pre Rolls
-    if any(k in s for k in ["pre roll", "preroll", "pre-roll", "joint", "joints"]):
-        return "pre rolls"
-
-    # Vapes
-    if any(k in s for k in ["vape", "cart", "cartridge", "pen", "pod"]):
-        return "vapes"
-
-    # Edibles
-    if any(k in s for k in ["edible", "gummy", "chocolate", "chew", "cookies"]):
-        return "edibles"
-
-    # Beverages
-    if any(k in s for k in ["beverage", "drink", "drinkable", "shot", "beverages"]):
-        return "beverages"
-
-    # Concentrates
-    if any(k in s for k in ["concentrate", "wax", "shatter", "crumble", "resin", "rosin", "dab"]):
-        return "concentrates"
-
-    # Tinctures
-    if any(k in s for k in ["tincture", "tinctures", "drops", "sublingual", "dropper"]):
-        return "tinctures"
-
-    # Topicals
-    if any(k in s for k in ["topical", "lotion", "cream", "salve", "balm"]):
-        return "topicals"
-
-    return s  # unchanged if not matched
-
-
-def extract_strain_type(name, subcat):
-    s = str(name).lower()
-    base = "unspecified"
-    if "indica" in s:
-        base = "indica"
-    elif "sativa" in s:
-        base = "sativa"
-    elif "hybrid" in s:
-        base = "hybrid"
-    elif "cbd" in s:
-        base = "cbd"
-
-    # Recognize vapes / pens
-    vape = any(k in s for k in ["vape", "cart", "cartridge", "pen", "pod"])
-    preroll = any(k in s for k in ["pre roll", "preroll", "pre-roll", "joint"])
-
-    # Disposables (vapes)
-    if ("disposable" in s or "dispos" in s) and vape:
-        return base + " disposable" if base != "unspecified" else "disposable"
-
-    # Infused pre-rolls
-    if "infused" in s and preroll:
-        return base + " infused" if base != "unspecified" else "infused"
-
-    return base
-
-
-def extract_size(text, context=None):
-    s = str(text).lower()
-
-    # mg doses
-    mg = re.search(r"(\d+(\.\d+)?\s?mg)", s)
-    if mg:
-        return mg.group(1).replace(" ", "")
-
-    # grams / ounces: normalize 1oz/1 oz/28g to "28g"
-    g = re.search(r"((?:\d+\.?\d*|\.\d+)\s?(g|oz))", s)
-    if g:
-        val = g.group(1).replace(" ", "")
-        val_lower = val.lower()
-        if val_lower in ["1oz", "1.0oz", "28g", "28.0g"]:
-            return "28g"
-        return val_lower
-
-    # 0.5g style vapes (if "vape", "cart", "pen", "pod" appears)
-    if any(k in s for k in ["vape", "cart", "cartridge", "pen", "pod"]):
-        half = re.search(r"\b0\.5\b|\b\.5\b", s)
-        if half:
-            return "0.5g"
-
-    return "unspecified"
-
-
-def read_inventory_file(uploaded_file):
-    """
-    Read inventory CSV or Excel while being robust to 3–5 line headers
-    (e.g., Dutchie/BLAZE 'Export Date / From Date / To Date' at the top).
-    """
-    name = uploaded_file.name.lower()
-    uploaded_file.seek(0)
-
-    if name.endswith(".csv"):
-        tmp = pd.read_csv(uploaded_file, header=None)
-    else:
-        tmp = pd.read_excel(uploaded_file, header=None)
-
-    header_row = 0
-    max_scan = min(10, len(tmp))
-    for i in range(max_scan):
-        row_text = " ".join(str(v) for v in tmp.iloc[i].tolist()).lower()
-        if any(tok in row_text for tok in ["product", "item", "sku", "name"]):
-            header_row = i
-            break
-
-    uploaded_file.seek(0)
-    if name.endswith(".csv"):
-        df = pd.read_csv(uploaded_file, header=header_row)
-    else:
-        df = pd.read_excel(uploaded_file, header=header_row)
-
-    return df
-
-
-def read_sales_file(uploaded_file):
-    """
-    Read Excel sales report with smart header detection.
-    Looks for a row that contains something like 'category' and 'product'
-    (Dutchie 'Total Sales by Product' style) and uses that as the header.
-    """
-    uploaded_file.seek(0)
-    tmp = pd.read_excel(uploaded_file, header=None)
-    header_row = 0
-    max_scan = min(15, len(tmp))
-    for i in range(max_scan):
-        row_text = " ".join(str(v) for v in tmp.iloc[i].tolist()).lower()
-        if "category" in row_text and ("product" in row_text or "name" in row_text):
-            header_row = i
-            break
-    uploaded_file.seek(0)
-    df = pd.read_excel(uploaded_file, header=header_row)
-    return df
-
-
-# =========================
-# PDF GENERATION FOR PO
+# FORECAST GRID
 # =========================
-def generate_po_pdf(
-    store_name,
-    store_number,
-    store_address,
-    store_phone,
-    store_contact,
-    vendor_name,
-    vendor_license,
-    vendor_address,
-    vendor_contact,
-    po_number,
-    po_date,
-    terms,
-    notes,
-    po_df,
-    subtotal,
-    discount,
-    tax_amount,
-    shipping,
-    total,
-):
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-
-    left_margin = 0.7 * inch
-    right_margin = width - 0.7 * inch
-    top_margin = height - 0.75 * inch
-
-    # Header Title
-    y = top_margin
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(left_margin, y, f"{CLIENT_NAME} - Purchase Order")
-    y -= 0.25 * inch
-
-    # PO Number and Date
-    c.setFont("Helvetica", 10)
-    c.drawString(left_margin, y, f"PO Number: {po_number}")
-    c.drawRightString(right_margin, y, f"Date: {po_date.strftime('%m/%d/%Y')}")
-    y -= 0.35 * inch
-
-    # Store (Ship-To) block
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(left_margin, y, "Ship To:")
-    c.setFont("Helvetica", 10)
-    y -= 0.18 * inch
-    c.drawString(left_margin, y, store_name or "")
-    y -= 0.16 * inch
-    if store_number:
-        c.drawString(left_margin, y, f"Store #: {store_number}")
-        y -= 0.16 * inch
-    if store_address:
-        c.drawString(left_margin, y, store_address)
-        y -= 0.16 * inch
-    if store_phone:
-        c.drawString(left_margin, y, f"Phone: {store_phone}")
-        y -= 0.16 * inch
-    if store_contact:
-        c.drawString(left_margin, y, f"Buyer: {store_contact}")
-        y -= 0.2 * inch
-
-    # Vendor block
-    vend_y = top_margin - 0.35 * inch
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(width / 2, vend_y, "Vendor:")
-    vend_y -= 0.18 * inch
-    c.setFont("Helvetica", 10)
-    if vendor_name:
-        c.drawString(width / 2, vend_y, vendor_name)
-        vend_y -= 0.16 * inch
-    if vendor_license:
-        c.drawString(width / 2, vend_y, f"License #: {vendor_license}")
-        vend_y -= 0.16 * inch
-    if vendor_address:
-        c.drawString(width / 2, vend_y, vendor_address)
-        vend_y -= 0.16 * inch
-    if vendor_contact:
-        c.drawString(width / 2, vend_y, f"Contact: {vendor_contact}")
-        vend_y -= 0.2 * inch
-
-    # Terms
-    y = min(y, vend_y) - 0.15 * inch
-    if terms:
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(left_margin, y, "Payment Terms:")
-        c.setFont("Helvetica", 10)
-        c.drawString(left_margin + 90, y, terms)
-        y -= 0.25 * inch
-
-    # Notes
-    if notes:
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(left_margin, y, "Notes:")
-        y -= 0.16 * inch
-        c.setFont("Helvetica", 9)
-        text_obj = c.beginText()
-        text_obj.setTextOrigin(left_margin, y)
-        text_obj.setLeading(12)
-        for line in notes.splitlines():
-            text_obj.textLine(line)
-        c.drawText(text_obj)
-        y = text_obj.getY() - 0.25 * inch
-
-    # Table header
-    c.setFont("Helvetica-Bold", 10)
-    header_y = y
-    if header_y < 2.5 * inch:
-        c.showPage()
-        width, height = letter
-        left_margin = 0.7 * inch
-        right_margin = width - 0.7 * inch
-        header_y = height - 1 * inch
-        c.setFont("Helvetica-Bold", 16)
-        c.drawString(left_margin, header_y, f"{CLIENT_NAME} - Purchase Order")
-        header_y -= 0.4 * inch
-        c.setFont("Helvetica-Bold", 10)
-
-    y = header_y
-    col_x = {
-        "line": left_margin,
-        "sku": left_margin + 0.4 * inch,
-        "desc": left_margin + 1.4 * inch,
-        "strain": left_margin + 3.8 * inch,
-        "size": left_margin + 4.6 * inch,
-        "qty": left_margin + 5.2 * inch,
-        "unit": left_margin + 6.0 * inch,
-        "total": left_margin + 7.0 * inch,
+ALL_CATEGORIES = "All"
+
+
+def forecast_column_config(doh_threshold):
+    """Typed columns for the forecast grid (see rebelle.engine.forecast_table)."""
+    return {
+        LOW_DOH_FLAG: st.column_config.CheckboxColumn(
+            "🔴", help=f"Days on hand under the {doh_threshold}-day threshold", width="small"
+        ),
+        "mastercategory": st.column_config.TextColumn("Master Category"),
+        "subcategory": st.column_config.TextColumn("Category"),
+        "strain_type": st.column_config.TextColumn("Strain Type"),
+        "packagesize": st.column_config.TextColumn("Size"),
+        "onhandunits": st.column_config.NumberColumn("On Hand", format="%d"),
+        "unitssold": st.column_config.NumberColumn("Units Sold", format="%d"),
+        "avgunitsperday": st.column_config.NumberColumn("Avg / Day", format="%.2f"),
+        "daysonhand": st.column_config.ProgressColumn(
+            "Days on Hand",
+            help="Bar fills up to twice the DOH threshold",
+            format="%d",
+            min_value=0,
+            max_value=max(2 * doh_threshold, 1),
+        ),
+        "reorderqty": st.column_config.NumberColumn("Reorder Qty", format="%d"),
+        "reorderpriority": st.column_config.TextColumn("Priority"),
+        "revenue": st.column_config.NumberColumn(
+            "Revenue", help="Net sales in the extra sales report", format="$%.2f"
+        ),
+        "asp": st.column_config.NumberColumn(
+            "Avg Price", help="Average selling price per unit", format="$%.2f"
+        ),
+        "marginperday": st.column_config.NumberColumn(
+            "Margin / Day",
+            help="Avg / Day × (revenue − cost) per unit; sort by it to reorder by dollars",
+            format="$%.2f",
+        ),
+        "itemname": st.column_config.TextColumn("Item"),
+        "product_name": st.column_config.TextColumn("Matched Sales Product"),
+        "match_confidence": st.column_config.ProgressColumn(
+            "Match", help="1.0 = same name; fuzzy matches score lower", format="%.2f",
+            min_value=0, max_value=1,
+        ),
+        "match_method": st.column_config.TextColumn("Match Type"),
     }
 
-    c.drawString(col_x["line"], y, "Ln")
-    c.drawString(col_x["sku"], y, "SKU")
-    c.drawString(col_x["desc"], y, "Description")
-    c.drawString(col_x["strain"], y, "Strain")
-    c.drawString(col_x["size"], y, "Size")
-    c.drawRightString(col_x["qty"] + 0.3 * inch, y, "Qty")
-    c.drawRightString(col_x["unit"] + 0.7 * inch, y, "Unit Price")
-    c.drawRightString(col_x["total"] + 0.8 * inch, y, "Line Total")
-    y -= 0.2 * inch
-
-    c.setLineWidth(0.5)
-    c.line(left_margin, y, right_margin, y)
-    y -= 0.18 * inch
-    c.setFont("Helvetica", 9)
-
-    # Table rows
-    for idx, row in po_df.reset_index(drop=True).iterrows():
-        if y < 1.2 * inch:
-            c.showPage()
-            width, height = letter
-            left_margin = 0.7 * inch
-            right_margin = width - 0.7 * inch
-            y = height - 1 * inch
-            c.setFont("Helvetica-Bold", 10)
-            c.drawString(left_margin, y, "SKU Line Items (cont.)")
-            y -= 0.25 * inch
-            c.setFont("Helvetica-Bold", 10)
-            c.drawString(col_x["line"], y, "Ln")
-            c.drawString(col_x["sku"], y, "SKU")
-            c.drawString(col_x["desc"], y, "Description")
-            c.drawString(col_x["strain"], y, "Strain")
-            c.drawString(col_x["size"], y, "Size")
-            c.drawRightString(col_x["qty"] + 0.3 * inch, y, "Qty")
-            c.drawRightString(col_x["unit"] + 0.7 * inch, y, "Unit Price")
-            c.drawRightString(col_x["total"] + 0.8 * inch, y, "Line Total")
-            y -= 0.2 * inch
-            c.line(left_margin, y, right_margin, y)
-            y -= 0.18 * inch
-            c.setFont("Helvetica", 9)
-
-        line_no = idx + 1
-        c.drawString(col_x["line"], y, str(line_no))
-        c.drawString(col_x["sku"], y, str(row.get("SKU", ""))[:10])
-        c.drawString(col_x["desc"], y, str(row.get("Description", ""))[:30])
-        c.drawString(col_x["strain"], y, str(row.get("Strain", ""))[:10])
-        c.drawString(col_x["size"], y, str(row.get("Size", ""))[:8])
-        c.drawRightString(col_x["qty"] + 0.3 * inch, y, f"{int(row.get('Qty', 0))}")
-        c.drawRightString(col_x["unit"] + 0.7 * inch, y, f"${row.get('Unit Price', 0):,.2f}")
-        c.drawRightString(col_x["total"] + 0.8 * inch, y, f"${row.get('Line Total', 0):,.2f}")
-        y -= 0.18 * inch
-
-    # Totals
-    if y < 1.8 * inch:
-        c.showPage()
-        width, height = letter
-        left_margin = 0.7 * inch
-        right_margin = width - 0.7 * inch
-        y = height - 1.5 * inch
-
-    c.setFont("Helvetica-Bold", 10)
-    c.drawRightString(col_x["total"] + 0.8 * inch, y, f"Subtotal: ${subtotal:,.2f}")
-    y -= 0.2 * inch
-    if discount > 0:
-        c.drawRightString(col_x["total"] + 0.8 * inch, y, f"Discount: -${discount:,.2f}")
-        y -= 0.2 * inch
-    if tax_amount > 0:
-        c.drawRightString(col_x["total"] + 0.8 * inch, y, f"Tax: ${tax_amount:,.2f}")
-        y -= 0.2 * inch
-    if shipping > 0:
-        c.drawRightString(col_x["total"] + 0.8 * inch, y, f"Shipping / Fees: ${shipping:,.2f}")
-        y -= 0.2 * inch
-
-    c.setFont("Helvetica-Bold", 11)
-    c.drawRightString(col_x["total"] + 0.8 * inch, y, f"TOTAL: ${total:,.2f}")
-
-    c.showPage()
-    c.save()
-    pdf = buffer.getvalue()
-    buffer.close()
-    return pdf
-
 
 # =========================
 # SIMPLE AI INVENTORY CHECK
 # =========================
 def ai_inventory_check(detail_view, doh_threshold, data_source):
     """
-    Send a small slice of the current table to the AI so it can
-    comment on obvious issues: zero on-hand, crazy DOH, etc.
+    Have the AI comment on obvious issues (zero on-hand, crazy DOH, etc.)
+    category by category. Returns [(category, advice, from_cache)].
     """
-    if not OPENAI_AVAILABLE or ai_client is None:
-        return (
+    if not OPENAI_AVAILABLE:
+        return [(
+            "AI",
             "AI is not enabled. Add OPENAI_API_KEY to Streamlit secrets "
-            "to turn on the buyer-assist checks."
-        )
-
-    # Keep payload modest
-    sample = detail_view.copy()
-    # Focus on lines that actually matter to a buyer
-    sample = sample.sort_values(
-        ["reorderpriority", "daysonhand"], ascending=[True, True]
+            "to turn on the buyer-assist checks.",
+            False,
+        )]
+    return review_inventory(
+        get_ai_client(OPENAI_API_KEY, OPENAI_BASE_URL),
+        detail_view,
+        doh_threshold,
+        data_source,
+        cache=ResponseCache(),
     )
-    sample = sample.head(80)
-
-    # Only send the key columns
-    cols = [
-        c
-        for c in [
-            "mastercategory",
-            "subcategory",
-            "strain_type",
-            "packagesize",
-            "onhandunits",
-            "unitssold",
-            "avgunitsperday",
-            "daysonhand",
-            "reorderqty",
-            "reorderpriority",
-        ]
-        if c in sample.columns
-    ]
-    sample_records = sample[cols].to_dict(orient="records")
-
-    prompt = f"""
-You are an expert cannabis retail buyer and inventory strategist.
-
-You are looking at a slice of an inventory dashboard for a store using {data_source}.
-Each row is a category/size/strain combo with its sales and coverage.
-
-Fields:
-- mastercategory / subcategory (normalized product category)
-- strain_type (indica / sativa / hybrid / disposable / infused etc.)
-- packagesize (like 3.5g, 1g, 5mg, 28g)
-- onhandunits (current inventory units in stock)
-- unitssold (units sold in the lookback window)
-- avgunitsperday (velocity estimate)
-- daysonhand (coverage in days)
-- reorderqty (suggested buy quantity)
-- reorderpriority (1=ASAP, 2=Watch, 3=Comfortable, 4=Dead)
-
-Target days on hand: {doh_threshold}
-
-Data (JSON list of rows):
-{json.dumps(sample_records, indent=2)}
-
-Tasks:
-1. Call out any rows that look obviously wrong or risky
-   (for example: 0 onhand but lots of units sold, DOH way above 120,
-   or suggest reorder but DOH is already high).
-2. Briefly explain what a buyer should pay attention to in this slice:
-   - top 3 categories that are in danger of stockout
-   - anything that looks dead/overbought and could be discounted down.
-3. Keep it short, punchy, and buyer-friendly. No code, just bullet-style advice.
-"""
-
-    try:
-        resp = ai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a sharp, no-BS cannabis retail buyer coach.",
-                },
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=600,
-        )
-        return resp.choices[0].message.content
-    except Exception as e:
-        return f"AI check failed: {e}"
 
 
 # =========================
@@ -733,12 +424,6 @@ else:
     st.markdown("⚠️ AI buyer-assist is **OFF** (no API key detected).")
 st.markdown("---")
 
-if not PLOTLY_AVAILABLE:
-    st.warning(
-        "⚠️ Plotly is not installed in this environment. Charts will be disabled.\n\n"
-        "If using Streamlit Cloud, add `plotly` and `reportlab` to your `requirements.txt` file."
-    )
-
 # =========================
 # PAGE SWITCH
 # =========================
@@ -753,7 +438,7 @@ section = st.sidebar.radio(
 # ============================================================
 if section == "📊 Inventory Dashboard":
 
-    # Data source selector (for future hooks)
+    # Data source selector – picks the POS schema profile used for column detection
     st.sidebar.markdown("### 🧩 Data Source")
     data_source = st.sidebar.selectbox(
         "Select POS / Data Source",
@@ -761,6 +446,7 @@ if section == "📊 Inventory Dashboard":
         index=0,
         help="Changes how column names are interpreted. Files are still just CSV/XLSX exports.",
     )
+    st.sidebar.caption(f"Column schema: {get_profile(data_source).label}")
 
     st.sidebar.header("📂 Upload Core Reports")
 
@@ -769,11 +455,18 @@ if section == "📊 Inventory Dashboard":
     product_sales_file = st.sidebar.file_uploader(
         "Product Sales Report (qty-based Excel)", type=["xlsx", "xls"]
     )
+    stream_inventory = st.sidebar.checkbox(
+        "Stream large inventory CSV (low memory)",
+        value=False,
+        help="Reads the CSV in chunks and keeps only the category / strain / size "
+             "summary. Use for multi-store or multi-year dumps.",
+    )
     extra_sales_file = st.sidebar.file_uploader(
         "Optional Extra Sales Detail (revenue)",
         type=["xlsx", "xls"],
-        help="Optional: Dutchie 'Total Sales by Product' or similar. "
-             "Currently **ignored for velocity** until revenue views are added.",
+        help="Optional: Dutchie 'Total Sales by Product' or similar. Adds revenue, "
+             "average selling price and margin per day to the forecast; velocity "
+             "still comes from the product sales report.",
     )
 
     st.sidebar.markdown("---")
@@ -782,245 +475,345 @@ if section == "📊 Inventory Dashboard":
     velocity_adjustment = st.sidebar.number_input("Velocity Adjustment", 0.01, 5.0, 0.5)
     date_diff = st.sidebar.slider("Days in Sales Period", 7, 90, 60)
 
-    # Cache raw dataframes when new files are uploaded
-    if inv_file is not None:
-        try:
-            inv_df_raw = read_inventory_file(inv_file)
-            st.session_state.inv_raw_df = inv_df_raw
-        except Exception as e:
-            st.error(f"Error reading inventory file: {e}")
-            st.stop()
-
-    if product_sales_file is not None:
-        try:
-            sales_raw_raw = read_sales_file(product_sales_file)
-            st.session_state.sales_raw_df = sales_raw_raw
-        except Exception as e:
-            st.error(f"Error reading Product Sales report: {e}")
-            st.stop()
-
-    if extra_sales_file is not None:
-        try:
-            extra_sales_raw = read_sales_file(extra_sales_file)
-            st.session_state.extra_sales_df = extra_sales_raw
-        except Exception:
-            # Not critical – we can ignore failures here
-            st.session_state.extra_sales_df = None
-
-    if st.session_state.inv_raw_df is not None and st.session_state.sales_raw_df is not None:
-        try:
-            inv_df = st.session_state.inv_raw_df.copy()
-            sales_raw = st.session_state.sales_raw_df.copy()
-
-            # -------- INVENTORY --------
-            inv_df.columns = inv_df.columns.str.strip().str.lower()
-
-            # Auto-detect core inventory columns (supports BLAZE & Dutchie)
-            inv_name_aliases = [
-                "product", "productname", "item", "itemname", "name", "skuname",
-                "skuid", "product name"
-            ]
-            inv_cat_aliases = [
-                "category", "subcategory", "productcategory", "department",
-                "mastercategory", "product category", "cannabis"
-            ]
-            inv_qty_aliases = [
-                "available", "onhand", "onhandunits", "quantity", "qty",
-                "quantityonhand", "instock", "currentquantity", "current quantity",
-                "inventoryavailable", "inventory available"
-            ]
-
-            name_col = detect_column(inv_df.columns, [normalize_col(a) for a in inv_name_aliases])
-            cat_col = detect_column(inv_df.columns, [normalize_col(a) for a in inv_cat_aliases])
-            qty_col = detect_column(inv_df.columns, [normalize_col(a) for a in inv_qty_aliases])
-
-            if not (name_col and cat_col and qty_col):
-                st.error(
-                    "Could not auto-detect inventory columns (product / category / on-hand). "
-                    "Check your Inventory export headers."
-                )
-                st.stop()
-
-            inv_df = inv_df.rename(
-                columns={
-                    name_col: "itemname",
-                    cat_col: "subcategory",
-                    qty_col: "onhandunits",
-                }
-            )
-
-            inv_df["onhandunits"] = pd.to_numeric(inv_df["onhandunits"], errors="coerce").fillna(0)
-            # normalize to Rebelle canonical categories
-            inv_df["subcategory"] = inv_df["subcategory"].apply(normalize_rebelle_category)
-
-            # Strain Type + Package Size
-            inv_df["strain_type"] = inv_df.apply(
-                lambda x: extract_strain_type(x["itemname"], x["subcategory"]), axis=1
-            )
-            inv_df["packagesize"] = inv_df.apply(
-                lambda x: extract_size(x["itemname"], x["subcategory"]), axis=1
-            )
-
-            # Group inventory by subcategory + strain + size
-            inv_summary = (
-                inv_df.groupby(["subcategory", "strain_type", "packagesize"])["onhandunits"]
-                .sum()
-                .reset_index()
+    # -------------------------
+    # SALES HISTORY
+    # -------------------------
+    try:
+        sales_history = SalesHistory()
+    except Exception:
+        # History is optional; a read-only home directory just disables it
+        sales_history = None
+    history_window = None
+    velocity_model = FLAT_MODEL
+    if sales_history is not None:
+        st.sidebar.markdown("### 🗄️ Sales History")
+        save_history = st.sidebar.checkbox(
+            "Add product sales uploads to history",
+            value=True,
+            key="history_save",
+            help="Each report's period is read from its 'From Date / To Date' lines. "
+                 "Overlapping days are replaced by the newest upload.",
+        )
+        history_end = st.sidebar.date_input(
+            "Report end date (if not in the file)",
+            value=datetime.now().date(),
+            key="history_end",
+            help="Used with Days in Sales Period when a report has no date range.",
+        )
+        history_periods = sales_history.periods(data_source)
+        velocity_options = ["Uploaded report"]
+        if not history_periods.empty:
+            velocity_options += [f"History: last {n} days" for n in HISTORY_WINDOWS]
+            st.sidebar.caption(
+                f"{len(history_periods)} stored period(s) for {data_source}, "
+                f"{history_periods['start'].min()} → {history_periods['end'].max()}."
             )
-
-            # -------- SALES (qty-based ONLY) --------
-            sales_raw.columns = sales_raw.columns.astype(str).str.lower()
-
-            # Auto-detect product name column
-            sales_name_aliases = [
-                "product", "productname", "product title", "producttitle",
-                "productid", "name", "item", "itemname", "skuname",
-                "sku", "description", "product name"
-            ]
-            name_col_sales = detect_column(
-                sales_raw.columns, [normalize_col(a) for a in sales_name_aliases]
+        velocity_source = st.sidebar.selectbox(
+            "Velocity from", velocity_options, key="velocity_source"
+        )
+        if velocity_source != velocity_options[0]:
+            history_window = HISTORY_WINDOWS[velocity_options.index(velocity_source) - 1]
+        # The models read stored history only; the uploaded report stays flat
+        if history_window is not None:
+            velocity_model = st.sidebar.selectbox(
+                "Velocity model",
+                VELOCITY_MODELS,
+                key="velocity_model",
+                help="Flat: units sold / days. EWMA: weekly history, recent weeks weighted "
+                     "most. Trend: EWMA plus the weekly growth or decline, projected "
+                     "half a target coverage ahead.",
             )
+            if velocity_model != FLAT_MODEL:
+                velocity_alpha = st.sidebar.slider(
+                    "Smoothing (weight on recent weeks)", 0.05, 0.9, DEFAULT_ALPHA, 0.05,
+                    key="velocity_alpha",
+                )
 
-            # Auto-detect quantity/units sold column – STRICTLY counts, not $$
-            qty_aliases = [
-                "quantitysold", "quantity sold",
-                "qtysold", "qty sold",
-                "itemsold", "item sold", "items sold",
-                "unitssold", "units sold", "unit sold", "unitsold", "units",
-                "totalunits", "total units",
-                "quantity", "qty",
-            ]
-            qty_col_sales = detect_column(
-                sales_raw.columns, [normalize_col(a) for a in qty_aliases]
+    # -------------------------
+    # SAVED SNAPSHOTS
+    # -------------------------
+    snapshot_store = SnapshotStore() if PYARROW_AVAILABLE else None
+    if snapshot_store is not None:
+        st.sidebar.markdown("### 💾 Saved Snapshots")
+        snapshot_labels = {"inventory": "Inventory", "sales": "Product Sales"}
+        # Sales snapshots are trimmed to a schema's columns; only offer current ones
+        sales_schema = get_profile(data_source).sales.label
+        saved = [
+            m for m in snapshot_store.entries(pos=data_source)
+            if m.get("kind") in snapshot_labels
+            and (m["kind"] != "sales" or m.get("schema") == sales_schema)
+        ]
+        if saved:
+            chosen = st.sidebar.selectbox(
+                "Reopen a previous export",
+                saved,
+                format_func=lambda m: (
+                    f"{snapshot_labels[m['kind']]} · {m.get('source_name') or m['key']} · "
+                    f"{datetime.fromtimestamp(m['created']).strftime('%m/%d %H:%M')}"
+                ),
             )
+            if st.sidebar.button("Load snapshot"):
+                snap_df = snapshot_store.load_key(chosen["key"])
+                if snap_df is None:
+                    st.sidebar.error("❌ Snapshot could not be read.")
+                elif chosen["kind"] == "inventory":
+                    st.session_state.inv_raw_df = snap_df
+                    st.session_state.inv_summary_df = None
+                    st.session_state.inv_source_key = "snapshot:" + chosen["key"]
+                else:
+                    st.session_state.sales_raw_df = snap_df
+                    st.session_state.sales_source_key = "snapshot:" + chosen["key"]
+        else:
+            st.sidebar.caption("Uploads are snapshotted here for quick reopening.")
 
-            # Extra safety: if the matched column is clearly a revenue column, reject it
-            if qty_col_sales is not None:
-                norm_qty_name = normalize_col(qty_col_sales)
-                revenue_like = {
-                    "sales", "netsales", "totalsales", "retailvalue",
-                    "grosssales", "saleamount"
-                }
-                if norm_qty_name in revenue_like:
-                    qty_col_sales = None
-
-            # Auto-detect category/mastercategory column
-            mc_aliases = [
-                "mastercategory", "category", "master_category",
-                "productcategory", "product category",
-                "department", "dept", "subcategory", "productcategoryname",
-                "product category name"
-            ]
-            mc_col = detect_column(sales_raw.columns, [normalize_col(a) for a in mc_aliases])
-
-            if not (name_col_sales and qty_col_sales and mc_col):
-                st.error(
-                    "Product Sales file detected but could not find required columns.\n\n"
-                    "Looked for some variant of: product / product name, quantity or items sold, "
-                    "and category or product category.\n\n"
-                    "Tip: Use Dutchie 'Product Sales' or Blaze 'Sales by Product' exports "
-                    "without manually editing the headers."
+    # Cache raw dataframes when new files are uploaded. Each upload is only
+    # read when its content changes; `*_source_key` identifies what is loaded.
+    # Uploads that changed are parsed side by side, then handled in order.
+    read_jobs = {}
+    stream_csv = False
+    if inv_file is not None:
+        stream_csv = stream_inventory and inv_file.name.lower().endswith(".csv")
+        inv_key = ("stream:" if stream_csv else "file:") + content_hash(inv_file.getvalue())
+        if stream_csv:
+            # The streamed summary is already column-mapped, so it depends on the POS too
+            inv_key += ":" + data_source
+        if st.session_state.inv_upload_key != inv_key:
+            if stream_csv:
+                read_jobs["stream_inventory"] = (
+                    stream_inventory_summary, inv_file, {"pos": data_source}
+                )
+            else:
+                read_jobs["read_inventory"] = (
+                    read_inventory_file, inv_file, {"store": snapshot_store, "pos": data_source}
                 )
-                st.stop()
 
-            # Normalize to internal names
-            sales_raw = sales_raw.rename(
-                columns={
-                    name_col_sales: "product_name",
-                    qty_col_sales: "unitssold",
-                    mc_col: "mastercategory",
-                }
+    if product_sales_file is not None:
+        sales_key = "file:" + content_hash(product_sales_file.getvalue())
+        if st.session_state.sales_upload_key != sales_key:
+            read_jobs["read_sales"] = (
+                read_sales_file,
+                product_sales_file,
+                {
+                    "store": snapshot_store,
+                    "pos": data_source,
+                    "schema": get_profile(data_source).sales,
+                },
             )
 
-            sales_raw["unitssold"] = pd.to_numeric(
-                sales_raw["unitssold"], errors="coerce"
-            ).fillna(0)
+    if extra_sales_file is not None:
+        # Only the POS profile's revenue columns are parsed, so the key carries the POS
+        extra_key = "file:" + content_hash(extra_sales_file.getvalue()) + ":" + data_source
+        if st.session_state.extra_sales_upload_key != extra_key:
+            read_jobs["read_extra_sales"] = (
+                read_sales_file,
+                extra_sales_file,
+                {
+                    "store": snapshot_store,
+                    "pos": data_source,
+                    "kind": "extra_sales",
+                    "schema": get_profile(data_source).revenue,
+                },
+            )
 
-            # normalize categories here as well
-            sales_raw["mastercategory"] = sales_raw["mastercategory"].apply(normalize_rebelle_category)
+    read_results = {}
+    if read_jobs:
+        with profiler.stage("read_uploads") as rec:
+            read_results = read_concurrently(read_jobs)
+            rec["rows"] = len(read_jobs)
+        for stage_name, (result, _, seconds) in read_results.items():
+            if seconds is not None:
+                rows = result[1] if stage_name == "stream_inventory" else len(result)
+                profiler.record(stage_name, seconds, rows)
+
+    if "stream_inventory" in read_results or "read_inventory" in read_results:
+        result, error, _ = read_results.get(
+            "stream_inventory", read_results.get("read_inventory")
+        )
+        if isinstance(error, ColumnDetectionError):
+            st.error(str(error))
+            st.stop()
+        elif error is not None:
+            st.error(f"Error reading inventory file: {error}")
+            st.stop()
+        if stream_csv:
+            st.session_state.inv_summary_df, st.session_state.inv_stream_rows = result
+            st.session_state.inv_raw_df = None
+        else:
+            st.session_state.inv_raw_df = result
+            st.session_state.inv_summary_df = None
+        st.session_state.inv_upload_key = inv_key
+        st.session_state.inv_source_key = inv_key
+    if stream_csv and st.session_state.inv_summary_df is not None:
+        st.sidebar.caption(
+            f"Streamed {st.session_state.inv_stream_rows:,} inventory rows "
+            f"into {len(st.session_state.inv_summary_df):,} summary lines."
+        )
 
-            # Filter out accessories / 'all' (anything with "accessor")
-            sales_df = sales_raw[
-                ~sales_raw["mastercategory"].astype(str).str.contains("accessor")
-                & (sales_raw["mastercategory"] != "all")
-            ].copy()
+    if "read_sales" in read_results:
+        result, error, _ = read_results["read_sales"]
+        if error is not None:
+            st.error(f"Error reading Product Sales report: {error}")
+            st.stop()
+        st.session_state.sales_raw_df = result
+        st.session_state.sales_upload_key = sales_key
+        st.session_state.sales_source_key = sales_key
+
+    # Uploaded (not snapshot) sales go into the history once per file and POS
+    if (
+        sales_history is not None
+        and save_history
+        and product_sales_file is not None
+        and st.session_state.sales_source_key == sales_key
+        and st.session_state.history_ingest_key != (sales_key, data_source)
+    ):
+        period_start, period_end = report_period(product_sales_file)
+        if period_start is None:
+            period_end = history_end
+            period_start = period_end - timedelta(days=date_diff - 1)
+        try:
+            with profiler.stage("history_ingest") as rec:
+                stored = sales_history.ingest(
+                    prepare_sales(st.session_state.sales_raw_df, data_source),
+                    period_start,
+                    period_end,
+                    data_source,
+                    sales_key.split(":", 1)[1],
+                    product_sales_file.name,
+                )
+                rec["rows"] = stored
+            if stored:
+                st.sidebar.success(
+                    f"Added {stored:,} sales lines to history ({period_start} → {period_end})."
+                )
+        except ColumnDetectionError:
+            # Reported by the forecast below
+            pass
+        except Exception as e:
+            st.sidebar.warning(f"Could not add this report to sales history: {e}")
+        st.session_state.history_ingest_key = (sales_key, data_source)
 
-            # Add package size on the sales side (granular per size)
-            sales_df["packagesize"] = sales_df.apply(
-                lambda row: extract_size(row["product_name"], row["mastercategory"]),
-                axis=1,
-            )
+    if "read_extra_sales" in read_results:
+        # Not critical – a failed read just leaves the extra sales out
+        result, _, _ = read_results["read_extra_sales"]
+        st.session_state.extra_sales_df = result
+        st.session_state.extra_sales_upload_key = extra_key
 
-            # Category + size level velocity
-            sales_summary = (
-                sales_df.groupby(["mastercategory", "packagesize"])["unitssold"]
-                .sum()
-                .reset_index()
+    have_inventory = (
+        st.session_state.inv_raw_df is not None or st.session_state.inv_summary_df is not None
+    )
+    have_sales = st.session_state.sales_raw_df is not None or history_window is not None
+    if have_inventory and have_sales:
+        try:
+            # Data-dependent stage (parse → normalize → extract → group → merge)
+            # is cached per loaded source; settings only re-run the cheap tail.
+            base_key = (
+                st.session_state.inv_source_key
+                or id(st.session_state.inv_summary_df if st.session_state.inv_raw_df is None
+                      else st.session_state.inv_raw_df),
+                (history_window, sales_history.version(data_source))
+                if history_window is not None
+                else st.session_state.sales_source_key or id(st.session_state.sales_raw_df),
+                st.session_state.extra_sales_upload_key
+                if st.session_state.extra_sales_df is not None
+                else None,
+                data_source,
             )
-            sales_summary["avgunitsperday"] = (
-                sales_summary["unitssold"] / max(date_diff, 1)
-            ) * velocity_adjustment
-
-            # Merge inventory summary with size-level velocity
-            detail = pd.merge(
-                inv_summary,
-                sales_summary,
-                how="left",
-                left_on=["subcategory", "packagesize"],
-                right_on=["mastercategory", "packagesize"],
-            ).fillna(0)
-
-            # --- Ensure Flower 28g / 1oz always shows ---
-            flower_mask = detail["subcategory"].str.contains("flower", na=False)
-            flower_cats = detail.loc[flower_mask, "subcategory"].unique()
-
-            missing_rows = []
-            for cat in flower_cats:
-                if not ((detail["subcategory"] == cat) & (detail["packagesize"] == "28g")).any():
-                    missing_rows.append(
-                        {
-                            "subcategory": cat,
-                            "strain_type": "unspecified",
-                            "packagesize": "28g",
-                            "onhandunits": 0,
-                            "mastercategory": cat,
-                            "unitssold": 0,
-                            "avgunitsperday": 0,
-                        }
+            if st.session_state.forecast_base_key != base_key:
+                # -------- INVENTORY --------
+                if st.session_state.inv_summary_df is not None:
+                    inv_summary = st.session_state.inv_summary_df
+                else:
+                    try:
+                        with profiler.stage("prepare_inventory") as rec:
+                            inv_df = prepare_inventory(st.session_state.inv_raw_df, data_source)
+                            rec["rows"] = len(inv_df)
+                        with profiler.stage("group_inventory") as rec:
+                            inv_summary = summarize_inventory(inv_df)
+                            rec["rows"] = len(inv_summary)
+                    except ColumnDetectionError as e:
+                        st.error(str(e))
+                        st.stop()
+
+                # -------- SALES (qty-based ONLY) --------
+                if history_window is not None:
+                    with profiler.stage("history_window") as rec:
+                        sales_summary, st.session_state.forecast_history_days = (
+                            sales_history.window_summary(history_window, data_source)
+                        )
+                        rec["rows"] = len(sales_summary)
+                else:
+                    try:
+                        with profiler.stage("prepare_sales") as rec:
+                            sales_df = prepare_sales(st.session_state.sales_raw_df, data_source)
+                            rec["rows"] = len(sales_df)
+                    except ColumnDetectionError as e:
+                        st.error(str(e))
+                        st.stop()
+                    with profiler.stage("group_sales") as rec:
+                        sales_summary = summarize_sales(sales_df)
+                        rec["rows"] = len(sales_summary)
+
+                # -------- REVENUE (optional extra sales) --------
+                revenue_summary = None
+                if st.session_state.extra_sales_df is not None:
+                    try:
+                        with profiler.stage("group_revenue") as rec:
+                            revenue_summary = summarize_revenue(
+                                prepare_revenue(st.session_state.extra_sales_df, data_source)
+                            )
+                            rec["rows"] = len(revenue_summary)
+                    except ColumnDetectionError as e:
+                        st.warning(f"Extra sales report left out of the forecast.\n\n{e}")
+
+                # Merge inventory summary with size-level units sold (and dollars)
+                with profiler.stage("merge") as rec:
+                    st.session_state.forecast_base_df = build_base(
+                        inv_summary, sales_summary, revenue_summary=revenue_summary
                     )
-
-            if missing_rows:
-                detail = pd.concat([detail, pd.DataFrame(missing_rows)], ignore_index=True)
-
-            # DOH + Reorder (granular per row)
-            detail["daysonhand"] = np.where(
-                detail["avgunitsperday"] > 0,
-                detail["onhandunits"] / detail["avgunitsperday"],
-                0,
-            )
-            detail["daysonhand"] = (
-                detail["daysonhand"]
-                .replace([np.inf, -np.inf], 0)
-                .fillna(0)
-                .astype(int)
-            )
-
-            detail["reorderqty"] = np.where(
-                detail["daysonhand"] < doh_threshold,
-                np.ceil((doh_threshold - detail["daysonhand"]) * detail["avgunitsperday"]),
-                0,
-            ).astype(int)
-
-            def tag(row):
-                if row["daysonhand"] <= 7:
-                    return "1 – Reorder ASAP"
-                if row["daysonhand"] <= 21:
-                    return "2 – Watch Closely"
-                if row["avgunitsperday"] == 0:
-                    return "4 – Dead Item"
-                return "3 – Comfortable Cover"
-
-            detail["reorderpriority"] = detail.apply(tag, axis=1)
+                    rec["rows"] = len(st.session_state.forecast_base_df)
+                st.session_state.forecast_base_key = base_key
+
+            # Parameter-dependent stage: velocity, DOH + reorder. History
+            # windows divide by the days actually on record instead of the slider.
+            sales_days = date_diff
+            if history_window is not None:
+                sales_days = st.session_state.forecast_history_days
+                st.caption(
+                    f"Velocity from sales history: {sales_days} of the last {history_window} "
+                    f"days on record, through {sales_history.latest_day(data_source)}."
+                )
+            model_rate = None
+            if velocity_model != FLAT_MODEL:
+                matrix_key = (data_source, sales_history.version(data_source))
+                if st.session_state.velocity_matrix_key != matrix_key:
+                    with profiler.stage("velocity_matrix") as rec:
+                        st.session_state.velocity_matrix = period_matrix(sales_history, data_source)
+                        rec["rows"] = len(st.session_state.velocity_matrix[0])
+                    st.session_state.velocity_matrix_key = matrix_key
+                with profiler.stage("velocity_model") as rec:
+                    group_rate = model_velocity(
+                        *st.session_state.velocity_matrix,
+                        velocity_model,
+                        alpha=velocity_alpha,
+                        horizon_days=doh_threshold / 2,
+                    )
+                    model_rate = base_velocity(st.session_state.forecast_base_df, group_rate)
+                    rec["rows"] = len(group_rate)
+                st.caption(
+                    f"{velocity_model} velocity over the last "
+                    f"{int((st.session_state.velocity_matrix[2] > 0).sum())} week(s) of sales history."
+                )
+            with profiler.stage("forecast_settings") as rec:
+                detail = apply_forecast_settings(
+                    st.session_state.forecast_base_df,
+                    doh_threshold,
+                    velocity_adjustment,
+                    sales_days,
+                    velocity=model_rate,
+                )
+                rec["rows"] = len(detail)
+            # Kept for the PO Builder's bulk per-vendor mode
+            st.session_state.forecast_detail_df = detail
 
             # =======================
             # SUMMARY + CLICK FILTERS
@@ -1028,7 +821,7 @@ if section == "📊 Inventory Dashboard":
             st.markdown("### Inventory Summary")
 
             total_units = int(detail["unitssold"].sum())
-            reorder_asap = (detail["reorderpriority"] == "1 – Reorder ASAP").sum()
+            reorder_asap = (detail["reorderpriority"] == PRIORITY_ASAP).sum()
 
             col1, col2 = st.columns(2)
             with col1:
@@ -1046,33 +839,30 @@ if section == "📊 Inventory Dashboard":
 
             # Apply metric filter to detail for display
             if st.session_state.metric_filter == "Reorder ASAP":
-                detail_view = detail[detail["reorderpriority"] == "1 – Reorder ASAP"].copy()
+                detail_view = detail[detail["reorderpriority"] == PRIORITY_ASAP].copy()
             else:
                 detail_view = detail.copy()
 
             st.markdown(
                 f"*Current filter:* **{st.session_state.metric_filter}**"
             )
+            if "marginperday" in detail:
+                # marginperday is per category / size, repeated on each strain line
+                asap_margin = (
+                    detail.loc[detail["reorderpriority"] == PRIORITY_ASAP]
+                    .drop_duplicates(["subcategory", "packagesize"])["marginperday"]
+                    .sum()
+                )
+                st.caption(
+                    f"Reorder ASAP lines earn ${asap_margin:,.2f} margin per day at current "
+                    "velocity. Sort the table by Margin / Day to reorder by dollars."
+                )
 
             st.markdown("### Forecast Table")
 
-            def red_low(val):
-                try:
-                    v = int(val)
-                    return "color:#FF3131" if v < doh_threshold else ""
-                except Exception:
-                    return ""
-
             # Category filter (ordered by Rebelle categories first) **after** metric filter
             all_cats = sorted(detail_view["subcategory"].unique())
-
-            def cat_sort_key(c):
-                c_low = str(c).lower()
-                if c_low in REB_CATEGORIES:
-                    return (REB_CATEGORIES.index(c_low), c_low)
-                return (len(REB_CATEGORIES), c_low)
-
-            all_cats_sorted = sorted(all_cats, key=cat_sort_key)
+            all_cats_sorted = sorted(all_cats, key=category_sort_key)
 
             selected_cats = st.sidebar.multiselect(
                 "Visible Categories",
@@ -1081,30 +871,88 @@ if section == "📊 Inventory Dashboard":
             )
             detail_view = detail_view[detail_view["subcategory"].isin(selected_cats)]
 
-            # Make sure cannabis type (strain_type) is visible
-            display_cols = [
-                "mastercategory",
-                "subcategory",
-                "strain_type",
-                "packagesize",
-                "onhandunits",
-                "unitssold",
-                "avgunitsperday",
-                "daysonhand",
-                "reorderqty",
-                "reorderpriority",
+            # One category at a time (or all) – only the opened slice is sent
+            cat_counts = detail_view["subcategory"].astype(str).value_counts()
+            open_options = [ALL_CATEGORIES] + [
+                c for c in all_cats_sorted if cat_counts.get(str(c), 0) > 0
             ]
-            display_cols = [c for c in display_cols if c in detail_view.columns]
-
-            # Use same category ordering for expanders
-            for cat in sorted(detail_view["subcategory"].unique(), key=cat_sort_key):
-                group = detail_view[detail_view["subcategory"] == cat]
-                with st.expander(cat.title()):
-                    g = group[display_cols].copy()
-                    st.dataframe(
-                        g.style.applymap(red_low, subset=["daysonhand"]),
-                        use_container_width=True,
+            open_cat = st.radio(
+                "Open category",
+                open_options,
+                horizontal=True,
+                format_func=lambda c: (
+                    f"{c} ({len(detail_view)})" if c == ALL_CATEGORIES
+                    else f"{str(c).title()} ({cat_counts.get(str(c), 0)})"
+                ),
+                key="forecast_open_category",
+            )
+            if open_cat != ALL_CATEGORIES:
+                detail_view = detail_view[detail_view["subcategory"] == open_cat]
+
+            with profiler.stage("render_table", rows=len(detail_view)):
+                st.dataframe(
+                    forecast_table(detail_view, doh_threshold),
+                    column_config=forecast_column_config(doh_threshold),
+                    hide_index=True,
+                    use_container_width=True,
+                )
+
+            # =======================
+            # SKU-LEVEL FORECAST
+            # =======================
+            if st.toggle(
+                "🔎 SKU-level forecast",
+                key="sku_mode",
+                help="One line per inventory item, matched to its sales product by name.",
+            ):
+                if st.session_state.inv_raw_df is None:
+                    st.info(
+                        "SKU-level forecasts need the full inventory file; large inventories "
+                        "read in chunks only keep the category summary."
+                    )
+                elif history_window is None and st.session_state.sales_raw_df is None:
+                    st.info("Upload a product sales report to match SKUs against.")
+                else:
+                    if st.session_state.sku_base_key != base_key:
+                        with profiler.stage("sku_match") as rec:
+                            inv_df = prepare_inventory(st.session_state.inv_raw_df, data_source)
+                            if history_window is not None:
+                                sku_sales, st.session_state.sku_history_days = (
+                                    sales_history.window_summary(
+                                        history_window, data_source, by=["product_name"]
+                                    )
+                                )
+                            else:
+                                sku_sales = prepare_sales(st.session_state.sales_raw_df, data_source)
+                            st.session_state.sku_base_df = build_sku_base(inv_df, sku_sales)
+                            rec["rows"] = len(st.session_state.sku_base_df)
+                        st.session_state.sku_base_key = base_key
+
+                    sku_days = (
+                        st.session_state.sku_history_days if history_window is not None else date_diff
                     )
+                    sku_detail = apply_forecast_settings(
+                        st.session_state.sku_base_df, doh_threshold, velocity_adjustment, sku_days
+                    )
+                    sku_detail = sku_detail[sku_detail["subcategory"].isin(selected_cats)]
+                    if open_cat != ALL_CATEGORIES:
+                        sku_detail = sku_detail[sku_detail["subcategory"] == open_cat]
+                    if st.session_state.metric_filter == "Reorder ASAP":
+                        sku_detail = sku_detail[sku_detail["reorderpriority"] == PRIORITY_ASAP]
+
+                    methods = st.session_state.sku_base_df["match_method"]
+                    st.caption(
+                        f"{int((methods != 'none').sum())} of {len(methods)} inventory items "
+                        f"matched to a sales product ({int((methods == 'fuzzy').sum())} by "
+                        "fuzzy name). SKU lines use flat velocity."
+                    )
+                    with profiler.stage("render_sku_table", rows=len(sku_detail)):
+                        st.dataframe(
+                            forecast_table(sku_detail, doh_threshold, SKU_COLUMNS),
+                            column_config=forecast_column_config(doh_threshold),
+                            hide_index=True,
+                            use_container_width=True,
+                        )
 
             # =======================
             # AI INVENTORY CHECK
@@ -1114,9 +962,12 @@ if section == "📊 Inventory Dashboard":
 
             if OPENAI_AVAILABLE:
                 if st.button("Run AI check on current view"):
-                    with st.spinner("Having the AI look over this slice like a buyer..."):
-                        ai_summary = ai_inventory_check(detail_view, doh_threshold, data_source)
-                    st.markdown(ai_summary)
+                    with st.spinner("Having the AI look over each category like a buyer..."):
+                        with profiler.stage("ai_check", rows=len(detail_view)):
+                            ai_reviews = ai_inventory_check(detail_view, doh_threshold, data_source)
+                    for label, advice, from_cache in ai_reviews:
+                        st.markdown(f"#### {str(label).title()}" + (" · cached" if from_cache else ""))
+                        st.markdown(advice)
             else:
                 st.info(
                     "AI buyer-assist is disabled because no `OPENAI_API_KEY` was found in "
@@ -1194,58 +1045,53 @@ else:
     # -------------------------
     st.markdown("### Line Items")
 
-    num_lines = st.number_input("Number of Line Items", 1, 50, 5)
-
-    items = []
-    for i in range(int(num_lines)):
-        with st.expander(f"Line {i + 1}", expanded=(i < 3)):
-            c1, c2, c3, c4, c5, c6 = st.columns([1.2, 2.5, 1.4, 1.2, 1.2, 1.3])
-
-            with c1:
-                st.markdown('<div class="po-label">SKU ID</div>', unsafe_allow_html=True)
-                sku = st.text_input("", key=f"sku_{i}")
-
-            with c2:
-                st.markdown('<div class="po-label">SKU Name / Description</div>', unsafe_allow_html=True)
-                desc = st.text_input("", key=f"desc_{i}")
-
-            with c3:
-                st.markdown('<div class="po-label">Strain / Type</div>', unsafe_allow_html=True)
-                strain = st.text_input("", key=f"strain_{i}")
-
-            with c4:
-                st.markdown('<div class="po-label">Size (e.g. 3.5g)</div>', unsafe_allow_html=True)
-                size = st.text_input("", key=f"size_{i}")
-
-            with c5:
-                st.markdown('<div class="po-label">Qty</div>', unsafe_allow_html=True)
-                qty = st.number_input("", min_value=0, step=1, key=f"qty_{i}")
-
-            with c6:
-                st.markdown('<div class="po-label">Unit Price ($)</div>', unsafe_allow_html=True)
-                price = st.number_input("", min_value=0.0, step=0.01, key=f"price_{i}")
-
-            line_total = qty * price
-            st.markdown(f"**Line Total:** ${line_total:,.2f}")
-
-            items.append(
-                {
-                    "SKU": sku,
-                    "Description": desc,
-                    "Strain": strain,
-                    "Size": size,
-                    "Qty": qty,
-                    "Unit Price": price,
-                    "Line Total": line_total,
-                }
-            )
+    po_lines_file = st.file_uploader(
+        "Import line items (CSV or Excel, optional)",
+        type=["csv", "xlsx", "xls"],
+        key="po_lines_file",
+        help="Needs a quantity column plus a SKU or product description; strain, "
+             "size and unit price are picked up when present. Replaces the grid below.",
+    )
+    if po_lines_file is not None:
+        po_lines_key = content_hash(po_lines_file.getvalue())
+        if po_lines_key != st.session_state.po_lines_upload_key:
+            try:
+                st.session_state.po_lines_df = read_po_lines(read_table_file(po_lines_file))
+                st.session_state.po_lines_upload_key = po_lines_key
+                st.session_state.po_lines_version += 1
+            except ColumnDetectionError as e:
+                st.error(str(e))
+            except Exception as e:
+                # Corrupt / misnamed Excel, non-UTF-8 CSV, ...
+                st.error(f"Error reading line items file: {e}")
+
+    if st.button("Clear line items", key="clear_po_lines"):
+        st.session_state.po_lines_df = empty_po_lines()
+        st.session_state.po_lines_version += 1
+
+    st.caption("Add rows at the bottom of the grid, or paste straight from a spreadsheet.")
+    edited_lines = st.data_editor(
+        st.session_state.po_lines_df,
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "SKU": st.column_config.TextColumn("SKU ID"),
+            "Description": st.column_config.TextColumn("SKU Name / Description", width="large"),
+            "Strain": st.column_config.TextColumn("Strain / Type"),
+            "Size": st.column_config.TextColumn("Size (e.g. 3.5g)"),
+            "Qty": st.column_config.NumberColumn("Qty", min_value=0, step=1, format="%d"),
+            "Unit Price": st.column_config.NumberColumn(
+                "Unit Price ($)", min_value=0.0, step=0.01, format="$%.2f"
+            ),
+        },
+        # A new key whenever the grid is replaced, so stale edits are not replayed
+        key=f"po_lines_editor_{st.session_state.po_lines_version}",
+    )
 
-    po_df = pd.DataFrame(items)
-    po_df = po_df[
-        (po_df["SKU"].astype(str).str.strip() != "") |
-        (po_df["Description"].astype(str).str.strip() != "") |
-        (po_df["Qty"] > 0)
-    ]
+    with profiler.stage("po_line_items") as rec:
+        po_df = clean_po_lines(edited_lines)
+        rec["rows"] = len(po_df)
 
     st.markdown("---")
 
@@ -1254,7 +1100,8 @@ else:
     # -------------------------
     if not po_df.empty:
 
-        subtotal = float(po_df["Line Total"].sum())
+        with profiler.stage("po_totals", rows=len(po_df)):
+            subtotal = float(po_df["Line Total"].sum())
 
         c1, c2, c3 = st.columns(3)
         with c1:
@@ -1281,7 +1128,7 @@ else:
         st.markdown("### PO Review")
         st.dataframe(po_df, use_container_width=True)
 
-        pdf_bytes = generate_po_pdf(
+        po_args = (
             store_name,
             store_number,
             store_address,
@@ -1303,17 +1150,152 @@ else:
             total,
         )
 
+        # Build only on request; an unchanged PO reuses the rendered bytes
         st.markdown("### Download")
-        st.download_button(
-            "📥 Download PO (PDF)",
-            data=pdf_bytes,
-            file_name=f"PO_{po_number or 'rebelle'}.pdf",
-            mime="application/pdf",
-        )
+        if st.button("🧾 Build PO PDF", key="build_po_pdf"):
+            with profiler.stage("po_pdf", rows=len(po_df)):
+                st.session_state.po_pdf_key, st.session_state.po_pdf_bytes = cached_po_pdf(
+                    *po_args, client_name=CLIENT_NAME
+                )
+
+        if (
+            st.session_state.po_pdf_bytes is not None
+            and st.session_state.po_pdf_key == po_fingerprint(*po_args, client_name=CLIENT_NAME)
+        ):
+            st.download_button(
+                "📥 Download PO (PDF)",
+                data=st.session_state.po_pdf_bytes,
+                file_name=f"PO_{po_number or 'rebelle'}.pdf",
+                mime="application/pdf",
+            )
+        elif st.session_state.po_pdf_bytes is not None:
+            st.caption("PO changed since the last PDF – build it again to download.")
 
     else:
         st.info("Add at least one line item to generate totals and PDF.")
 
+    # -------------------------
+    # BULK POs BY VENDOR
+    # -------------------------
+    st.markdown("---")
+    st.markdown("### 📦 Bulk POs by Vendor (from Reorder Table)")
+
+    if st.session_state.forecast_detail_df is None:
+        st.info(
+            "Run the forecast on the Inventory Dashboard first – bulk POs are built "
+            "from its reorder quantities."
+        )
+    else:
+        vendor_map_file = st.file_uploader(
+            "Vendor / SKU / Price Mapping (CSV or Excel)",
+            type=["csv", "xlsx", "xls"],
+            key="vendor_map_file",
+            help="One row per SKU: vendor, SKU, product name, category and unit cost. "
+                 "Optional vendor license / address / contact columns fill the PO header.",
+        )
+        if vendor_map_file:
+            # A ZIP built from a previous mapping file is no longer offered
+            vendor_map_key = content_hash(vendor_map_file.getvalue())
+            if st.session_state.vendor_map_key != vendor_map_key:
+                st.session_state.vendor_po_zip = None
+                st.session_state.vendor_po_summary = None
+                st.session_state.vendor_map_key = vendor_map_key
+            try:
+                vendor_map = prepare_vendor_map(read_table_file(vendor_map_file))
+                bulk_lines, unmatched = vendor_po_lines(
+                    st.session_state.forecast_detail_df, vendor_map
+                )
+            except ColumnDetectionError as e:
+                st.error(str(e))
+                st.stop()
+            except Exception as e:
+                # Corrupt / misnamed Excel, non-UTF-8 CSV, ...
+                st.error(f"Error reading vendor mapping file: {e}")
+                st.stop()
+
+            b1, b2, b3 = st.columns(3)
+            b1.metric("VENDORS", bulk_lines["vendor"].nunique())
+            b2.metric("PO LINES", len(bulk_lines))
+            b3.metric("TOTAL", f"${bulk_lines['Line Total'].sum():,.2f}")
+
+            if not unmatched.empty:
+                with st.expander(f"⚠️ {len(unmatched)} reorder lines with no vendor SKU"):
+                    st.dataframe(unmatched, use_container_width=True, hide_index=True)
+
+            bulk_tax_rate = st.number_input(
+                "Tax Rate for bulk POs (%)", 0.0, 30.0, 0.0, key="bulk_tax_rate"
+            )
+
+            if not bulk_lines.empty and st.button("📦 Build all vendor POs", key="build_vendor_pos"):
+                header = {
+                    "store_name": store_name,
+                    "store_number": store_number,
+                    "store_address": store_address,
+                    "store_phone": store_phone,
+                    "store_contact": store_contact,
+                    "po_number": po_number or po_date.strftime("%Y%m%d"),
+                    "po_date": po_date,
+                    "terms": terms,
+                    "notes": notes,
+                    "tax_rate": bulk_tax_rate,
+                    "client_name": CLIENT_NAME,
+                }
+                with st.spinner("Rendering one PO per vendor..."):
+                    with profiler.stage("vendor_pos", rows=len(bulk_lines)):
+                        zip_bytes, vendor_summary = build_vendor_pos(bulk_lines, vendor_map, header)
+                st.session_state.vendor_po_zip = zip_bytes
+                st.session_state.vendor_po_summary = vendor_summary
+
+            if st.session_state.vendor_po_zip is not None:
+                st.dataframe(
+                    st.session_state.vendor_po_summary, use_container_width=True, hide_index=True
+                )
+                st.download_button(
+                    "📥 Download all vendor POs (ZIP)",
+                    data=st.session_state.vendor_po_zip,
+                    file_name=f"vendor_POs_{po_date.strftime('%Y%m%d')}.zip",
+                    mime="application/zip",
+                )
+
+# =========================
+# ⏱️ ADMIN PIPELINE PROFILE
+# =========================
+if st.session_state.is_admin:
+    if profiler.records:
+        st.session_state.profile_history.append(
+            json.loads(profiler.to_json(section=section))
+        )
+        del st.session_state.profile_history[:-PROFILE_HISTORY_SIZE]
+
+    with st.expander("⏱️ Pipeline Profile (admin only)"):
+        session_bytes = sum(
+            frame_nbytes(st.session_state.get(k))
+            for k in [
+                "inv_raw_df", "sales_raw_df", "extra_sales_df",
+                "inv_summary_df", "forecast_base_df", "sku_base_df",
+            ]
+        )
+        st.caption(
+            f"Release `{RELEASE}` • session data in memory: {session_bytes / 1e6:,.1f} MB"
+        )
+        st.checkbox(
+            "Trace peak memory per stage (slows timings; applies from the next rerun)",
+            key="profile_trace_memory",
+        )
+        if profiler.records:
+            st.markdown("**This run**")
+            st.dataframe(profiler.to_frame(), use_container_width=True)
+        else:
+            st.caption("No pipeline stages ran on this rerun.")
+
+        if st.session_state.profile_history:
+            st.download_button(
+                "📥 Export profiles (JSON)",
+                data=json.dumps(st.session_state.profile_history, indent=2),
+                file_name=f"rebelle_profile_{RELEASE}.json",
+                mime="application/json",
+            )
+
 # =========================
 # FOOTER
 # =========================
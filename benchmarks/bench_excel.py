@@ -0,0 +1,114 @@
+"""
+Excel ingestion benchmark: the old `pd.read_excel` reader against the
+single-load path in rebelle.excel, on generated product sales workbooks.
+
+The old reader loaded the workbook twice through openpyxl (a header preview,
+then the body). The new path loads it once, with python-calamine when it is
+installed and the streaming .xlsx reader otherwise, and can drop columns the
+sales schema never uses. Every engine's frame is checked against the old one.
+
+    python -m benchmarks.bench_excel --rows 10000 100000
+    python -m benchmarks.bench_excel --rows 100000 --pos BLAZE --json excel.json
+"""
+import argparse
+import json
+import platform
+import tempfile
+import time
+from io import BytesIO
+
+import pandas as pd
+
+from benchmarks.synthetic_exports import write_exports
+from rebelle import excel
+from rebelle.readers import HEADER_PREVIEW_ROWS, _parse_with_header, sales_header_row
+from rebelle.schemas import get_profile
+
+
+def read_old(data):
+    """The reader as it was: openpyxl preview for the header, then a full parse."""
+    preview = pd.read_excel(BytesIO(data), header=None, nrows=HEADER_PREVIEW_ROWS)
+    rows = [" ".join(str(v) for v in row).lower() for row in preview.itertuples(index=False)]
+    return pd.read_excel(BytesIO(data), header=sales_header_row(rows))
+
+
+def read_new(data, calamine, usecols=None):
+    excel.CALAMINE_AVAILABLE = calamine
+    return _parse_with_header(data, False, sales_header_row, usecols)
+
+
+def best_of(repeat, fn, *args):
+    times = []
+    for _ in range(max(repeat, 1)):
+        started = time.perf_counter()
+        out = fn(*args)
+        times.append(time.perf_counter() - started)
+    return out, min(times)
+
+
+def bench_once(data, pos, repeat=1):
+    installed = excel.CALAMINE_AVAILABLE
+    schema = get_profile(pos).sales
+    baseline, old_s = best_of(repeat, read_old, data)
+    results = [{"reader": "pd.read_excel (old)", "seconds": old_s, "columns": baseline.shape[1]}]
+    engines = [("xlsx-stream", False)] + ([("calamine", True)] if installed else [])
+    try:
+        for engine, calamine in engines:
+            df, seconds = best_of(repeat, read_new, data, calamine)
+            pd.testing.assert_frame_equal(baseline, df)
+            results.append({"reader": engine, "seconds": seconds, "columns": df.shape[1]})
+
+            df, seconds = best_of(repeat, read_new, data, calamine, schema.wants)
+            pd.testing.assert_frame_equal(baseline[list(df.columns)], df)
+            results.append({"reader": f"{engine} + usecols", "seconds": seconds, "columns": df.shape[1]})
+    finally:
+        excel.CALAMINE_AVAILABLE = installed
+    for row in results:
+        row["speedup"] = old_s / row["seconds"]
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000],
+                        help="Product sales rows per workbook")
+    parser.add_argument("--pos", choices=["Dutchie", "BLAZE"], default="Dutchie")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per reader; the fastest is kept")
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if not excel.CALAMINE_AVAILABLE:
+        print("python-calamine not installed; timing the streaming reader only")
+
+    all_results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            _, sales_path = write_exports(tmp, 1, sales_rows=rows, pos=args.pos)
+            with open(sales_path, "rb") as fh:
+                data = fh.read()
+            results = pd.DataFrame(bench_once(data, args.pos, args.repeat))
+            results.insert(0, "sales_rows", rows)
+
+            print(f"\n== {rows:,} product sales rows ({args.pos}, {len(data) / 1e6:.1f} MB) ==")
+            print(results.drop(columns="sales_rows").to_string(
+                index=False, formatters={"seconds": "{:.3f}".format, "speedup": "{:.1f}x".format}
+            ))
+            all_results.extend(results.to_dict(orient="records"))
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(
+                {
+                    "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "python": platform.python_version(),
+                    "pandas": pd.__version__,
+                    "pos": args.pos,
+                    "results": all_results,
+                },
+                fh,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
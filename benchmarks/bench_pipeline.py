@@ -0,0 +1,179 @@
+"""
+Per-stage timing and peak-memory benchmark for the forecast pipeline.
+
+Generates synthetic exports at each requested size, then times read,
+normalize, extract, group, merge, DOH and PDF with cold caches.
+
+    python -m benchmarks.bench_pipeline --rows 1000 100000
+    python -m benchmarks.bench_pipeline --rows 1000000 --sales-rows 50000 --json bench.json
+"""
+import argparse
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+import pandas as pd
+
+from benchmarks.synthetic_exports import write_exports
+from rebelle.attributes import extract_attributes
+from rebelle.categories import classify_category, normalize_categories
+from rebelle.columns import detect_inventory_columns, detect_sales_columns
+from rebelle.engine import (
+    apply_forecast_settings,
+    build_base,
+    prepare_inventory,
+    prepare_sales,
+    summarize_inventory,
+    summarize_sales,
+)
+from rebelle.purchase_orders import generate_po_pdf
+from rebelle.readers import clear_frame_cache, read_inventory_file, read_sales_file
+
+# Reorder lines rendered in the PDF stage
+PDF_LINES = 200
+
+
+def measure(fn, *args, trace=False):
+    """
+    Run fn(*args) once; return (result, seconds, peak traced MB or None).
+    tracemalloc slows Python-heavy stages a lot, so timing and memory come
+    from separate runs.
+    """
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    result = fn(*args)
+    seconds = time.perf_counter() - started
+    peak = None
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def _renamed(df, rename):
+    cols = df.copy(deep=False)
+    cols.columns = cols.columns.astype(str).str.strip().str.lower()
+    return cols[list(rename)].rename(columns=rename)
+
+
+def _normalize(inv, sales):
+    return normalize_categories(inv["subcategory"]), normalize_categories(sales["mastercategory"])
+
+
+def _extract(inv, sales):
+    return extract_attributes(inv["itemname"]), extract_attributes(sales["product_name"])
+
+
+def _group(inv_prepped, sales_prepped):
+    return summarize_inventory(inv_prepped), summarize_sales(sales_prepped)
+
+
+def _pdf(detail):
+    lines = detail.sort_values("reorderqty", ascending=False).head(PDF_LINES)
+    po_df = pd.DataFrame(
+        {
+            "SKU": [f"R{i:05d}" for i in range(len(lines))],
+            "Description": (lines["subcategory"].astype(str) + " " + lines["packagesize"].astype(str)).to_numpy(),
+            "Strain": lines["strain_type"].astype(str).to_numpy(),
+            "Size": lines["packagesize"].astype(str).to_numpy(),
+            "Qty": lines["reorderqty"].to_numpy(),
+            "Unit Price": 10.0,
+        }
+    )
+    po_df["Line Total"] = po_df["Qty"] * po_df["Unit Price"]
+    subtotal = float(po_df["Line Total"].sum())
+    return generate_po_pdf(
+        "Rebelle Cannabis", "1", "1 Main St", "555-0100", "Buyer",
+        "Vendor", "LIC-1", "2 Side St", "vendor@example.com",
+        "BENCH-1", date.today(), "Net 30", "", po_df,
+        subtotal, 0.0, 0.0, 0.0, subtotal,
+    )
+
+
+def bench_once(inv_path, sales_path, trace=False):
+    """One cold run over a pair of export files; a list of per-stage results."""
+    clear_frame_cache()
+    classify_category.cache_clear()
+    results = []
+
+    def stage(name, rows, fn, *args):
+        out, seconds, peak = measure(fn, *args, trace=trace)
+        results.append({"stage": name, "rows": rows, "seconds": seconds, "peak_mb": peak})
+        return out
+
+    inv_raw = stage("read_inventory", None, read_inventory_file, inv_path)
+    results[-1]["rows"] = len(inv_raw)
+    sales_raw = stage("read_sales", None, read_sales_file, sales_path)
+    results[-1]["rows"] = len(sales_raw)
+    n_rows = len(inv_raw) + len(sales_raw)
+
+    inv_cols = _renamed(inv_raw, detect_inventory_columns(inv_raw.columns.astype(str).str.strip().str.lower()))
+    sales_cols = _renamed(sales_raw, detect_sales_columns(sales_raw.columns.astype(str).str.lower()))
+    stage("normalize", n_rows, _normalize, inv_cols, sales_cols)
+    stage("extract", n_rows, _extract, inv_cols, sales_cols)
+
+    inv_prepped = prepare_inventory(inv_raw)
+    sales_prepped = prepare_sales(sales_raw)
+    inv_summary, sales_summary = stage("group", len(inv_prepped) + len(sales_prepped),
+                                       _group, inv_prepped, sales_prepped)
+    base = stage("merge", len(inv_summary), build_base, inv_summary, sales_summary)
+    detail = stage("doh", len(base), apply_forecast_settings, base, 21, 0.5, 60)
+    stage("pdf", min(len(detail), PDF_LINES), _pdf, detail)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000],
+                        help="Inventory row counts to benchmark")
+    parser.add_argument("--sales-rows", type=int, default=None,
+                        help="Product sales rows per size (default: rows / 4)")
+    parser.add_argument("--pos", choices=["Dutchie", "BLAZE"], default="Dutchie")
+    parser.add_argument("--inventory-format", choices=["csv", "xlsx"], default="csv")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Runs per size; the fastest run of each stage is kept")
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    all_results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            inv_path, sales_path = write_exports(
+                tmp, rows, args.sales_rows, args.pos, args.inventory_format
+            )
+            runs = [bench_once(inv_path, sales_path) for _ in range(max(args.repeat, 1))]
+            best = pd.DataFrame(runs[0])
+            for run in runs[1:]:
+                best["seconds"] = best["seconds"].combine(pd.DataFrame(run)["seconds"], min)
+            best["peak_mb"] = pd.DataFrame(bench_once(inv_path, sales_path, trace=True))["peak_mb"]
+            best.insert(0, "inventory_rows", rows)
+
+            print(f"\n== {rows:,} inventory rows ({args.pos}, {args.inventory_format}) ==")
+            print(best.drop(columns="inventory_rows").to_string(
+                index=False, formatters={"seconds": "{:.4f}".format, "peak_mb": "{:.1f}".format}
+            ))
+            print(f"total: {best['seconds'].sum():.3f}s")
+            all_results.extend(best.to_dict(orient="records"))
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(
+                {
+                    "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "python": platform.python_version(),
+                    "pandas": pd.__version__,
+                    "pos": args.pos,
+                    "inventory_format": args.inventory_format,
+                    "results": all_results,
+                },
+                fh,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
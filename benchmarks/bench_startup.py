@@ -0,0 +1,86 @@
+"""
+Cold-start benchmark for the Streamlit app.
+
+Each run is a fresh interpreter that executes the dashboard script once
+headless (streamlit.testing AppTest), the way a new container serves its
+first session. Reports the first-run wall time and which heavy optional
+modules (reportlab, openai, plotly) that run pulled in.
+
+    python -m benchmarks.bench_startup --repeat 5
+    python -m benchmarks.bench_startup --page "🧾 PO Builder" --json startup.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Rebelle buy.py")
+HEAVY_MODULES = ["reportlab", "openai", "plotly"]
+
+# Runs inside the child interpreter: time a first script run, report JSON
+_CHILD = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+harness = time.perf_counter() - started
+
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.session_state["is_admin"] = True
+began = time.perf_counter()
+at.run()
+if sys.argv[2]:
+    next(r for r in at.sidebar.radio if r.label == "App Section").set_value(sys.argv[2]).run()
+first_run = time.perf_counter() - began
+print(json.dumps({
+    "harness_s": harness,
+    "first_run_s": first_run,
+    "exceptions": [str(e.value) for e in at.exception],
+    "loaded": [m for m in sys.argv[3].split(",") if m in sys.modules],
+}))
+"""
+
+
+def run_once(page=""):
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD, APP_PATH, page, ",".join(HEAVY_MODULES)],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters to time")
+    parser.add_argument("--page", default="", help="Also switch to this App Section (e.g. PO Builder)")
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    runs = [run_once(args.page) for _ in range(max(args.repeat, 1))]
+    first = [r["first_run_s"] for r in runs]
+    summary = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "page": args.page or "default",
+        "runs": len(runs),
+        "first_run_median_s": statistics.median(first),
+        "first_run_min_s": min(first),
+        "loaded_modules": runs[-1]["loaded"],
+        "exceptions": runs[-1]["exceptions"],
+    }
+    print(f"first run: median {summary['first_run_median_s']:.3f}s, "
+          f"min {summary['first_run_min_s']:.3f}s over {len(runs)} cold starts")
+    print(f"heavy modules loaded: {', '.join(summary['loaded_modules']) or 'none'}")
+    if summary["exceptions"]:
+        print(f"exceptions: {summary['exceptions']}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(summary, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
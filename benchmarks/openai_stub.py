@@ -0,0 +1,84 @@
+"""
+Local stand-in for the OpenAI chat completions endpoint, for exercising the
+AI review (concurrency, caching) without a key or network:
+
+    python -m benchmarks.openai_stub --port 8808 --delay 1.5
+
+then set OPENAI_BASE_URL = "http://127.0.0.1:8808/v1" (and any OPENAI_API_KEY)
+in Streamlit secrets. Each reply echoes how many data rows it was sent.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+    requests_served = 0
+    _lock = threading.Lock()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        request = json.loads(body or b"{}")
+        prompt = request.get("messages", [{}])[-1].get("content", "")
+        data = prompt.split("header first):", 1)[-1].split("Tasks:", 1)[0]
+        rows = max(len([line for line in data.strip().splitlines() if line]) - 1, 0)
+
+        time.sleep(self.delay)
+        with self._lock:
+            StubHandler.requests_served += 1
+            n = StubHandler.requests_served
+
+        reply = {
+            "id": f"stub-{n}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {
+                        "role": "assistant",
+                        "content": f"- Stub review of {rows} rows (request #{n}).",
+                    },
+                }
+            ],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 10,
+                      "total_tokens": len(prompt) // 4 + 10},
+        }
+        payload = json.dumps(reply).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def serve(port=8808, delay=0.0):
+    StubHandler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    print(f"OpenAI stub on http://127.0.0.1:{port}/v1 (delay {delay}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8808)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds per reply")
+    args = parser.parse_args(argv)
+    serve(args.port, args.delay)
+
+
+if __name__ == "__main__":
+    main()
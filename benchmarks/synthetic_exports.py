@@ -0,0 +1,214 @@
+"""
+Synthetic Dutchie / BLAZE exports for benchmarking.
+
+Writes an inventory export and a product-sales report in either POS layout,
+including the 3–5 line 'Export Date / From Date / To Date' preamble the
+readers skip, with product names that exercise the size / strain rules.
+
+    python -m benchmarks.synthetic_exports --rows 100000 --pos Dutchie --out /tmp/exports
+"""
+import argparse
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Excel sheets top out at 1,048,576 rows
+EXCEL_MAX_ROWS = 1_000_000
+
+LAYOUTS = {
+    "Dutchie": {
+        "inventory": {
+            "name": "Product", "category": "Category", "qty": "Available",
+            "sku": "SKU", "brand": "Brand", "vendor": "Vendor", "room": "Room",
+            "price": "Unit Price",
+        },
+        "sales": {
+            "name": "Product", "category": "Category", "qty": "Quantity Sold",
+            "revenue": "Net Sales", "cost": "Cost", "brand": "Brand",
+        },
+        "title": "Total Sales by Product",
+    },
+    "BLAZE": {
+        "inventory": {
+            "name": "Product Name", "category": "Product Category",
+            "qty": "Current Quantity", "sku": "SKU", "brand": "Brand",
+            "vendor": "Vendor", "room": "Inventory", "price": "Retail Price",
+        },
+        "sales": {
+            "name": "Product Name", "category": "Product Category", "qty": "Units Sold",
+            "revenue": "Total Sales", "cost": "COGS", "brand": "Brand",
+        },
+        "title": "Sales by Product",
+    },
+}
+
+# Raw POS category spellings (normalized by rebelle.categories) with the
+# sizes / name fragments typical for each
+CATEGORY_PROFILES = [
+    ("Flower", ["3.5g", "7g", "14g", "1oz", "1 oz", "28g"], ["", "Smalls", "Premium Buds"]),
+    ("Pre-Rolls", ["1g", "0.5g", "5pk 2.5g"], ["Pre-Roll", "Infused Pre-Roll", "Joint"]),
+    ("Vape Cartridges", [".5", "0.5g", "1g"], ["Cart", "Disposable Vape", "Pod"]),
+    ("Edibles", ["100mg", "10mg", "50 mg"], ["Gummies", "Chocolate Bar", "Chews"]),
+    ("Beverages", ["10mg", "5mg"], ["Drink", "Seltzer Shot"]),
+    ("Concentrates", ["1g", "0.5g"], ["Wax", "Live Rosin", "Shatter"]),
+    ("Tinctures", ["300mg", "1000mg"], ["Tincture", "Drops"]),
+    ("Topicals", ["100mg", "500mg"], ["Balm", "Lotion"]),
+    ("Accessories", [""], ["Grinder", "Lighter", "Rolling Papers"]),
+]
+CATEGORY_WEIGHTS = [0.34, 0.14, 0.17, 0.14, 0.04, 0.08, 0.03, 0.02, 0.04]
+STRAINS = ["Indica", "Sativa", "Hybrid", "CBD", ""]
+STRAIN_NAMES = [
+    "Blue Dream", "OG Kush", "Sour Diesel", "Gelato", "Wedding Cake", "GSC",
+    "Runtz", "Zkittlez", "Jack Herer", "Northern Lights", "Gorilla Glue",
+    "Purple Punch", "Durban Poison", "Ice Cream Cake", "Pineapple Express",
+]
+BRANDS = [
+    f"{a} {b}"
+    for a in ["Green", "High", "Cloud", "Rebel", "Golden", "Coastal", "Summit", "Wild"]
+    for b in ["Farms", "Labs", "Co", "Extracts", "Gardens", "Collective"]
+]
+
+
+def product_catalog(n_products, seed=0):
+    """Distinct product names with their raw category, brand and base price."""
+    rng = np.random.default_rng(seed)
+    cat_idx = rng.choice(len(CATEGORY_PROFILES), n_products, p=CATEGORY_WEIGHTS)
+    rows = []
+    for i, ci in enumerate(cat_idx):
+        category, sizes, kinds = CATEGORY_PROFILES[ci]
+        brand = BRANDS[rng.integers(len(BRANDS))]
+        parts = [brand, STRAIN_NAMES[rng.integers(len(STRAIN_NAMES))]]
+        parts += [kinds[rng.integers(len(kinds))], STRAINS[rng.integers(len(STRAINS))]]
+        parts += [sizes[rng.integers(len(sizes))], f"#{i}"]
+        rows.append(
+            {
+                "name": " ".join(p for p in parts if p),
+                "category": category,
+                "brand": brand,
+                "price": round(float(rng.uniform(5, 90)), 2),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def _preamble(title, start, end, extra_lines):
+    lines = [
+        [f"Export Date: {end.isoformat()}"],
+        [f"From Date: {start.isoformat()}"],
+        [f"To Date: {end.isoformat()}"],
+    ]
+    if extra_lines >= 1:
+        lines.insert(0, [title])
+    if extra_lines >= 2:
+        lines.append([""])
+    return lines
+
+
+def inventory_frame(catalog, rows, pos="Dutchie", seed=1):
+    """Inventory lines (one per package / room) drawn from the catalog."""
+    rng = np.random.default_rng(seed)
+    cols = LAYOUTS[pos]["inventory"]
+    pick = catalog.iloc[rng.integers(len(catalog), size=rows)].reset_index(drop=True)
+    return pd.DataFrame(
+        {
+            cols["sku"]: [f"SKU-{i:08d}" for i in range(rows)],
+            cols["name"]: pick["name"],
+            cols["category"]: pick["category"],
+            cols["brand"]: pick["brand"],
+            cols["vendor"]: pick["brand"] + " Distribution",
+            cols["room"]: rng.choice(["Sales Floor", "Vault", "Quarantine"], rows, p=[0.7, 0.27, 0.03]),
+            cols["qty"]: rng.poisson(12, rows),
+            cols["price"]: pick["price"],
+        }
+    )
+
+
+def sales_frame(catalog, rows, pos="Dutchie", seed=2):
+    """Product-sales report lines drawn from the catalog."""
+    rng = np.random.default_rng(seed)
+    cols = LAYOUTS[pos]["sales"]
+    pick = catalog.iloc[rng.integers(len(catalog), size=rows)].reset_index(drop=True)
+    qty = rng.negative_binomial(2, 0.08, rows)
+    revenue = (qty * pick["price"]).round(2)
+    return pd.DataFrame(
+        {
+            cols["name"]: pick["name"],
+            cols["category"]: pick["category"],
+            cols["brand"]: pick["brand"],
+            cols["qty"]: qty,
+            cols["revenue"]: revenue,
+            cols["cost"]: (revenue * rng.uniform(0.35, 0.6, rows)).round(2),
+        }
+    )
+
+
+def _write_csv(path, preamble, df):
+    with open(path, "w", newline="") as fh:
+        for line in preamble:
+            fh.write(",".join(line) + "\n")
+        df.to_csv(fh, index=False)
+
+
+def _write_excel(path, preamble, df):
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame(preamble).to_excel(writer, header=False, index=False)
+        df.to_excel(writer, index=False, startrow=len(preamble))
+
+
+def write_exports(
+    out_dir,
+    inventory_rows,
+    sales_rows=None,
+    pos="Dutchie",
+    inventory_format="csv",
+    n_products=None,
+    period_days=60,
+    seed=0,
+):
+    """
+    Write `<pos>_inventory.<fmt>` and `<pos>_product_sales.xlsx` to out_dir
+    and return their paths.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    sales_rows = sales_rows if sales_rows is not None else max(inventory_rows // 4, 1)
+    n_products = n_products or max(min(inventory_rows // 4, 25_000), 50)
+    catalog = product_catalog(n_products, seed)
+
+    end = date(2026, 1, 1)
+    start = end - timedelta(days=period_days)
+    rng = np.random.default_rng(seed)
+
+    inv = inventory_frame(catalog, inventory_rows, pos, seed + 1)
+    inv_path = os.path.join(out_dir, f"{pos.lower()}_inventory.{inventory_format}")
+    inv_pre = _preamble("Inventory", start, end, int(rng.integers(0, 3)))
+    if inventory_format == "csv":
+        _write_csv(inv_path, inv_pre, inv)
+    else:
+        _write_excel(inv_path, inv_pre, inv.head(EXCEL_MAX_ROWS))
+
+    sales = sales_frame(catalog, min(sales_rows, EXCEL_MAX_ROWS), pos, seed + 2)
+    sales_path = os.path.join(out_dir, f"{pos.lower()}_product_sales.xlsx")
+    _write_excel(sales_path, _preamble(LAYOUTS[pos]["title"], start, end, int(rng.integers(0, 3))), sales)
+    return inv_path, sales_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=10_000, help="Inventory rows")
+    parser.add_argument("--sales-rows", type=int, default=None,
+                        help="Product sales rows (default: rows / 4)")
+    parser.add_argument("--pos", choices=sorted(LAYOUTS), default="Dutchie")
+    parser.add_argument("--inventory-format", choices=["csv", "xlsx"], default="csv")
+    parser.add_argument("--out", default="synthetic_exports")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    for path in write_exports(
+        args.out, args.rows, args.sales_rows, args.pos, args.inventory_format, seed=args.seed
+    ):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
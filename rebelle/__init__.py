@@ -0,0 +1,8 @@
+"""
+Importable building blocks for the Rebelle Purchasing Dashboard.
+
+Everything in here is plain pandas / NumPy so it can be reused outside
+Streamlit. Module-level caches live here (not in `Rebelle buy.py`) because
+Streamlit re-executes the main script on every rerun, while imported
+modules stay loaded for the life of the process.
+"""
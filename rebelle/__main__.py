@@ -0,0 +1,5 @@
+import sys
+
+from rebelle.cli import main
+
+sys.exit(main())
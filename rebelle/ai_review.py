@@ -0,0 +1,186 @@
+"""
+AI buyer review of the forecast table, one request per category shard.
+
+Shards go out concurrently on a bounded thread pool (the calls are network
+bound), rows are sent as compact CSV instead of indented JSON, and every
+response is cached on disk by a hash of the exact request for CACHE_TTL_HOURS,
+so pressing the button twice costs nothing. Point the OpenAI client at any
+compatible endpoint (e.g. benchmarks/openai_stub.py) via its base_url.
+
+The openai SDK takes most of a second to import, so it is only loaded by
+`make_client`, when a review actually runs.
+"""
+import hashlib
+import importlib.util
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from rebelle.categories import category_sort_key
+from rebelle.dtypes import downcast_numeric
+from rebelle.engine import DETAIL_COLUMNS
+
+OPENAI_INSTALLED = importlib.util.find_spec("openai") is not None
+
+AI_MODEL = "gpt-4o-mini"
+AI_MAX_TOKENS = 600
+SYSTEM_PROMPT = "You are a sharp, no-BS cannabis retail buyer coach."
+
+# Concurrent requests in flight, and rows per request (larger categories split)
+MAX_WORKERS = 4
+SHARD_ROWS = 150
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "REBELLE_AI_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".rebelle", "ai_cache")
+)
+CACHE_TTL_HOURS = 24
+
+PROMPT_TEMPLATE = """
+You are an expert cannabis retail buyer and inventory strategist.
+
+You are looking at the {category} lines of an inventory dashboard for a store using {data_source}.
+Each row is a category/size/strain combo with its sales and coverage.
+
+Fields:
+- mastercategory / subcategory (normalized product category)
+- strain_type (indica / sativa / hybrid / disposable / infused etc.)
+- packagesize (like 3.5g, 1g, 5mg, 28g)
+- onhandunits (current inventory units in stock)
+- unitssold (units sold in the lookback window)
+- avgunitsperday (velocity estimate)
+- daysonhand (coverage in days)
+- reorderqty (suggested buy quantity)
+- reorderpriority (1=ASAP, 2=Watch, 3=Comfortable, 4=Dead)
+
+Target days on hand: {doh_threshold}
+
+Data (CSV, header first):
+{rows}
+Tasks:
+1. Call out any rows that look obviously wrong or risky
+   (for example: 0 onhand but lots of units sold, DOH way above 120,
+   or suggest reorder but DOH is already high).
+2. Briefly explain what a buyer should pay attention to in this slice:
+   - sizes / strains that are in danger of stockout
+   - anything that looks dead/overbought and could be discounted down.
+3. Keep it short, punchy, and buyer-friendly. No code, just bullet-style advice.
+"""
+
+
+def make_client(api_key, base_url=None):
+    """OpenAI client, importing the SDK on first use."""
+    from openai import OpenAI
+
+    return OpenAI(api_key=api_key, base_url=base_url)
+
+
+class ResponseCache:
+    """One JSON file per request hash; entries older than the TTL are ignored."""
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, ttl_hours=CACHE_TTL_HOURS):
+        self.root = root
+        self.ttl_seconds = ttl_hours * 3600
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                return None
+            with open(path, encoding="utf-8") as fh:
+                return json.load(fh)["text"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key, text):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self._path(key) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"created": time.time(), "text": text}, fh)
+        os.replace(tmp, self._path(key))
+
+
+def request_key(model, messages):
+    """Stable hash of everything that determines the response."""
+    payload = json.dumps([model, AI_MAX_TOKENS, messages], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def review_shards(detail_view, shard_rows=SHARD_ROWS):
+    """
+    [(label, compact CSV)] per category, most urgent lines first, with large
+    categories split into chunks of `shard_rows`.
+    """
+    cols = [c for c in DETAIL_COLUMNS if c in detail_view.columns]
+    view = detail_view[cols].sort_values(["reorderpriority", "daysonhand"])
+    # Whole-number floats go out as "757", not "757.00"
+    view = view.assign(**{
+        c: downcast_numeric(view[c]) for c in view.columns if view[c].dtype.kind == "f"
+    })
+
+    shards = []
+    cats = sorted(view["subcategory"].astype(str).unique(), key=category_sort_key)
+    for cat in cats:
+        group = view[view["subcategory"].astype(str) == cat]
+        parts = range(0, len(group), shard_rows)
+        for n, start in enumerate(parts, start=1):
+            label = cat if len(parts) == 1 else f"{cat} ({n}/{len(parts)})"
+            chunk = group.iloc[start:start + shard_rows]
+            shards.append((label, chunk.to_csv(index=False, float_format="%.2f")))
+    return shards
+
+
+def _review_one(client, model, messages, cache):
+    """(text, from_cache) for one request. Failures come back as text, never raised."""
+    key = request_key(model, messages)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached, True
+    try:
+        resp = client.chat.completions.create(
+            model=model, messages=messages, max_tokens=AI_MAX_TOKENS
+        )
+        text = resp.choices[0].message.content
+    except Exception as e:
+        return f"AI check failed: {e}", False
+    if cache is not None:
+        try:
+            cache.put(key, text)
+        except OSError:
+            pass
+    return text, False
+
+
+def review_inventory(
+    client,
+    detail_view,
+    doh_threshold,
+    data_source,
+    model=AI_MODEL,
+    max_workers=MAX_WORKERS,
+    cache=None,
+):
+    """
+    Review every line of `detail_view`, category by category.
+    Returns [(label, text, from_cache)] in category order.
+    """
+    jobs = []
+    for label, rows in review_shards(detail_view):
+        prompt = PROMPT_TEMPLATE.format(
+            category=label, data_source=data_source, doh_threshold=doh_threshold, rows=rows
+        )
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ]
+        jobs.append((label, messages))
+    if not jobs:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+        results = pool.map(lambda job: _review_one(client, model, job[1], cache), jobs)
+        return [(label, text, hit) for (label, _), (text, hit) in zip(jobs, results)]
@@ -0,0 +1,144 @@
+"""
+Product attribute extraction from item / product names: strain type and
+package size.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+VAPE_KEYWORDS = ["vape", "cart", "cartridge", "pen", "pod"]
+PREROLL_KEYWORDS = ["pre roll", "preroll", "pre-roll", "joint"]
+STRAIN_KEYWORDS = ["indica", "sativa", "hybrid", "cbd"]
+
+# Sizes that all mean "an ounce"
+OUNCE_ALIASES = ["1oz", "1.0oz", "28g", "28.0g"]
+
+MG_PATTERN = r"(\d+(?:\.\d+)?\s?mg)"
+WEIGHT_PATTERN = r"((?:\d+\.?\d*|\.\d+)\s?(?:g|oz))"
+HALF_GRAM_PATTERN = r"\b0\.5\b|\b\.5\b"
+
+_MG_RE = re.compile(MG_PATTERN)
+_WEIGHT_RE = re.compile(WEIGHT_PATTERN)
+_HALF_GRAM_RE = re.compile(HALF_GRAM_PATTERN)
+
+
+def _any_of(keywords):
+    return "|".join(re.escape(k) for k in keywords)
+
+
+def extract_strain_type(name, subcat=None):
+    s = str(name).lower()
+    base = "unspecified"
+    for strain in STRAIN_KEYWORDS:
+        if strain in s:
+            base = strain
+            break
+
+    # Recognize vapes / pens
+    vape = any(k in s for k in VAPE_KEYWORDS)
+    preroll = any(k in s for k in PREROLL_KEYWORDS)
+
+    # Disposables (vapes)
+    if ("disposable" in s or "dispos" in s) and vape:
+        return base + " disposable" if base != "unspecified" else "disposable"
+
+    # Infused pre-rolls
+    if "infused" in s and preroll:
+        return base + " infused" if base != "unspecified" else "infused"
+
+    return base
+
+
+def extract_size(text, context=None):
+    s = str(text).lower()
+
+    # mg doses
+    mg = _MG_RE.search(s)
+    if mg:
+        return mg.group(1).replace(" ", "")
+
+    # grams / ounces: normalize 1oz/1 oz/28g to "28g"
+    g = _WEIGHT_RE.search(s)
+    if g:
+        val = g.group(1).replace(" ", "")
+        if val in OUNCE_ALIASES:
+            return "28g"
+        return val
+
+    # 0.5g style vapes (if "vape", "cart", "pen", "pod" appears)
+    if any(k in s for k in VAPE_KEYWORDS):
+        if _HALF_GRAM_RE.search(s):
+            return "0.5g"
+
+    return "unspecified"
+
+
+def size_key(size):
+    """
+    One spelling per package size, for comparing sizes: '.5g' -> '0.5g',
+    '1.0g' -> '1g', '28.0g' -> '28g'. Anything without a number
+    ('unspecified') is returned as is.
+    """
+    size = str(size).strip().lower()
+    number = size.rstrip("abcdefghijklmnopqrstuvwxyz ")
+    try:
+        return f"{float(number):g}{size[len(number):].strip()}"
+    except ValueError:
+        return size
+
+
+def _strain_types(s):
+    """Vectorized `extract_strain_type` over an already-lowercased Series."""
+    base = pd.Series(
+        np.select(
+            [s.str.contains(k, regex=False) for k in STRAIN_KEYWORDS],
+            STRAIN_KEYWORDS,
+            default="unspecified",
+        ),
+        index=s.index,
+        dtype=object,
+    )
+    vape = s.str.contains(_any_of(VAPE_KEYWORDS))
+    preroll = s.str.contains(_any_of(PREROLL_KEYWORDS))
+    disposable = s.str.contains("dispos", regex=False) & vape
+    infused = s.str.contains("infused", regex=False) & preroll & ~disposable
+
+    has_base = base != "unspecified"
+    out = base.copy()
+    out[disposable] = np.where(has_base[disposable], base[disposable] + " disposable", "disposable")
+    out[infused] = np.where(has_base[infused], base[infused] + " infused", "infused")
+    return out
+
+
+def _package_sizes(s):
+    """Vectorized `extract_size` over an already-lowercased Series."""
+    mg = s.str.extract(MG_PATTERN, expand=False).str.replace(" ", "", regex=False)
+    weight = s.str.extract(WEIGHT_PATTERN, expand=False).str.replace(" ", "", regex=False)
+    weight = weight.where(~weight.isin(OUNCE_ALIASES), "28g")
+    half = s.str.contains(_any_of(VAPE_KEYWORDS)) & s.str.contains(HALF_GRAM_PATTERN)
+
+    out = mg.astype(object)
+    out = out.where(out.notna(), weight.astype(object))
+    out = out.where(out.notna(), np.where(half, "0.5g", "unspecified"))
+    return out
+
+
+def extract_attributes(names):
+    """
+    Batch `extract_strain_type` + `extract_size` for a column of product names.
+
+    Work is done once per distinct name with vectorized string ops, then
+    broadcast back to every row. Returns a frame with `strain_type` and
+    `packagesize` aligned to the input index.
+    """
+    names = pd.Series(names)
+    codes, uniques = pd.factorize(names, use_na_sentinel=False)
+    lowered = pd.Series(uniques, dtype=object).map(str).str.lower().astype(object)
+
+    strain = _strain_types(lowered).to_numpy(dtype=object)
+    size = _package_sizes(lowered).to_numpy(dtype=object)
+    return pd.DataFrame(
+        {"strain_type": strain[codes], "packagesize": size[codes]},
+        index=names.index,
+    )
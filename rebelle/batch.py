@@ -0,0 +1,161 @@
+"""
+Multi-store batch forecasting across a process pool.
+
+Stores come either from a manifest CSV with `store,inventory,sales` columns
+(paths relative to the manifest) or from a directory with one sub-folder per
+store, each holding an inventory export and a product sales report.
+"""
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from rebelle.engine import (
+    DEFAULT_DATE_DIFF,
+    DEFAULT_DOH_THRESHOLD,
+    DEFAULT_VELOCITY_ADJUSTMENT,
+    DETAIL_COLUMNS,
+    run_forecast,
+)
+from rebelle.readers import read_inventory_file, read_sales_file
+from rebelle.schemas import get_profile
+
+INVENTORY_EXTS = (".csv", ".xlsx", ".xls")
+SALES_EXTS = (".xlsx", ".xls")
+REPORT_COLUMNS = ["store", "status", "lines", "read_s", "forecast_s", "total_s", "error"]
+
+
+def _pick(folder, token, exts):
+    """First file in `folder` whose name contains `token` and has one of `exts`."""
+    for fname in sorted(os.listdir(folder)):
+        low = fname.lower()
+        if token in low and low.endswith(exts) and "extra" not in low:
+            return os.path.join(folder, fname)
+    return None
+
+
+def discover_stores(directory):
+    """[(store, inventory path, sales path)] from one sub-folder per store."""
+    jobs = []
+    for store in sorted(os.listdir(directory)):
+        folder = os.path.join(directory, store)
+        if not os.path.isdir(folder):
+            continue
+        jobs.append(
+            (store, _pick(folder, "inventory", INVENTORY_EXTS), _pick(folder, "sales", SALES_EXTS))
+        )
+    return jobs
+
+
+def read_manifest(path):
+    """[(store, inventory path, sales path)] from a store,inventory,sales CSV."""
+    manifest = pd.read_csv(path, dtype=str).fillna("")
+    manifest.columns = manifest.columns.str.strip().str.lower()
+    base = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    for row in manifest.itertuples(index=False):
+        inv = os.path.join(base, row.inventory) if row.inventory else None
+        sales = os.path.join(base, row.sales) if row.sales else None
+        jobs.append((row.store, inv, sales))
+    return jobs
+
+
+def unique_store_names(jobs):
+    """
+    Jobs with repeated store names renamed "<store> (<inventory file stem>)",
+    plus a counter if that still clashes, so no store's results overwrite
+    another's.
+    """
+    counts = Counter(job[0] for job in jobs)
+    seen = set()
+    out = []
+    for store, inv, sales in jobs:
+        name = store
+        if counts[store] > 1:
+            stem = os.path.splitext(os.path.basename(inv))[0] if inv else "no inventory"
+            name = f"{store} ({stem})"
+        base, n = name, 2
+        while name in seen:
+            name = f"{base} {n}"
+            n += 1
+        seen.add(name)
+        out.append((name, inv, sales))
+    return out
+
+
+def forecast_store(job, doh_threshold, velocity_adjustment, date_diff, pos=None):
+    """
+    Run one store end to end. Never raises: returns (store, detail or None,
+    report row) so one bad export cannot sink the whole batch.
+    """
+    store, inv_path, sales_path = job
+    report = dict.fromkeys(REPORT_COLUMNS, None)
+    report.update(store=store, status="ok", lines=0, error="")
+    started = time.perf_counter()
+    try:
+        if not inv_path or not sales_path:
+            raise FileNotFoundError("missing inventory or sales export")
+        inv_raw = read_inventory_file(inv_path)
+        sales_raw = read_sales_file(sales_path, schema=get_profile(pos).sales)
+        read_done = time.perf_counter()
+        report["read_s"] = round(read_done - started, 3)
+
+        detail = run_forecast(
+            inv_raw, sales_raw, doh_threshold, velocity_adjustment, date_diff, pos
+        )
+        report["forecast_s"] = round(time.perf_counter() - read_done, 3)
+        report["lines"] = len(detail)
+    except Exception as e:
+        detail = None
+        report.update(status="error", error=f"{type(e).__name__}: {e}")
+    report["total_s"] = round(time.perf_counter() - started, 3)
+    return store, detail, report
+
+
+def run_batch(
+    jobs,
+    doh_threshold=DEFAULT_DOH_THRESHOLD,
+    velocity_adjustment=DEFAULT_VELOCITY_ADJUSTMENT,
+    date_diff=DEFAULT_DATE_DIFF,
+    max_workers=None,
+    pos=None,
+):
+    """
+    Forecast every store in a process pool sized to the machine's cores.
+    Returns (consolidated reorder table with a `store` column, per-store report).
+    Repeated store names are made unique first (see unique_store_names).
+    """
+    jobs = unique_store_names(jobs)
+    max_workers = max_workers or os.cpu_count() or 1
+    details = {}
+    reports = []
+    with ProcessPoolExecutor(max_workers=min(max_workers, max(len(jobs), 1))) as pool:
+        futures = [
+            pool.submit(forecast_store, job, doh_threshold, velocity_adjustment, date_diff, pos)
+            for job in jobs
+        ]
+        for fut in as_completed(futures):
+            store, detail, report = fut.result()
+            reports.append(report)
+            if detail is not None:
+                details[store] = detail
+
+    order = [job[0] for job in jobs]
+    frames = [
+        details[s][[c for c in DETAIL_COLUMNS if c in details[s].columns]].assign(store=s)
+        for s in order
+        if s in details
+    ]
+    if frames:
+        combined = pd.concat(frames, ignore_index=True)
+        combined = combined[["store"] + [c for c in combined.columns if c != "store"]]
+    else:
+        combined = pd.DataFrame(columns=["store"] + DETAIL_COLUMNS)
+
+    report = pd.DataFrame(reports, columns=REPORT_COLUMNS)
+    report["store"] = pd.Categorical(report["store"], categories=order, ordered=True)
+    report = report.sort_values("store").reset_index(drop=True)
+    report["store"] = report["store"].astype(str)
+    return combined, report
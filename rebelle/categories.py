@@ -0,0 +1,98 @@
+"""
+Category normalization: map raw POS category strings onto the canonical
+Rebelle categories.
+"""
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# ✅ Canonical Rebelle category names (values, not column names)
+REB_CATEGORIES = [
+    "flower",
+    "pre rolls",
+    "vapes",
+    "edibles",
+    "beverages",
+    "concentrates",
+    "tinctures",
+    "topicals",
+]
+
+# Keyword rules, checked in order – the first category with a keyword that
+# appears anywhere in the (lowercased, stripped) raw value wins.
+CATEGORY_KEYWORDS = [
+    ("flower", ["flower", "bud", "buds", "cannabis flower"]),
+    ("pre rolls", ["pre roll", "preroll", "pre-roll", "joint", "joints"]),
+    ("vapes", ["vape", "cart", "cartridge", "pen", "pod"]),
+    ("edibles", ["edible", "gummy", "chocolate", "chew", "cookies"]),
+    ("beverages", ["beverage", "drink", "drinkable", "shot", "beverages"]),
+    ("concentrates", ["concentrate", "wax", "shatter", "crumble", "resin", "rosin", "dab"]),
+    ("tinctures", ["tincture", "tinctures", "drops", "sublingual", "dropper"]),
+    ("topicals", ["topical", "lotion", "cream", "salve", "balm"]),
+]
+
+
+def _build_category_matcher():
+    """
+    One anchored alternation with a lookahead per category. Alternatives are
+    tried left to right at position 0, so the first category whose keywords
+    occur anywhere in the string wins – same priority as the rule list.
+    """
+    branches = []
+    for idx, (_, keywords) in enumerate(CATEGORY_KEYWORDS):
+        alts = "|".join(re.escape(k) for k in keywords)
+        branches.append(f"(?=.*?(?:{alts}))(?P<c{idx}>)")
+    return re.compile("^(?:" + "|".join(branches) + ")", re.DOTALL)
+
+
+_CATEGORY_MATCHER = _build_category_matcher()
+
+
+def normalize_rebelle_category(raw):
+    """Map similar names to canonical Rebelle categories."""
+    s = str(raw).lower().strip()
+    for canonical, keywords in CATEGORY_KEYWORDS:
+        if any(k in s for k in keywords):
+            return canonical
+    return s  # unchanged if not matched
+
+
+@lru_cache(maxsize=4096)
+def classify_category(raw_str):
+    """Precompiled-matcher version of `normalize_rebelle_category` for one string."""
+    s = raw_str.lower().strip()
+    m = _CATEGORY_MATCHER.match(s)
+    if m is None:
+        return s
+    return CATEGORY_KEYWORDS[int(m.lastgroup[1:])][0]
+
+
+def normalize_categories(values):
+    """
+    Vectorized `normalize_rebelle_category` for a whole column.
+
+    The column is factorized so each distinct raw value is classified once
+    (and remembered across reruns by `classify_category`), then the result is
+    broadcast back to every row.
+    """
+    values = pd.Series(values)
+    codes, uniques = pd.factorize(values)
+    mapped = np.array([classify_category(str(u)) for u in uniques], dtype=object)
+    out = mapped[codes] if len(mapped) else np.empty(len(codes), dtype=object)
+
+    # factorize folds None / NaN together; keep their str() spellings distinct
+    na_mask = codes == -1
+    if na_mask.any():
+        out[na_mask] = [classify_category(str(v)) for v in values[na_mask]]
+
+    return pd.Series(out, index=values.index, name=values.name, dtype=object)
+
+
+def category_sort_key(cat):
+    """Rebelle categories first in their canonical order, then everything else A–Z."""
+    c_low = str(cat).lower()
+    if c_low in REB_CATEGORIES:
+        return (REB_CATEGORIES.index(c_low), c_low)
+    return (len(REB_CATEGORIES), c_low)
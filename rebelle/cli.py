@@ -0,0 +1,157 @@
+"""
+Command-line entry point, so forecasts can run from cron without the UI.
+
+    python -m rebelle forecast --inventory inventory.csv --sales sales.xlsx \\
+        --doh-threshold 21 --velocity-adjustment 0.5 --date-diff 60 \\
+        --output detail.csv
+
+    python -m rebelle batch --stores exports/ --output reorder_all.csv
+"""
+import argparse
+import os
+import sys
+import time
+
+from rebelle.batch import discover_stores, read_manifest, run_batch
+from rebelle.columns import ColumnDetectionError
+from rebelle.engine import (
+    DEFAULT_DATE_DIFF,
+    DEFAULT_DOH_THRESHOLD,
+    DEFAULT_VELOCITY_ADJUSTMENT,
+    DETAIL_COLUMNS,
+    build_detail,
+    prepare_inventory,
+    prepare_revenue,
+    prepare_sales,
+    stream_inventory_summary,
+    summarize_inventory,
+    summarize_revenue,
+    summarize_sales,
+)
+from rebelle.readers import is_csv_name, read_inventory_file, read_sales_file
+from rebelle.schemas import GENERIC_POS, PROFILES, get_profile
+
+
+def write_table(df, path):
+    """Write a table as CSV, Excel or Parquet depending on the file extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".xlsx", ".xls"):
+        df.to_excel(path, index=False)
+    elif ext == ".parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def _add_forecast_settings(parser):
+    parser.add_argument("--doh-threshold", type=int, default=DEFAULT_DOH_THRESHOLD,
+                        help="Target days on hand (default: %(default)s)")
+    parser.add_argument("--velocity-adjustment", type=float,
+                        default=DEFAULT_VELOCITY_ADJUSTMENT,
+                        help="Velocity multiplier (default: %(default)s)")
+    parser.add_argument("--date-diff", type=int, default=DEFAULT_DATE_DIFF,
+                        help="Days in the sales period (default: %(default)s)")
+    parser.add_argument("--pos", choices=sorted(PROFILES), default=GENERIC_POS,
+                        help="POS schema profile for column detection (default: %(default)s)")
+
+
+def cmd_forecast(args):
+    started = time.perf_counter()
+
+    if args.stream_inventory and is_csv_name(args.inventory):
+        inv_summary, _ = stream_inventory_summary(args.inventory, pos=args.pos)
+    else:
+        inv_summary = summarize_inventory(
+            prepare_inventory(read_inventory_file(args.inventory), args.pos)
+        )
+    sales_summary = summarize_sales(
+        prepare_sales(read_sales_file(args.sales, schema=get_profile(args.pos).sales), args.pos)
+    )
+    revenue_summary = None
+    if args.extra_sales:
+        extra_raw = read_sales_file(
+            args.extra_sales, kind="extra_sales", schema=get_profile(args.pos).revenue
+        )
+        revenue_summary = summarize_revenue(prepare_revenue(extra_raw, args.pos))
+    detail = build_detail(
+        inv_summary, sales_summary, args.doh_threshold, args.velocity_adjustment, args.date_diff,
+        revenue_summary,
+    )
+
+    write_table(detail[[c for c in DETAIL_COLUMNS if c in detail.columns]], args.output)
+    print(
+        f"Wrote {len(detail):,} forecast lines to {args.output} "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+    return 0
+
+
+def cmd_batch(args):
+    started = time.perf_counter()
+    jobs = read_manifest(args.manifest) if args.manifest else discover_stores(args.stores)
+    if not jobs:
+        print("Error: no stores found", file=sys.stderr)
+        return 2
+
+    combined, report = run_batch(
+        jobs, args.doh_threshold, args.velocity_adjustment, args.date_diff, args.workers,
+        pos=args.pos,
+    )
+    write_table(combined, args.output)
+    if args.report:
+        write_table(report, args.report)
+
+    print(report.to_string(index=False))
+    failed = int((report["status"] != "ok").sum())
+    print(
+        f"Wrote {len(combined):,} lines for {len(jobs) - failed}/{len(jobs)} stores "
+        f"to {args.output} in {time.perf_counter() - started:.2f}s"
+    )
+    return 1 if failed else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m rebelle",
+        description="Rebelle purchasing forecasts without the Streamlit UI.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    fc = sub.add_parser("forecast", help="Build the reorder / days-on-hand detail table")
+    fc.add_argument("--inventory", required=True, help="Inventory export (CSV or Excel)")
+    fc.add_argument("--sales", required=True, help="Product sales report (Excel)")
+    fc.add_argument("--extra-sales",
+                    help="Optional extra sales report with revenue (and cost) columns")
+    fc.add_argument("--output", "-o", default="detail.csv",
+                    help="Output file: .csv, .xlsx or .parquet (default: %(default)s)")
+    fc.add_argument("--stream-inventory", action="store_true",
+                    help="Read a CSV inventory in chunks to bound memory")
+    _add_forecast_settings(fc)
+    fc.set_defaults(func=cmd_forecast)
+
+    bt = sub.add_parser("batch", help="Forecast many stores in parallel")
+    src = bt.add_mutually_exclusive_group(required=True)
+    src.add_argument("--stores", help="Directory with one sub-folder of exports per store")
+    src.add_argument("--manifest", help="CSV with store,inventory,sales columns")
+    bt.add_argument("--output", "-o", default="reorder_all_stores.csv",
+                    help="Consolidated reorder table (default: %(default)s)")
+    bt.add_argument("--report", help="Optional per-store timing / error report file")
+    bt.add_argument("--workers", type=int, default=None,
+                    help="Worker processes (default: one per CPU core)")
+    _add_forecast_settings(bt)
+    bt.set_defaults(func=cmd_batch)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (ColumnDetectionError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,359 @@
+"""
+Column auto-detection for BLAZE / Dutchie exports.
+
+Each export kind is a ColumnSchema: an ordered set of internal fields with
+their aliases normalized once at import. Matching is cached per header
+fingerprint, so a layout is only detected the first time it is seen, and a
+failed match explains which headers came closest to which aliases.
+"""
+import difflib
+import re
+from functools import lru_cache
+
+
+class ColumnDetectionError(ValueError):
+    """Raised when an export is missing one of the columns the pipeline needs."""
+
+
+def normalize_col(col: str) -> str:
+    """Lower + strip non-alphanumerics for matching (no spaces, etc.)."""
+    return re.sub(r"[^a-z0-9]", "", str(col).lower())
+
+
+def detect_column(columns, aliases):
+    """
+    Auto-detect a column by comparing normalized names
+    against a list of alias keys (already normalized).
+    """
+    norm_map = {normalize_col(c): c for c in columns}
+    for alias in aliases:
+        if alias in norm_map:
+            return norm_map[alias]
+    return None
+
+
+# Headers closer than this (difflib ratio) to an alias are named in diagnostics
+DIAGNOSTIC_CUTOFF = 0.6
+# Distinct header layouts remembered per schema
+LAYOUT_CACHE_SIZE = 256
+
+
+class ColumnSchema:
+    """
+    Ordered {internal name: aliases} for one export kind.
+
+    `required` lists internal names that must be found; an entry may be a
+    tuple meaning "any one of these". `reject` maps an internal name to
+    normalized headers that must never be picked for it. Fields are matched
+    in order and a header is only ever used once.
+    """
+
+    def __init__(self, label, fields, required=None, reject=None, hint=""):
+        self.label = label
+        self.fields = [
+            (internal, tuple(dict.fromkeys(normalize_col(a) for a in aliases)))
+            for internal, aliases in fields.items()
+        ]
+        self.aliases = frozenset(a for _, aliases in self.fields for a in aliases)
+        self.required = list(fields) if required is None else required
+        self.reject = {k: frozenset(v) for k, v in (reject or {}).items()}
+        self.hint = hint
+        self._match = lru_cache(maxsize=LAYOUT_CACHE_SIZE)(self._match_layout)
+
+    def __getstate__(self):
+        # The per-instance layout cache is rebuilt on unpickle (process pools)
+        state = self.__dict__.copy()
+        del state["_match"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._match = lru_cache(maxsize=LAYOUT_CACHE_SIZE)(self._match_layout)
+
+    def extended(self, label, extra_aliases):
+        """Copy with `extra_aliases` ({internal: [...]}) tried before the existing ones."""
+        fields = {
+            internal: list(extra_aliases.get(internal, [])) + list(aliases)
+            for internal, aliases in self.fields
+        }
+        return ColumnSchema(label, fields, self.required, self.reject, self.hint)
+
+    def wants(self, column):
+        """True if `column` could match one of the fields (usable as `usecols`)."""
+        return normalize_col(column) in self.aliases
+
+    def _match_layout(self, columns):
+        norm_map = {normalize_col(c): c for c in columns}
+        mapping = {}
+        for internal, aliases in self.fields:
+            rejected = self.reject.get(internal, frozenset())
+            for alias in aliases:
+                col = norm_map.get(alias)
+                if col is not None and col not in mapping and alias not in rejected:
+                    mapping[col] = internal
+                    break
+        found = set(mapping.values())
+        missing = tuple(
+            req for req in self.required
+            if not (set(req) & found if isinstance(req, tuple) else req in found)
+        )
+        return mapping, missing
+
+    def match(self, columns):
+        """{raw column: internal name}; raises ColumnDetectionError with a diagnostic."""
+        mapping, missing = self._match(tuple(str(c) for c in columns))
+        if missing:
+            raise ColumnDetectionError(
+                f"{self.hint}\n\n{self.diagnose(columns, missing)}".strip()
+            )
+        return dict(mapping)
+
+    def diagnose(self, columns, missing):
+        """Which required fields were not found, and the nearest header/alias pairs."""
+        headers = {normalize_col(c): str(c) for c in columns}
+        aliases_by_field = dict(self.fields)
+        lines = [f"Schema: {self.label}"]
+        for req in missing:
+            names = req if isinstance(req, tuple) else (req,)
+            near = []
+            for name in names:
+                for alias in aliases_by_field[name]:
+                    for norm, raw in headers.items():
+                        ratio = difflib.SequenceMatcher(None, alias, norm).ratio()
+                        if ratio >= DIAGNOSTIC_CUTOFF:
+                            near.append((ratio, raw, alias))
+            near.sort(reverse=True)
+            closest, seen = [], set()
+            for ratio, raw, alias in near:
+                if raw not in seen:
+                    seen.add(raw)
+                    closest.append(f"'{raw}' (~'{alias}', {ratio:.0%})")
+                if len(closest) == 3:
+                    break
+            label = " or ".join(names)
+            if closest:
+                lines.append(f"- {label}: not found; nearest headers: " + ", ".join(closest))
+            else:
+                expected = ", ".join(aliases_by_field[names[0]][:4])
+                lines.append(f"- {label}: not found; no header resembles {expected}, ...")
+        return "\n".join(lines)
+
+    def cache_info(self):
+        return self._match.cache_info()
+
+
+# Core inventory columns (supports BLAZE & Dutchie)
+INV_NAME_ALIASES = [
+    "product", "productname", "item", "itemname", "name", "skuname",
+    "skuid", "product name"
+]
+INV_CAT_ALIASES = [
+    "category", "subcategory", "productcategory", "department",
+    "mastercategory", "product category", "cannabis"
+]
+INV_QTY_ALIASES = [
+    "available", "onhand", "onhandunits", "quantity", "qty",
+    "quantityonhand", "instock", "currentquantity", "current quantity",
+    "inventoryavailable", "inventory available"
+]
+
+
+INVENTORY_SCHEMA = ColumnSchema(
+    "Generic inventory",
+    {
+        "itemname": INV_NAME_ALIASES,
+        "subcategory": INV_CAT_ALIASES,
+        "onhandunits": INV_QTY_ALIASES,
+    },
+    hint=(
+        "Could not auto-detect inventory columns (product / category / on-hand). "
+        "Check your Inventory export headers."
+    ),
+)
+
+
+def detect_inventory_columns(columns, schema=INVENTORY_SCHEMA):
+    """
+    Map raw inventory headers to {raw column: internal name} for
+    itemname / subcategory / onhandunits.
+    """
+    return schema.match(columns)
+
+
+# Product sales columns – quantity STRICTLY counts, not $$
+SALES_NAME_ALIASES = [
+    "product", "productname", "product title", "producttitle",
+    "productid", "name", "item", "itemname", "skuname",
+    "sku", "description", "product name"
+]
+SALES_QTY_ALIASES = [
+    "quantitysold", "quantity sold",
+    "qtysold", "qty sold",
+    "itemsold", "item sold", "items sold",
+    "unitssold", "units sold", "unit sold", "unitsold", "units",
+    "totalunits", "total units",
+    "quantity", "qty",
+]
+SALES_CATEGORY_ALIASES = [
+    "mastercategory", "category", "master_category",
+    "productcategory", "product category",
+    "department", "dept", "subcategory", "productcategoryname",
+    "product category name"
+]
+# A "quantity" match with one of these names is really a revenue column
+REVENUE_LIKE = {
+    "sales", "netsales", "totalsales", "retailvalue",
+    "grosssales", "saleamount"
+}
+
+
+SALES_SCHEMA = ColumnSchema(
+    "Generic product sales",
+    {
+        "product_name": SALES_NAME_ALIASES,
+        "unitssold": SALES_QTY_ALIASES,
+        "mastercategory": SALES_CATEGORY_ALIASES,
+    },
+    # Extra safety: a quantity match that is clearly a revenue column is rejected
+    reject={"unitssold": REVENUE_LIKE},
+    hint=(
+        "Product Sales file detected but could not find required columns.\n\n"
+        "Looked for some variant of: product / product name, quantity or items sold, "
+        "and category or product category.\n\n"
+        "Tip: Use Dutchie 'Product Sales' or Blaze 'Sales by Product' exports "
+        "without manually editing the headers."
+    ),
+)
+
+
+def detect_sales_columns(columns, schema=SALES_SCHEMA):
+    """
+    Map raw product-sales headers to {raw column: internal name} for
+    product_name / unitssold / mastercategory.
+    """
+    return schema.match(columns)
+
+
+# Extra sales detail (revenue) – dollars per product, optional cost
+REVENUE_ALIASES = [
+    "netsales", "net sales", "totalsales", "total sales", "revenue",
+    "grosssales", "gross sales", "sales", "saleamount", "retailvalue"
+]
+COST_ALIASES = [
+    "cost", "cogs", "totalcost", "total cost", "costofgoods",
+    "costofgoodssold", "cost of goods sold", "unitcost"
+]
+
+
+REVENUE_SCHEMA = ColumnSchema(
+    "Generic extra sales (revenue)",
+    {
+        "product_name": SALES_NAME_ALIASES,
+        "unitssold": SALES_QTY_ALIASES,
+        "mastercategory": SALES_CATEGORY_ALIASES,
+        "revenue": REVENUE_ALIASES,
+        "cost": COST_ALIASES,
+    },
+    required=["product_name", "unitssold", "mastercategory", "revenue"],
+    reject={"unitssold": REVENUE_LIKE},
+    hint=(
+        "Extra Sales file detected but could not find required columns.\n\n"
+        "Looked for some variant of: product / product name, quantity or items sold, "
+        "category, and net / total sales dollars (cost or COGS is optional)."
+    ),
+)
+
+
+def detect_revenue_columns(columns, schema=REVENUE_SCHEMA):
+    """
+    Map raw extra-sales headers to {raw column: internal name} for
+    product_name / unitssold / mastercategory / revenue, plus cost if present.
+    """
+    return schema.match(columns)
+
+
+# Vendor / SKU / price mapping used for bulk purchase orders
+VENDOR_ALIASES = [
+    "vendor", "vendorname", "vendor name", "supplier", "suppliername",
+    "distributor", "manufacturer"
+]
+VENDOR_SKU_ALIASES = [
+    "sku", "skuid", "vendorsku", "vendor sku", "itemid", "item id",
+    "productid", "partnumber"
+]
+VENDOR_PRODUCT_ALIASES = [
+    "product", "productname", "product name", "description", "item",
+    "itemname", "name", "skuname"
+]
+VENDOR_PRICE_ALIASES = [
+    "unitprice", "unit price", "unitcost", "unit cost", "cost",
+    "costperunit", "wholesale", "wholesaleprice", "price"
+]
+# Optional per-vendor header details
+VENDOR_LICENSE_ALIASES = ["vendorlicense", "license", "licensenumber", "license #"]
+VENDOR_ADDRESS_ALIASES = ["vendoraddress", "address"]
+VENDOR_CONTACT_ALIASES = ["vendorcontact", "contact", "email", "vendoremail"]
+
+
+VENDOR_MAP_SCHEMA = ColumnSchema(
+    "Vendor mapping",
+    {
+        "vendor": VENDOR_ALIASES,
+        "sku": VENDOR_SKU_ALIASES,
+        "product_name": VENDOR_PRODUCT_ALIASES,
+        "subcategory": INV_CAT_ALIASES,
+        "unitprice": VENDOR_PRICE_ALIASES,
+        "vendor_license": VENDOR_LICENSE_ALIASES,
+        "vendor_address": VENDOR_ADDRESS_ALIASES,
+        "vendor_contact": VENDOR_CONTACT_ALIASES,
+    },
+    required=["vendor", "sku", "product_name", "subcategory", "unitprice"],
+    hint=(
+        "Could not auto-detect vendor mapping columns. Expected some variant of: "
+        "vendor, SKU, product name, category and unit price/cost."
+    ),
+)
+
+
+def detect_vendor_map_columns(columns):
+    """
+    Map raw vendor-mapping headers to {raw column: internal name} for
+    vendor / sku / product_name / subcategory / unitprice, plus any of
+    vendor_license / vendor_address / vendor_contact that are present.
+    """
+    return VENDOR_MAP_SCHEMA.match(columns)
+
+
+# Purchase order line items (PO Builder CSV import)
+PO_STRAIN_ALIASES = ["strain", "straintype", "strain type", "type", "cannabistype"]
+PO_SIZE_ALIASES = ["size", "packagesize", "package size", "unitsize", "weight"]
+PO_QTY_ALIASES = [
+    "qty", "quantity", "orderqty", "order qty", "reorderqty", "units", "cases"
+]
+
+
+PO_LINE_SCHEMA = ColumnSchema(
+    "PO line items",
+    {
+        "SKU": VENDOR_SKU_ALIASES,
+        "Description": VENDOR_PRODUCT_ALIASES,
+        "Strain": PO_STRAIN_ALIASES,
+        "Size": PO_SIZE_ALIASES,
+        "Qty": PO_QTY_ALIASES,
+        "Unit Price": VENDOR_PRICE_ALIASES,
+    },
+    required=["Qty", ("SKU", "Description")],
+    hint=(
+        "Could not auto-detect PO line columns. Expected a quantity column plus "
+        "a SKU or product description (optionally strain, size and unit price)."
+    ),
+)
+
+
+def detect_po_line_columns(columns):
+    """
+    Map raw line-item headers to {raw column: PO column} for SKU /
+    Description / Strain / Size / Qty / Unit Price. Needs a quantity plus a
+    SKU or description; the rest are optional.
+    """
+    return PO_LINE_SCHEMA.match(columns)
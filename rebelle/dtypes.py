@@ -0,0 +1,56 @@
+"""
+Compact dtypes: Categorical for low-cardinality text, downcast numerics.
+
+Many buyer sessions share one box and each keeps its parsed exports in
+session state, so frames are shrunk once at ingest and stay small through
+the groupbys / merges of the forecast pipeline.
+"""
+import pandas as pd
+
+# Text columns with at most this share of distinct values become Categorical
+CATEGORY_MAX_RATIO = 0.5
+
+
+def as_categories(df, columns):
+    """Cast the given (present) columns to Categorical in place and return df."""
+    for col in columns:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def downcast_numeric(s):
+    """
+    Smallest integer dtype for whole-number data. Fractional floats (prices,
+    gram weights) are left at float64 so nothing loses precision.
+    """
+    if pd.api.types.is_bool_dtype(s) or not pd.api.types.is_numeric_dtype(s):
+        return s
+    if pd.api.types.is_float_dtype(s):
+        if s.isna().any() or not (s == s.round()).all():
+            return s
+    return pd.to_numeric(s, downcast="integer")
+
+
+def compact_frame(df):
+    """
+    Shrink a freshly parsed export: low-cardinality string columns become
+    Categorical and numeric columns are downcast.
+    """
+    df = df.copy()
+    n = max(len(df), 1)
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+            df[col] = downcast_numeric(s)
+        elif pd.api.types.infer_dtype(s, skipna=True) == "string":
+            if s.nunique(dropna=True) / n <= CATEGORY_MAX_RATIO:
+                df[col] = s.astype("category")
+    return df
+
+
+def frame_nbytes(df):
+    """Deep memory footprint of a DataFrame in bytes (0 for None)."""
+    if df is None:
+        return 0
+    return int(df.memory_usage(deep=True).sum())
@@ -0,0 +1,460 @@
+"""
+Headless forecast engine: inventory summary, sales velocity, merge,
+days-on-hand and reorder suggestions as plain functions on DataFrames.
+
+    detail = run_forecast(inv_raw, sales_raw, doh_threshold=21,
+                          velocity_adjustment=0.5, date_diff=60)
+
+The Streamlit dashboard and the `python -m rebelle` CLI both call into this.
+"""
+import numpy as np
+import pandas as pd
+
+from rebelle.attributes import extract_attributes, size_key
+from rebelle.categories import category_sort_key, normalize_categories
+from rebelle.columns import (
+    detect_inventory_columns,
+    detect_revenue_columns,
+    detect_sales_columns,
+)
+from rebelle.dtypes import as_categories, downcast_numeric
+from rebelle.matching import match_products, normalize_names
+from rebelle.readers import csv_header_row, open_source
+from rebelle.schemas import get_profile
+
+# Sidebar defaults for the forecast settings
+DEFAULT_DOH_THRESHOLD = 21
+DEFAULT_VELOCITY_ADJUSTMENT = 0.5
+DEFAULT_DATE_DIFF = 60
+
+INVENTORY_KEYS = ["subcategory", "strain_type", "packagesize"]
+SALES_KEYS = ["mastercategory", "packagesize"]
+# Sizes every matching subcategory always lists, stocked or not, so buyers
+# see the gap; keys match any subcategory containing them
+REQUIRED_SIZES = {
+    "flower": ["3.5g", "7g", "14g", "28g"],
+    "vapes": ["0.5g", "1g"],
+}
+# Low-cardinality keys carried as Categorical through the whole pipeline
+CATEGORY_COLUMNS = ["subcategory", "mastercategory", "strain_type", "packagesize"]
+
+PRIORITY_ASAP = "1 – Reorder ASAP"
+PRIORITY_WATCH = "2 – Watch Closely"
+PRIORITY_COMFORTABLE = "3 – Comfortable Cover"
+PRIORITY_DEAD = "4 – Dead Item"
+PRIORITY_LEVELS = [PRIORITY_ASAP, PRIORITY_WATCH, PRIORITY_COMFORTABLE, PRIORITY_DEAD]
+
+DETAIL_COLUMNS = [
+    "mastercategory",
+    "subcategory",
+    "strain_type",
+    "packagesize",
+    "onhandunits",
+    "unitssold",
+    "avgunitsperday",
+    "daysonhand",
+    "reorderqty",
+    "reorderpriority",
+    # Only present when an extra sales (revenue) report is loaded
+    "revenue",
+    "asp",
+    "marginperday",
+]
+# Dollar columns joined from the extra sales report (see summarize_revenue)
+REVENUE_COLUMNS = ["revenue", "cost", "asp", "unitmargin"]
+# SKU-level forecast: one row per inventory item, with its matched sales product
+SKU_COLUMNS = [
+    "itemname",
+    "product_name",
+    "match_confidence",
+    "match_method",
+    "subcategory",
+    "strain_type",
+    "packagesize",
+    "onhandunits",
+    "unitssold",
+    "avgunitsperday",
+    "daysonhand",
+    "reorderqty",
+    "reorderpriority",
+]
+# Leading flag column of the forecast grid: daysonhand under the DOH threshold
+LOW_DOH_FLAG = "belowdoh"
+
+# Rows per chunk when streaming an inventory CSV
+INVENTORY_CHUNK_ROWS = 50_000
+
+
+def _clean_inventory_headers(columns):
+    return pd.Index(columns).astype(str).str.strip().str.lower()
+
+
+def _to_quantity(s):
+    """Numeric, NaN → 0, downcast; tolerates Categorical text columns."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        s = s.astype(object)
+    return downcast_numeric(pd.to_numeric(s, errors="coerce").fillna(0))
+
+
+def prepare_inventory(inv_df, pos=None):
+    """
+    Rename detected inventory columns to itemname / subcategory / onhandunits,
+    normalize categories and add strain_type + packagesize. Only the columns
+    the forecast needs are kept. `pos` selects the schema profile.
+    """
+    inv_df = inv_df.copy(deep=False)
+    inv_df.columns = _clean_inventory_headers(inv_df.columns)
+    rename = detect_inventory_columns(inv_df.columns, get_profile(pos).inventory)
+    inv_df = inv_df[list(rename)].rename(columns=rename)
+
+    inv_df["onhandunits"] = _to_quantity(inv_df["onhandunits"])
+    # normalize to Rebelle canonical categories
+    inv_df["subcategory"] = normalize_categories(inv_df["subcategory"])
+
+    # Strain Type + Package Size (one pass over distinct item names)
+    inv_attrs = extract_attributes(inv_df["itemname"])
+    inv_df["strain_type"] = inv_attrs["strain_type"]
+    inv_df["packagesize"] = inv_attrs["packagesize"]
+    return as_categories(inv_df, CATEGORY_COLUMNS)
+
+
+def summarize_inventory(inv_df):
+    """On-hand units by subcategory + strain + size."""
+    return (
+        inv_df.groupby(INVENTORY_KEYS, observed=True)["onhandunits"]
+        .sum()
+        .reset_index()
+    )
+
+
+def stream_inventory_summary(source, chunksize=INVENTORY_CHUNK_ROWS, pos=None):
+    """
+    Build the inventory summary from a CSV without loading it whole.
+
+    Only the three detected columns are parsed; each chunk is normalized,
+    attribute-extracted and folded into the running on-hand sums, so peak
+    memory is one chunk plus the summary. Returns (inv_summary, rows_streamed).
+    """
+    summary = None
+    rows = 0
+    with open_source(source) as fh:
+        header_row = csv_header_row(fh)
+        columns = pd.read_csv(fh, header=header_row, nrows=0).columns
+        fh.seek(0)
+        rename = detect_inventory_columns(
+            _clean_inventory_headers(columns), get_profile(pos).inventory
+        )
+        raw_by_clean = dict(zip(_clean_inventory_headers(columns), columns))
+        usecols = [raw_by_clean[c] for c in rename]
+
+        reader = pd.read_csv(fh, header=header_row, usecols=usecols, chunksize=chunksize)
+        for chunk in reader:
+            rows += len(chunk)
+            part = summarize_inventory(prepare_inventory(chunk, pos))
+            if summary is not None:
+                part = pd.concat([summary, part], ignore_index=True)
+                part = summarize_inventory(part)
+            summary = part
+
+    if summary is None:
+        summary = pd.DataFrame(columns=INVENTORY_KEYS + ["onhandunits"])
+    return as_categories(summary, CATEGORY_COLUMNS), rows
+
+
+def _to_money(s):
+    """Dollar amounts ('$1,234.50' or numbers) as float, NaN → 0."""
+    if s.dtype == object or isinstance(s.dtype, (pd.CategoricalDtype, pd.StringDtype)):
+        s = s.astype("string").str.replace(r"[$,]", "", regex=True)
+    return pd.to_numeric(s, errors="coerce").fillna(0).astype(float)
+
+
+def _sales_lines(sales_raw, detect):
+    """Shared product / extra sales clean-up after `detect` maps the headers."""
+    sales_raw = sales_raw.copy(deep=False)
+    sales_raw.columns = sales_raw.columns.astype(str).str.lower()
+    rename = detect(sales_raw.columns)
+    sales_raw = sales_raw[list(rename)].rename(columns=rename)
+
+    sales_raw["unitssold"] = _to_quantity(sales_raw["unitssold"])
+
+    # normalize categories here as well
+    sales_raw["mastercategory"] = normalize_categories(sales_raw["mastercategory"])
+
+    # Filter out accessories / 'all' (anything with "accessor")
+    sales_df = sales_raw[
+        ~sales_raw["mastercategory"].astype(str).str.contains("accessor")
+        & (sales_raw["mastercategory"] != "all")
+    ].copy()
+
+    # Add package size on the sales side (granular per size)
+    sales_df["packagesize"] = extract_attributes(sales_df["product_name"])["packagesize"]
+    return as_categories(sales_df, CATEGORY_COLUMNS)
+
+
+def prepare_sales(sales_raw, pos=None):
+    """
+    Rename detected sales columns to product_name / unitssold / mastercategory,
+    normalize categories, drop accessories / 'all' and add packagesize.
+    """
+    schema = get_profile(pos).sales
+    return _sales_lines(sales_raw, lambda columns: detect_sales_columns(columns, schema))
+
+
+def prepare_revenue(extra_raw, pos=None):
+    """
+    `prepare_sales` for the extra sales (revenue) report: the same columns
+    plus revenue and cost in dollars (cost is NaN if the report has none).
+    """
+    schema = get_profile(pos).revenue
+    sales_df = _sales_lines(extra_raw, lambda columns: detect_revenue_columns(columns, schema))
+    sales_df["revenue"] = _to_money(sales_df["revenue"])
+    sales_df["cost"] = _to_money(sales_df["cost"]) if "cost" in sales_df else np.nan
+    return sales_df
+
+
+def summarize_sales(sales_df):
+    """Category + size level units sold (velocity is added later, per settings)."""
+    return sales_df.groupby(SALES_KEYS, observed=True)["unitssold"].sum().reset_index()
+
+
+def summarize_revenue(revenue_df):
+    """
+    Category + size level revenue and cost from `prepare_revenue` output, with
+    average selling price and margin per unit (NaN without units or cost).
+    """
+    summary = (
+        revenue_df.groupby(SALES_KEYS, observed=True)[["unitssold", "revenue", "cost"]]
+        .sum(min_count=1)
+        .reset_index()
+    )
+    units = summary.pop("unitssold").to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        summary["asp"] = np.where(units > 0, summary["revenue"] / units, np.nan)
+        summary["unitmargin"] = np.where(
+            units > 0, (summary["revenue"] - summary["cost"]) / units, np.nan
+        )
+    summary["revenue"] = summary["revenue"].fillna(0)
+    return summary
+
+
+def _required_size_gaps(base, required_sizes):
+    """
+    Zero-stock, zero-sales rows for every (subcategory, packagesize) pair of
+    the required-size grid that `base` does not have. A grid key applies to
+    every subcategory containing it ("flower" also covers "flower - small").
+    Sizes are compared by `size_key`, so stocked ".5g" covers a required "0.5g".
+    """
+    keys = ["subcategory", "packagesize"]
+    cats = base["subcategory"].dropna().astype(str).unique()
+    # {(subcategory, size key): size as spelled in the grid}
+    grid = {}
+    for key, sizes in required_sizes.items():
+        for cat in cats:
+            if key in cat:
+                for size in sizes:
+                    grid.setdefault((cat, size_key(size)), size)
+    if not grid:
+        return base.iloc[:0]
+
+    # Size keys of the few distinct sizes on hand, broadcast back to the rows
+    codes, sizes = pd.factorize(base["packagesize"].astype(object))
+    present_sizes = np.array([size_key(s) for s in sizes], dtype=object)[codes]
+    present = pd.MultiIndex.from_arrays(
+        [base["subcategory"].astype(object).to_numpy(), present_sizes]
+    ).unique()
+    required = pd.MultiIndex.from_tuples(list(grid))
+    # One reindex of the pairs on hand onto the grid: NaN marks a gap
+    on_grid = pd.Series(True, index=present).reindex(required)
+    gaps = pd.DataFrame(
+        [(cat, grid[(cat, key)]) for cat, key in on_grid.index[on_grid.isna()]],
+        columns=keys,
+    )
+    return gaps.assign(
+        strain_type="unspecified",
+        onhandunits=0,
+        mastercategory=gaps["subcategory"],
+        unitssold=0,
+        **({"revenue": 0.0} if "revenue" in base else {}),
+    )
+
+
+def build_base(inv_summary, sales_summary, required_sizes=None, revenue_summary=None):
+    """
+    Data-dependent stage: inventory summary left-joined to raw units sold,
+    plus empty lines for sizes missing from the required-size grid
+    (`required_sizes`, default REQUIRED_SIZES). A `summarize_revenue` frame
+    adds REVENUE_COLUMNS in the same join. Depends only on the uploaded
+    files, so callers can cache it and re-run just `apply_forecast_settings`.
+    """
+    if revenue_summary is not None:
+        sales_summary = pd.merge(
+            sales_summary.astype({key: object for key in SALES_KEYS}),
+            revenue_summary.astype({key: object for key in SALES_KEYS}),
+            how="outer",
+            on=SALES_KEYS,
+        )
+        sales_summary["unitssold"] = sales_summary["unitssold"].fillna(0)
+        sales_summary["revenue"] = sales_summary["revenue"].fillna(0)
+    base = pd.merge(
+        inv_summary,
+        sales_summary,
+        how="left",
+        left_on=["subcategory", "packagesize"],
+        right_on=["mastercategory", "packagesize"],
+    )
+    base["unitssold"] = base["unitssold"].fillna(0)
+    if "revenue" in base:
+        base["revenue"] = base["revenue"].fillna(0)
+    # Lines with no sales keep their own category as mastercategory
+    base["mastercategory"] = (
+        base["mastercategory"].astype(object).fillna(base["subcategory"].astype(object))
+    )
+    gaps = _required_size_gaps(base, REQUIRED_SIZES if required_sizes is None else required_sizes)
+    if len(gaps):
+        base = pd.concat([base, gaps], ignore_index=True)
+    return as_categories(base, CATEGORY_COLUMNS)
+
+
+def apply_forecast_settings(
+    base,
+    doh_threshold=DEFAULT_DOH_THRESHOLD,
+    velocity_adjustment=DEFAULT_VELOCITY_ADJUSTMENT,
+    date_diff=DEFAULT_DATE_DIFF,
+    velocity=None,
+):
+    """
+    Parameter-dependent stage: velocity, DOH + reorder (granular per row).
+    Vectorized column math only, cheap enough to run on every slider move.
+    `velocity` (units/day per row, e.g. from rebelle.velocity) replaces the
+    flat unitssold / date_diff rate; the adjustment applies to either. Bases
+    with revenue get marginperday: the velocity times the margin per unit.
+    """
+    detail = base.copy()
+    if velocity is None:
+        velocity = detail["unitssold"].to_numpy(dtype=float) / max(date_diff, 1)
+    avg = np.asarray(velocity, dtype=float) * velocity_adjustment
+    onhand = detail["onhandunits"].to_numpy(dtype=float)
+    detail["avgunitsperday"] = avg
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        doh = np.where(avg > 0, onhand / avg, 0)
+    doh = np.nan_to_num(doh, nan=0, posinf=0, neginf=0).astype(np.int64)
+
+    reorder = np.where(
+        doh < doh_threshold,
+        np.ceil((doh_threshold - doh) * avg),
+        0,
+    ).astype(np.int64)
+
+    detail["daysonhand"] = downcast_numeric(pd.Series(doh, index=detail.index))
+    detail["reorderqty"] = downcast_numeric(pd.Series(reorder, index=detail.index))
+
+    priority = np.select(
+        [doh <= 7, doh <= 21, avg == 0],
+        [PRIORITY_ASAP, PRIORITY_WATCH, PRIORITY_DEAD],
+        default=PRIORITY_COMFORTABLE,
+    )
+    detail["reorderpriority"] = pd.Categorical(
+        priority, categories=PRIORITY_LEVELS, ordered=True
+    )
+    if "unitmargin" in detail:
+        detail["marginperday"] = avg * detail["unitmargin"].to_numpy(dtype=float)
+    return detail
+
+
+def build_detail(
+    inv_summary,
+    sales_summary,
+    doh_threshold=DEFAULT_DOH_THRESHOLD,
+    velocity_adjustment=DEFAULT_VELOCITY_ADJUSTMENT,
+    date_diff=DEFAULT_DATE_DIFF,
+    revenue_summary=None,
+):
+    """Both stages in one go: merged, settings-applied forecast detail."""
+    return apply_forecast_settings(
+        build_base(inv_summary, sales_summary, revenue_summary=revenue_summary),
+        doh_threshold,
+        velocity_adjustment,
+        date_diff,
+    )
+
+
+def run_forecast(
+    inv_raw,
+    sales_raw,
+    doh_threshold=DEFAULT_DOH_THRESHOLD,
+    velocity_adjustment=DEFAULT_VELOCITY_ADJUSTMENT,
+    date_diff=DEFAULT_DATE_DIFF,
+    pos=None,
+    extra_sales_raw=None,
+):
+    """
+    Raw inventory + product sales frames in, forecast detail table out. An
+    optional extra sales (revenue) frame adds the dollar columns.
+    """
+    inv_summary = summarize_inventory(prepare_inventory(inv_raw, pos))
+    sales_summary = summarize_sales(prepare_sales(sales_raw, pos))
+    revenue_summary = None
+    if extra_sales_raw is not None:
+        revenue_summary = summarize_revenue(prepare_revenue(extra_sales_raw, pos))
+    return build_detail(
+        inv_summary, sales_summary, doh_threshold, velocity_adjustment, date_diff, revenue_summary
+    )
+
+
+def build_sku_base(inv_df, sales_df):
+    """
+    SKU-level counterpart of `build_base`: on-hand per inventory item name
+    (`prepare_inventory` output) joined to the units sold of the sales product
+    it matches (see rebelle.matching). `sales_df` needs product_name and
+    unitssold, e.g. `prepare_sales` output or a history window by product.
+
+    Sales are pooled per normalized name, the key the matcher compares, and
+    each product's units are counted once: they go to the item(s) with its
+    best match confidence, split evenly on a tie.
+    """
+    items = (
+        inv_df.assign(itemname=inv_df["itemname"].astype(object))
+        .groupby("itemname", sort=False)
+        .agg(
+            subcategory=("subcategory", "first"),
+            strain_type=("strain_type", "first"),
+            packagesize=("packagesize", "first"),
+            onhandunits=("onhandunits", "sum"),
+        )
+        .reset_index()
+    )
+    names = sales_df["product_name"].astype(object)
+    norm = normalize_names(names).to_numpy(dtype=object)
+    # One display name per normalized name, so the matcher sees each product once
+    sold = pd.Series(
+        sales_df["unitssold"].groupby(norm).sum().to_numpy(),
+        index=names.groupby(norm).first().to_numpy(),
+    )
+
+    base = items.merge(match_products(items["itemname"], sold.index), on="itemname", how="left")
+    product = base["product_name"]
+    best = base["match_confidence"].eq(base.groupby(product)["match_confidence"].transform("max"))
+    share = best / best.groupby(product).transform("sum")
+    base["unitssold"] = (product.map(sold) * share).fillna(0)
+    return as_categories(base, CATEGORY_COLUMNS)
+
+
+def forecast_table(detail, doh_threshold=DEFAULT_DOH_THRESHOLD, columns=DETAIL_COLUMNS):
+    """
+    Display frame for the forecast grid: `columns` grouped by subcategory
+    (Rebelle order first), with a leading LOW_DOH_FLAG column for lines whose
+    daysonhand is under `doh_threshold`.
+    """
+    cols = [c for c in columns if c in detail.columns]
+    table = detail[cols]
+
+    # Rank the few unique categories once, then sort rows by the rank
+    cats = table["subcategory"].astype(str)
+    ranks = {c: i for i, c in enumerate(sorted(cats.unique(), key=category_sort_key))}
+    order = np.argsort(cats.map(ranks).to_numpy(), kind="stable")
+    table = table.iloc[order].reset_index(drop=True)
+
+    flags = table["daysonhand"].to_numpy() < doh_threshold
+    table.insert(0, LOW_DOH_FLAG, flags)
+    return table
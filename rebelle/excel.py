@@ -0,0 +1,236 @@
+"""
+Fast first-sheet reader for Excel exports.
+
+`pd.read_excel` with openpyxl builds a cell object per value and, with a
+separate header sniff, loads the workbook twice. Here the sheet is loaded
+once:
+  - with python-calamine when it is installed (Rust, several times faster);
+  - otherwise by streaming the .xlsx sheet XML directly, which skips
+    openpyxl's per-cell objects.
+Either way the cells are converted exactly as pandas' own Excel readers do
+and handed to pandas' TextParser, so the resulting frame matches
+`pd.read_excel(..., header=...)` while the header scan reuses the same rows.
+Legacy .xls files without calamine fall back to `pd.read_excel`.
+"""
+import importlib.util
+import math
+import posixpath
+import zipfile
+from functools import lru_cache
+from io import BytesIO
+from xml.etree.ElementTree import iterparse, parse
+
+import pandas as pd
+from pandas.errors import EmptyDataError
+from pandas.io.parsers import TextParser
+
+CALAMINE_AVAILABLE = importlib.util.find_spec("python_calamine") is not None
+EXCEL_ENGINE = "calamine" if CALAMINE_AVAILABLE else "xlsx-stream"
+
+_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_ROW, _CELL, _VALUE = _MAIN + "row", _MAIN + "c", _MAIN + "v"
+_INLINE, _TEXT, _RUN = _MAIN + "is", _MAIN + "t", _MAIN + "r"
+
+
+def _pandas_cell(value):
+    """The conversion pandas applies to every cell (empty -> "", whole floats -> int)."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and not math.isinf(value) and not math.isnan(value):
+        as_int = int(value)
+        return as_int if as_int == value else value
+    return value
+
+
+def _trim_and_pad(data):
+    """Drop trailing empty cells / rows and pad to a rectangle, like pandas does."""
+    last_with_data = -1
+    for i, row in enumerate(data):
+        while row and row[-1] == "":
+            row.pop()
+        if row:
+            last_with_data = i
+    data = data[: last_with_data + 1]
+    if data:
+        width = max(len(row) for row in data)
+        data = [row + [""] * (width - len(row)) for row in data]
+    return data
+
+
+# -------------------------
+# python-calamine
+# -------------------------
+def _calamine_rows(data):
+    from datetime import date, datetime
+
+    from python_calamine import load_workbook
+
+    sheet = load_workbook(BytesIO(data)).get_sheet_by_index(0)
+    rows = []
+    for row in sheet.to_python(skip_empty_area=False):
+        converted = []
+        for value in row:
+            if isinstance(value, date) and not isinstance(value, datetime):
+                value = datetime(value.year, value.month, value.day)
+            converted.append(_pandas_cell(value))
+        rows.append(converted)
+    return rows
+
+
+# -------------------------
+# Streaming .xlsx (no per-cell objects)
+# -------------------------
+def _part_targets(zf, rels_path):
+    """{relationship id: (type, part path)} for one .rels file."""
+    if rels_path not in zf.namelist():
+        return {}
+    base = posixpath.dirname(posixpath.dirname(rels_path))
+    targets = {}
+    for rel in parse(zf.open(rels_path)).getroot().iter(_PKG_REL + "Relationship"):
+        target = rel.get("Target", "")
+        path = target.lstrip("/") if target.startswith("/") else posixpath.normpath(
+            posixpath.join(base, target)
+        )
+        targets[rel.get("Id")] = (rel.get("Type", "").rsplit("/", 1)[-1], path)
+    return targets
+
+
+def _date_styles(zf, styles_path):
+    """(style ids formatted as dates, style ids formatted as durations)."""
+    from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+
+    if not styles_path or styles_path not in zf.namelist():
+        return set(), set()
+    root = parse(zf.open(styles_path)).getroot()
+    custom = {
+        int(fmt.get("numFmtId")): fmt.get("formatCode", "")
+        for fmt in root.iter(_MAIN + "numFmt")
+    }
+    dates, durations = set(), set()
+    xfs = root.find(_MAIN + "cellXfs")
+    for idx, xf in enumerate(xfs if xfs is not None else []):
+        fmt_id = int(xf.get("numFmtId", 0))
+        code = custom.get(fmt_id, BUILTIN_FORMATS.get(fmt_id))
+        if code and is_date_format(code):
+            dates.add(idx)
+            if is_timedelta_format(code):
+                durations.add(idx)
+    return dates, durations
+
+
+def _inline_text(node):
+    """Text of an inline string (plain <t> or rich-text runs)."""
+    if node is None:
+        return None
+    text = node.findtext(_TEXT)
+    if text is not None:
+        return text
+    return "".join(t.text or "" for t in node.iterfind(f"{_RUN}/{_TEXT}"))
+
+
+@lru_cache(maxsize=None)
+def _letters_index(letters):
+    idx = 0
+    for ch in letters.upper():
+        idx = idx * 26 + (ord(ch) - 64)
+    return idx - 1
+
+
+def _column_index(ref):
+    """Zero-based column of a cell reference like 'AB12'."""
+    return _letters_index(ref.rstrip("0123456789"))
+
+
+def _xlsx_stream_rows(data):
+    from openpyxl.reader.strings import read_string_table
+    from openpyxl.utils.datetime import MAC_EPOCH, WINDOWS_EPOCH, from_ISO8601, from_excel
+
+    zf = zipfile.ZipFile(BytesIO(data))
+    book = parse(zf.open("xl/workbook.xml")).getroot()
+    pr = book.find(_MAIN + "workbookPr")
+    epoch = MAC_EPOCH if pr is not None and pr.get("date1904") in ("1", "true") else WINDOWS_EPOCH
+
+    parts = _part_targets(zf, "xl/_rels/workbook.xml.rels")
+    first_sheet = book.find(_MAIN + "sheets")[0].get(_REL + "id")
+    sheet_path = parts[first_sheet][1]
+    by_type = {kind: path for kind, path in parts.values()}
+    strings = []
+    if "sharedStrings" in by_type and by_type["sharedStrings"] in zf.namelist():
+        strings = read_string_table(zf.open(by_type["sharedStrings"]))
+    date_styles, duration_styles = _date_styles(zf, by_type.get("styles"))
+
+    rows = []
+    with zf.open(sheet_path) as fh:
+        for _, el in iterparse(fh):
+            if el.tag != _ROW:
+                continue
+            row_no = int(el.get("r", len(rows) + 1))
+            while len(rows) < row_no - 1:
+                rows.append([])
+            row = []
+            for cell in el:
+                ref = cell.get("r")
+                col = _column_index(ref) if ref else len(row)
+                kind = cell.get("t", "n")
+                if kind == "inlineStr":
+                    value = _inline_text(cell.find(_INLINE))
+                else:
+                    value = cell.findtext(_VALUE) or None
+                    if value is not None:
+                        if kind == "n":
+                            value = float(value) if any(c in value for c in ".eE") else int(value)
+                            style = int(cell.get("s", 0))
+                            if style in date_styles:
+                                try:
+                                    value = from_excel(
+                                        value, epoch, timedelta=style in duration_styles
+                                    )
+                                except (OverflowError, ValueError):
+                                    value = float("nan")
+                        elif kind == "s":
+                            value = strings[int(value)]
+                        elif kind == "b":
+                            value = bool(int(value))
+                        elif kind == "e":
+                            value = float("nan")
+                        elif kind == "d":
+                            value = from_ISO8601(value)
+                if col > len(row):
+                    row.extend([""] * (col - len(row)))
+                row.append(_pandas_cell(value))
+            rows.append(row)
+            el.clear()
+    return rows
+
+
+def sheet_rows(data):
+    """First sheet as a list of rows of pandas-converted cells."""
+    if CALAMINE_AVAILABLE:
+        rows = _calamine_rows(data)
+    elif data[:2] == b"PK":
+        rows = _xlsx_stream_rows(data)
+    else:
+        return None
+    return _trim_and_pad(rows)
+
+
+def preview_text(rows, n):
+    """Lowercased text of the first `n` rows, one string per row."""
+    return [" ".join(str(v) for v in row).lower() for row in rows[:n]]
+
+
+def read_excel_rows(rows, header=0, usecols=None):
+    """DataFrame from `sheet_rows` output, parsed the way `pd.read_excel` would."""
+    if not rows:
+        return pd.DataFrame()
+    try:
+        return TextParser(
+            [list(row) for row in rows],
+            header=header,
+            usecols=usecols,
+            skip_blank_lines=False,
+        ).read()
+    except EmptyDataError:
+        return pd.DataFrame()
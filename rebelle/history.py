@@ -0,0 +1,290 @@
+"""
+Local sales history: every ingested product sales report, line by line, in
+one SQLite file.
+
+Periods are stored as inclusive day ordinals and indexed, so "units sold in
+the last N days" is a range query over whatever has been ingested, with each
+line prorated by the share of its period inside the window (sales are taken
+as even across a report's period).
+
+Periods of one POS never overlap: a new upload owns the days it covers, and
+older periods are trimmed to the days left over, their units scaled down to
+match. Every ingested file is also recorded on its own. Re-uploading a file
+whose periods have since been trimmed away is therefore still recognized,
+and cannot overwrite newer data.
+
+Point REBELLE_HISTORY_DB at a shared path to pool history across buyers.
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import date
+
+import pandas as pd
+
+from rebelle.dtypes import as_categories
+
+DEFAULT_HISTORY_PATH = os.environ.get(
+    "REBELLE_HISTORY_DB",
+    os.path.join(os.path.expanduser("~"), ".rebelle", "sales_history.sqlite"),
+)
+# Velocity windows offered in the dashboard, in days
+HISTORY_WINDOWS = [7, 30, 60, 90]
+LINE_KEYS = ["mastercategory", "packagesize", "product_name"]
+GROUP_KEYS = ["mastercategory", "packagesize"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS periods (
+    id INTEGER PRIMARY KEY,
+    pos TEXT NOT NULL,
+    source_hash TEXT NOT NULL,
+    source_name TEXT NOT NULL DEFAULT '',
+    start_day INTEGER NOT NULL,
+    end_day INTEGER NOT NULL,
+    ingested REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS periods_span ON periods (pos, end_day, start_day);
+CREATE INDEX IF NOT EXISTS periods_source ON periods (pos, source_hash);
+
+-- Every file ever ingested, kept even after its periods are trimmed away
+CREATE TABLE IF NOT EXISTS sources (
+    pos TEXT NOT NULL,
+    source_hash TEXT NOT NULL,
+    source_name TEXT NOT NULL DEFAULT '',
+    ingested REAL NOT NULL,
+    PRIMARY KEY (pos, source_hash)
+);
+
+CREATE TABLE IF NOT EXISTS sales (
+    period_id INTEGER NOT NULL,
+    pos TEXT NOT NULL,
+    mastercategory TEXT NOT NULL,
+    packagesize TEXT NOT NULL,
+    product_name TEXT NOT NULL,
+    start_day INTEGER NOT NULL,
+    end_day INTEGER NOT NULL,
+    unitssold REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sales_span ON sales (pos, end_day, start_day);
+CREATE INDEX IF NOT EXISTS sales_group ON sales (pos, mastercategory, packagesize);
+CREATE INDEX IF NOT EXISTS sales_product ON sales (pos, product_name);
+CREATE INDEX IF NOT EXISTS sales_period ON sales (period_id);
+"""
+
+# Database files already created / migrated by this process (the dashboard
+# builds a SalesHistory on every rerun)
+_ready_paths = set()
+_ready_lock = threading.Lock()
+
+# Units of one line inside [:lo, :hi], prorated over the line's period
+_IN_WINDOW = (
+    "unitssold * (MIN(end_day, :hi) - MAX(start_day, :lo) + 1) * 1.0"
+    " / (end_day - start_day + 1)"
+)
+
+
+class SalesHistory:
+    """SQLite store of ingested sales periods; one connection per call."""
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        key = os.path.abspath(path)
+        with _ready_lock:
+            if key in _ready_paths:
+                return
+            folder = os.path.dirname(path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            with self._connect() as con, con:
+                con.executescript(_SCHEMA)
+                # Histories created before `sources` existed: record what they hold
+                con.execute(
+                    "INSERT OR IGNORE INTO sources"
+                    " SELECT pos, source_hash, MIN(source_name), MIN(ingested) FROM periods"
+                    " GROUP BY pos, source_hash"
+                )
+            _ready_paths.add(key)
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.path, timeout=30))
+
+    def ingest(self, sales_df, start, end, pos, source_hash, source_name=""):
+        """
+        Add one prepared product sales report (`prepare_sales` output)
+        covering start..end inclusive. Returns the number of lines stored;
+        0 if this file was ever ingested for `pos`, even if its days have
+        since been taken over by newer uploads.
+        """
+        start_day, end_day = date.toordinal(start), date.toordinal(end)
+        if end_day < start_day:
+            raise ValueError(f"Sales period ends ({end}) before it starts ({start}).")
+        lines = (
+            sales_df[LINE_KEYS + ["unitssold"]]
+            .astype({key: str for key in LINE_KEYS})
+            .groupby(LINE_KEYS, sort=False)["unitssold"]
+            .sum()
+            .reset_index()
+        )
+
+        with self._connect() as con, con:
+            seen = con.execute(
+                "INSERT OR IGNORE INTO sources (pos, source_hash, source_name, ingested)"
+                " VALUES (?, ?, ?, ?)",
+                (pos, source_hash, source_name, time.time()),
+            ).rowcount == 0
+            if seen:
+                return 0
+            overlapping = con.execute(
+                "SELECT id, start_day, end_day FROM periods"
+                " WHERE pos = ? AND end_day >= ? AND start_day <= ?",
+                (pos, start_day, end_day),
+            ).fetchall()
+            for period in overlapping:
+                _trim_period(con, period, start_day, end_day)
+
+            period_id = con.execute(
+                "INSERT INTO periods (pos, source_hash, source_name, start_day, end_day, ingested)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (pos, source_hash, source_name, start_day, end_day, time.time()),
+            ).lastrowid
+            con.executemany(
+                "INSERT INTO sales VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (period_id, pos, cat, size, name, start_day, end_day, float(units))
+                    for cat, size, name, units in lines.itertuples(index=False)
+                ),
+            )
+        return len(lines)
+
+    def latest_day(self, pos):
+        """Last day covered for `pos`, or None if nothing is stored."""
+        with self._connect() as con:
+            (day,) = con.execute(
+                "SELECT MAX(end_day) FROM periods WHERE pos = ?", (pos,)
+            ).fetchone()
+        return date.fromordinal(day) if day is not None else None
+
+    def version(self, pos):
+        """Changes whenever `pos` gains or loses periods (for cache keys)."""
+        with self._connect() as con:
+            return con.execute(
+                "SELECT COUNT(*), MAX(ingested) FROM periods WHERE pos = ?", (pos,)
+            ).fetchone()
+
+    def periods(self, pos):
+        """Stored periods for `pos`, newest first, as start / end / days / lines / source."""
+        with self._connect() as con:
+            rows = con.execute(
+                "SELECT p.start_day, p.end_day, p.source_name,"
+                " (SELECT COUNT(*) FROM sales s WHERE s.period_id = p.id)"
+                " FROM periods p WHERE p.pos = ? ORDER BY p.end_day DESC",
+                (pos,),
+            ).fetchall()
+        return pd.DataFrame(
+            [
+                (date.fromordinal(s), date.fromordinal(e), e - s + 1, n, name)
+                for s, e, name, n in rows
+            ],
+            columns=["start", "end", "days", "lines", "source"],
+        )
+
+    def window_summary(self, window_days, pos, as_of=None, by=GROUP_KEYS):
+        """
+        (summary, covered_days) for the `window_days` ending `as_of`
+        (default: the latest stored day). `summary` has units sold per `by`
+        group; `covered_days` is how many of the window's days the history
+        holds, which is the divisor for a per-day velocity.
+        """
+        by = list(by)
+        if any(key not in LINE_KEYS for key in by):
+            raise ValueError(f"Can only group history by {LINE_KEYS}.")
+        hi = date.toordinal(as_of) if as_of is not None else None
+        if hi is None:
+            latest = self.latest_day(pos)
+            if latest is None:
+                return pd.DataFrame(columns=by + ["unitssold"]), 0
+            hi = latest.toordinal()
+        params = {"pos": pos, "lo": hi - int(window_days) + 1, "hi": hi}
+        group = ", ".join(by)
+
+        with self._connect() as con:
+            rows = con.execute(
+                f"SELECT {group}, SUM({_IN_WINDOW}) FROM sales"
+                " WHERE pos = :pos AND end_day >= :lo AND start_day <= :hi"
+                f" GROUP BY {group}",
+                params,
+            ).fetchall()
+            (covered,) = con.execute(
+                "SELECT COALESCE(SUM(MIN(end_day, :hi) - MAX(start_day, :lo) + 1), 0)"
+                " FROM periods WHERE pos = :pos AND end_day >= :lo AND start_day <= :hi",
+                params,
+            ).fetchone()
+
+        summary = pd.DataFrame(rows, columns=by + ["unitssold"])
+        return as_categories(summary, [k for k in by if k != "product_name"]), int(covered)
+
+    def lines_between(self, pos, lo_day, hi_day):
+        """
+        (lines, spans) touching day ordinals lo_day..hi_day: units per
+        mastercategory / packagesize / stored period, and the periods' own
+        (start_day, end_day) pairs, for callers that bucket by time.
+        """
+        params = {"pos": pos, "lo": lo_day, "hi": hi_day}
+        with self._connect() as con:
+            rows = con.execute(
+                "SELECT mastercategory, packagesize, start_day, end_day, SUM(unitssold)"
+                " FROM sales WHERE pos = :pos AND end_day >= :lo AND start_day <= :hi"
+                " GROUP BY mastercategory, packagesize, period_id",
+                params,
+            ).fetchall()
+            spans = con.execute(
+                "SELECT start_day, end_day FROM periods"
+                " WHERE pos = :pos AND end_day >= :lo AND start_day <= :hi",
+                params,
+            ).fetchall()
+        lines = pd.DataFrame(rows, columns=GROUP_KEYS + ["start_day", "end_day", "unitssold"])
+        return lines, spans
+
+
+def _trim_period(con, period, start_day, end_day):
+    """
+    Give start_day..end_day to a new upload: cut an existing period down to
+    the days outside it (splitting it in two if the new one sits inside),
+    scaling each remaining piece's units by its share of the original days.
+    """
+    period_id, p_start, p_end = period
+    length = p_end - p_start + 1
+    pieces = []
+    if p_start < start_day:
+        pieces.append((p_start, start_day - 1))
+    if p_end > end_day:
+        pieces.append((end_day + 1, p_end))
+
+    if not pieces:
+        con.execute("DELETE FROM sales WHERE period_id = ?", (period_id,))
+        con.execute("DELETE FROM periods WHERE id = ?", (period_id,))
+        return
+
+    # A second piece copies the untouched lines before the first is rescaled
+    for s, e in pieces[1:]:
+        new_id = con.execute(
+            "INSERT INTO periods (pos, source_hash, source_name, start_day, end_day, ingested)"
+            " SELECT pos, source_hash, source_name, ?, ?, ingested FROM periods WHERE id = ?",
+            (s, e, period_id),
+        ).lastrowid
+        con.execute(
+            "INSERT INTO sales SELECT ?, pos, mastercategory, packagesize, product_name,"
+            " ?, ?, unitssold * ? FROM sales WHERE period_id = ?",
+            (new_id, s, e, (e - s + 1) / length, period_id),
+        )
+    s, e = pieces[0]
+    con.execute(
+        "UPDATE periods SET start_day = ?, end_day = ? WHERE id = ?", (s, e, period_id)
+    )
+    con.execute(
+        "UPDATE sales SET start_day = ?, end_day = ?, unitssold = unitssold * ?"
+        " WHERE period_id = ?",
+        (s, e, (e - s + 1) / length, period_id),
+    )
@@ -0,0 +1,151 @@
+"""
+Inventory ↔ sales product matching for the SKU-level forecast.
+
+Names are normalized (lowercase, punctuation to spaces, whitespace
+collapsed) and matched in passes, each over what is still unmatched:
+  1. exact normalized name, as a hash lookup           -> confidence 1.0
+  2. the same words in another order                    -> REORDERED_CONFIDENCE
+  3. fuzzy: candidates come from a blocking index on the name's rarest
+     words and adjacent word pairs (or, failing that, its rarest character
+     trigrams); the best trigram-Jaccard score wins if it reaches
+     MIN_CONFIDENCE. Candidates whose package size, strain type or bare
+     numbers (lot / item numbers) contradict the item's are skipped.
+Each name is only compared with the few sales names that share one of its
+rare block keys, so a 20k+ SKU catalog matches in near-linear time rather
+than comparing every pair.
+"""
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from rebelle.attributes import extract_attributes, size_key
+
+MATCH_COLUMNS = ["itemname", "product_name", "match_confidence", "match_method"]
+REORDERED_CONFIDENCE = 0.95
+# Lowest trigram similarity accepted as a fuzzy match
+MIN_CONFIDENCE = 0.6
+# Rarest keys of a name used to look up candidates
+BLOCK_KEYS = 3
+# Keys shared by more sales names than this are too common to block on
+MAX_BLOCK_SIZE = 50
+
+
+def normalize_names(names):
+    """Lowercase, punctuation to spaces (decimal points kept), whitespace collapsed."""
+    return (
+        pd.Series(names, dtype=object).astype(str).str.lower()
+        .str.replace(r"[^a-z0-9.]+|\.(?!\d)", " ", regex=True)
+        .str.split().str.join(" ")
+    )
+
+
+def _word_keys(name):
+    """Words plus adjacent word pairs: pairs stay rare when every word is common."""
+    words = name.split()
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def _attribute_keys(names, norms):
+    """(size, strain, bare numbers) per name, used to veto fuzzy candidates."""
+    attrs = extract_attributes(names)
+    numbers = [frozenset(w for w in norm.split() if w.isdigit()) for norm in norms]
+    return list(zip(map(size_key, attrs["packagesize"]), attrs["strain_type"], numbers))
+
+
+def _compatible(a, b):
+    unknown = "unspecified"
+    (size_a, strain_a, numbers_a), (size_b, strain_b, numbers_b) = a, b
+    if unknown not in (size_a, size_b) and size_a != size_b:
+        return False
+    if "unspecified" not in (strain_a, strain_b) and strain_a != strain_b:
+        return False
+    return not (numbers_a and numbers_b and numbers_a != numbers_b)
+
+
+def _trigrams(name):
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _BlockIndex:
+    """Inverted index from block keys (words or trigrams) to sales name ids."""
+
+    def __init__(self, key_sets):
+        self.postings = defaultdict(list)
+        for i, keys in enumerate(key_sets):
+            for key in keys:
+                self.postings[key].append(i)
+
+    def candidates(self, keys):
+        usable = [k for k in keys if 0 < len(self.postings.get(k, ())) <= MAX_BLOCK_SIZE]
+        usable.sort(key=lambda k: len(self.postings[k]))
+        found = set()
+        for key in usable[:BLOCK_KEYS]:
+            found.update(self.postings[key])
+        return found
+
+
+def match_products(item_names, product_names, min_confidence=MIN_CONFIDENCE):
+    """
+    Best sales product for each distinct inventory item name. Returns
+    MATCH_COLUMNS with one row per item; unmatched items have no
+    product_name, confidence 0 and method "none".
+    """
+    items = pd.Series(pd.unique(pd.Series(item_names, dtype=object).dropna()), dtype=object)
+    products = pd.Series(pd.unique(pd.Series(product_names, dtype=object).dropna()), dtype=object)
+    item_norm = normalize_names(items).to_numpy(dtype=object)
+    product_norm = normalize_names(products).to_numpy(dtype=object)
+
+    matched = np.full(len(items), None, dtype=object)
+    confidence = np.zeros(len(items))
+    method = np.full(len(items), "none", dtype=object)
+
+    # 1 + 2: hash lookups on the normalized name, then on its sorted words
+    exact = {}
+    for i, norm in enumerate(product_norm):
+        exact.setdefault(norm, i)
+    reordered = {}
+    for i, norm in enumerate(product_norm):
+        reordered.setdefault(" ".join(sorted(norm.split())), i)
+    for i, norm in enumerate(item_norm):
+        if norm in exact:
+            matched[i], confidence[i], method[i] = products[exact[norm]], 1.0, "exact"
+        else:
+            j = reordered.get(" ".join(sorted(norm.split())))
+            if j is not None:
+                matched[i], confidence[i], method[i] = products[j], REORDERED_CONFIDENCE, "reordered"
+
+    # 3: fuzzy, only over what is left
+    todo = np.flatnonzero(method == "none")
+    if len(todo) and len(products):
+        product_grams = [_trigrams(norm) for norm in product_norm]
+        words = _BlockIndex(_word_keys(norm) for norm in product_norm)
+        grams = _BlockIndex(product_grams)
+        item_keys = _attribute_keys(items.iloc[todo], item_norm[todo])
+        product_keys = _attribute_keys(products, product_norm)
+
+        for i, keys in zip(todo, item_keys):
+            norm = item_norm[i]
+            item_grams = _trigrams(norm)
+            pool = words.candidates(_word_keys(norm)) or grams.candidates(item_grams)
+            best, best_score = None, min_confidence
+            for j in pool:
+                if not _compatible(keys, product_keys[j]):
+                    continue
+                other = product_grams[j]
+                score = len(item_grams & other) / len(item_grams | other)
+                if score >= best_score and (best is None or score > best_score or j < best):
+                    best, best_score = j, score
+            if best is not None:
+                matched[i], confidence[i], method[i] = products[best], best_score, "fuzzy"
+
+    return pd.DataFrame(
+        {
+            "itemname": items.to_numpy(dtype=object),
+            "product_name": matched,
+            "match_confidence": confidence.round(3),
+            "match_method": method,
+        },
+        columns=MATCH_COLUMNS,
+    )
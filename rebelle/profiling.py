@@ -0,0 +1,108 @@
+"""
+Lightweight per-stage profiler: wall time, row counts and peak traced
+memory for each named stage of a run.
+
+tracemalloc is process-wide and slows every thread while it runs, so it is
+only on while at least one traced stage is open (in any session), under a
+lock and a reference count. A stage that overlaps another session's traced
+stage gets no memory figure, since they share one peak.
+"""
+import json
+import os
+import platform
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Label stored with exported profiles so runs can be compared across releases
+RELEASE = os.environ.get("REBELLE_RELEASE", "dev")
+
+_trace_lock = threading.Lock()
+_trace_users = 0
+_trace_owned = False   # True if tracing was started here (not by the host)
+_trace_epoch = 0       # bumped whenever traced stages overlap
+
+
+def _start_tracing():
+    """Join the shared trace; the epoch to compare at the end, None if not alone."""
+    global _trace_users, _trace_owned, _trace_epoch
+    with _trace_lock:
+        _trace_users += 1
+        if _trace_users > 1:
+            _trace_epoch += 1
+            return None
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _trace_owned = True
+        tracemalloc.reset_peak()
+        return _trace_epoch
+
+
+def _stop_tracing(epoch):
+    """Leave the shared trace; peak MB if no other stage overlapped, else None."""
+    global _trace_users, _trace_owned
+    with _trace_lock:
+        peak = None
+        if epoch is not None and epoch == _trace_epoch and tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1] / 1e6
+        _trace_users -= 1
+        if _trace_users == 0 and _trace_owned:
+            tracemalloc.stop()
+            _trace_owned = False
+        return peak
+
+
+class StageProfiler:
+    """
+    Collects one record per `stage(...)` block. When disabled, stages cost
+    nothing beyond the `with` statement, so it can stay wired in for
+    everyone and only record for admins.
+    """
+
+    def __init__(self, enabled=True, trace_memory=True):
+        self.enabled = enabled
+        self.trace_memory = trace_memory and enabled
+        self.records = []
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """Time a block. The yielded dict can be updated, e.g. rec["rows"] = len(df)."""
+        record = {"stage": name, "rows": rows, "seconds": None, "peak_mb": None}
+        if not self.enabled:
+            yield record
+            return
+
+        epoch = _start_tracing() if self.trace_memory else None
+        begin = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - begin
+            if self.trace_memory:
+                record["peak_mb"] = _stop_tracing(epoch)
+            self.records.append(record)
+
+    def record(self, name, seconds, rows=None):
+        """Add a stage timed elsewhere (e.g. on a worker thread); no memory figure."""
+        if self.enabled:
+            self.records.append({"stage": name, "rows": rows, "seconds": seconds, "peak_mb": None})
+
+    def to_frame(self):
+        return pd.DataFrame(self.records, columns=["stage", "rows", "seconds", "peak_mb"])
+
+    def to_json(self, **meta):
+        """Records plus run metadata, as a JSON string for trend tracking."""
+        payload = {
+            "release": RELEASE,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "run_seconds": time.perf_counter() - self.started,
+            **meta,
+            "stages": self.records,
+        }
+        return json.dumps(payload, indent=2, default=str)
@@ -0,0 +1,351 @@
+"""
+Purchase order PDF rendering (ReportLab), memoized on the PO contents.
+
+ReportLab is imported inside generate_po_pdf so that importing this module
+(e.g. for the line-item helpers) does not pay for the PDF stack.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from rebelle.columns import detect_po_line_columns
+
+DEFAULT_CLIENT_NAME = "Rebelle Cannabis"
+
+# Editable line-item columns, and the full set drawn on the PDF
+PO_TEXT_COLUMNS = ["SKU", "Description", "Strain", "Size"]
+PO_INPUT_COLUMNS = PO_TEXT_COLUMNS + ["Qty", "Unit Price"]
+PO_LINE_COLUMNS = PO_INPUT_COLUMNS + ["Line Total"]
+
+# Rendered PDFs kept per process, keyed by po_fingerprint
+PDF_CACHE_SIZE = 16
+
+_pdf_cache = OrderedDict()
+_pdf_cache_lock = threading.Lock()
+
+
+def empty_po_lines(rows=5):
+    """Blank, typed line-item grid for the PO Builder editor."""
+    lines = pd.DataFrame({c: pd.Series([""] * rows, dtype="string") for c in PO_TEXT_COLUMNS})
+    lines["Qty"] = pd.Series([0] * rows, dtype="int64")
+    lines["Unit Price"] = pd.Series([0.0] * rows, dtype="float64")
+    return lines
+
+
+def read_po_lines(raw):
+    """Imported line items (e.g. a distributor order sheet) as an editor grid."""
+    mapping = detect_po_line_columns(raw.columns)
+    lines = raw[list(mapping)].rename(columns=mapping)
+    for col in PO_INPUT_COLUMNS:
+        if col not in lines.columns:
+            lines[col] = "" if col in PO_TEXT_COLUMNS else 0
+    return clean_po_lines(lines)[PO_INPUT_COLUMNS]
+
+
+def clean_po_lines(lines):
+    """
+    Typed PO lines with `Line Total`, dropping rows that have no SKU, no
+    description and no quantity. Column math only, so thousands of lines
+    cost about the same as five.
+    """
+    po = pd.DataFrame(index=lines.index)
+    for col in PO_TEXT_COLUMNS:
+        po[col] = lines[col].astype("string").fillna("").str.strip()
+    po["Qty"] = (
+        pd.to_numeric(lines["Qty"], errors="coerce").fillna(0).clip(lower=0).astype("int64")
+    )
+    po["Unit Price"] = pd.to_numeric(
+        lines["Unit Price"].astype("string").str.replace(r"[$,]", "", regex=True),
+        errors="coerce",
+    ).fillna(0.0).clip(lower=0.0)
+    po["Line Total"] = po["Qty"] * po["Unit Price"]
+
+    keep = (po["SKU"] != "") | (po["Description"] != "") | (po["Qty"] > 0)
+    return po[keep].reset_index(drop=True)
+
+
+def _text_column(po_df, name, width):
+    if name not in po_df.columns:
+        return [""] * len(po_df)
+    return [str(v)[:width] for v in po_df[name].tolist()]
+
+
+def _money_column(po_df, name):
+    if name not in po_df.columns:
+        return ["$0.00"] * len(po_df)
+    return [f"${v:,.2f}" for v in po_df[name].tolist()]
+
+
+def _format_rows(po_df):
+    """Table cells for every line, formatted column by column."""
+    n = len(po_df)
+    if "Qty" in po_df.columns:
+        qty = po_df["Qty"].to_numpy(dtype=float).astype(np.int64)
+    else:
+        qty = np.zeros(n, dtype=np.int64)
+    return zip(
+        [str(i) for i in range(1, n + 1)],
+        _text_column(po_df, "SKU", 10),
+        _text_column(po_df, "Description", 30),
+        _text_column(po_df, "Strain", 10),
+        _text_column(po_df, "Size", 8),
+        [str(q) for q in qty.tolist()],
+        _money_column(po_df, "Unit Price"),
+        _money_column(po_df, "Line Total"),
+    )
+
+
+def po_fingerprint(*args, **kwargs):
+    """
+    Stable digest of `generate_po_pdf` arguments. DataFrames are hashed by
+    content (columns + values), everything else by its string form.
+    """
+    h = hashlib.sha256()
+    for value in list(args) + sorted(kwargs.items()):
+        if isinstance(value, pd.DataFrame):
+            h.update(json.dumps([str(c) for c in value.columns]).encode())
+            h.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+        else:
+            h.update(repr(value).encode())
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+def cached_po_pdf(*args, **kwargs):
+    """
+    `generate_po_pdf` with an in-process LRU: an identical PO returns the
+    previously rendered bytes. Returns (fingerprint, pdf bytes).
+    """
+    key = po_fingerprint(*args, **kwargs)
+    with _pdf_cache_lock:
+        if key in _pdf_cache:
+            _pdf_cache.move_to_end(key)
+            return key, _pdf_cache[key]
+
+    pdf = generate_po_pdf(*args, **kwargs)
+    with _pdf_cache_lock:
+        _pdf_cache[key] = pdf
+        _pdf_cache.move_to_end(key)
+        while len(_pdf_cache) > PDF_CACHE_SIZE:
+            _pdf_cache.popitem(last=False)
+    return key, pdf
+
+
+def generate_po_pdf(
+    store_name,
+    store_number,
+    store_address,
+    store_phone,
+    store_contact,
+    vendor_name,
+    vendor_license,
+    vendor_address,
+    vendor_contact,
+    po_number,
+    po_date,
+    terms,
+    notes,
+    po_df,
+    subtotal,
+    discount,
+    tax_amount,
+    shipping,
+    total,
+    client_name=DEFAULT_CLIENT_NAME,
+):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+
+    left_margin = 0.7 * inch
+    right_margin = width - 0.7 * inch
+    top_margin = height - 0.75 * inch
+
+    # Header Title
+    y = top_margin
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(left_margin, y, f"{client_name} - Purchase Order")
+    y -= 0.25 * inch
+
+    # PO Number and Date
+    c.setFont("Helvetica", 10)
+    c.drawString(left_margin, y, f"PO Number: {po_number}")
+    c.drawRightString(right_margin, y, f"Date: {po_date.strftime('%m/%d/%Y')}")
+    y -= 0.35 * inch
+
+    # Store (Ship-To) block
+    c.setFont("Helvetica-Bold", 11)
+    c.drawString(left_margin, y, "Ship To:")
+    c.setFont("Helvetica", 10)
+    y -= 0.18 * inch
+    c.drawString(left_margin, y, store_name or "")
+    y -= 0.16 * inch
+    if store_number:
+        c.drawString(left_margin, y, f"Store #: {store_number}")
+        y -= 0.16 * inch
+    if store_address:
+        c.drawString(left_margin, y, store_address)
+        y -= 0.16 * inch
+    if store_phone:
+        c.drawString(left_margin, y, f"Phone: {store_phone}")
+        y -= 0.16 * inch
+    if store_contact:
+        c.drawString(left_margin, y, f"Buyer: {store_contact}")
+        y -= 0.2 * inch
+
+    # Vendor block
+    vend_y = top_margin - 0.35 * inch
+    c.setFont("Helvetica-Bold", 11)
+    c.drawString(width / 2, vend_y, "Vendor:")
+    vend_y -= 0.18 * inch
+    c.setFont("Helvetica", 10)
+    if vendor_name:
+        c.drawString(width / 2, vend_y, vendor_name)
+        vend_y -= 0.16 * inch
+    if vendor_license:
+        c.drawString(width / 2, vend_y, f"License #: {vendor_license}")
+        vend_y -= 0.16 * inch
+    if vendor_address:
+        c.drawString(width / 2, vend_y, vendor_address)
+        vend_y -= 0.16 * inch
+    if vendor_contact:
+        c.drawString(width / 2, vend_y, f"Contact: {vendor_contact}")
+        vend_y -= 0.2 * inch
+
+    # Terms
+    y = min(y, vend_y) - 0.15 * inch
+    if terms:
+        c.setFont("Helvetica-Bold", 10)
+        c.drawString(left_margin, y, "Payment Terms:")
+        c.setFont("Helvetica", 10)
+        c.drawString(left_margin + 90, y, terms)
+        y -= 0.25 * inch
+
+    # Notes
+    if notes:
+        c.setFont("Helvetica-Bold", 10)
+        c.drawString(left_margin, y, "Notes:")
+        y -= 0.16 * inch
+        c.setFont("Helvetica", 9)
+        text_obj = c.beginText()
+        text_obj.setTextOrigin(left_margin, y)
+        text_obj.setLeading(12)
+        for line in notes.splitlines():
+            text_obj.textLine(line)
+        c.drawText(text_obj)
+        y = text_obj.getY() - 0.25 * inch
+
+    # Table header
+    c.setFont("Helvetica-Bold", 10)
+    header_y = y
+    if header_y < 2.5 * inch:
+        c.showPage()
+        width, height = letter
+        left_margin = 0.7 * inch
+        right_margin = width - 0.7 * inch
+        header_y = height - 1 * inch
+        c.setFont("Helvetica-Bold", 16)
+        c.drawString(left_margin, header_y, f"{client_name} - Purchase Order")
+        header_y -= 0.4 * inch
+        c.setFont("Helvetica-Bold", 10)
+
+    y = header_y
+    col_x = {
+        "line": left_margin,
+        "sku": left_margin + 0.4 * inch,
+        "desc": left_margin + 1.4 * inch,
+        "strain": left_margin + 3.8 * inch,
+        "size": left_margin + 4.6 * inch,
+        "qty": left_margin + 5.2 * inch,
+        "unit": left_margin + 6.0 * inch,
+        "total": left_margin + 7.0 * inch,
+    }
+
+    c.drawString(col_x["line"], y, "Ln")
+    c.drawString(col_x["sku"], y, "SKU")
+    c.drawString(col_x["desc"], y, "Description")
+    c.drawString(col_x["strain"], y, "Strain")
+    c.drawString(col_x["size"], y, "Size")
+    c.drawRightString(col_x["qty"] + 0.3 * inch, y, "Qty")
+    c.drawRightString(col_x["unit"] + 0.7 * inch, y, "Unit Price")
+    c.drawRightString(col_x["total"] + 0.8 * inch, y, "Line Total")
+    y -= 0.2 * inch
+
+    c.setLineWidth(0.5)
+    c.line(left_margin, y, right_margin, y)
+    y -= 0.18 * inch
+    c.setFont("Helvetica", 9)
+
+    # Table rows
+    for line_no, sku, desc, strain, size, qty, unit, line_total in _format_rows(po_df):
+        if y < 1.2 * inch:
+            c.showPage()
+            width, height = letter
+            left_margin = 0.7 * inch
+            right_margin = width - 0.7 * inch
+            y = height - 1 * inch
+            c.setFont("Helvetica-Bold", 10)
+            c.drawString(left_margin, y, "SKU Line Items (cont.)")
+            y -= 0.25 * inch
+            c.setFont("Helvetica-Bold", 10)
+            c.drawString(col_x["line"], y, "Ln")
+            c.drawString(col_x["sku"], y, "SKU")
+            c.drawString(col_x["desc"], y, "Description")
+            c.drawString(col_x["strain"], y, "Strain")
+            c.drawString(col_x["size"], y, "Size")
+            c.drawRightString(col_x["qty"] + 0.3 * inch, y, "Qty")
+            c.drawRightString(col_x["unit"] + 0.7 * inch, y, "Unit Price")
+            c.drawRightString(col_x["total"] + 0.8 * inch, y, "Line Total")
+            y -= 0.2 * inch
+            c.line(left_margin, y, right_margin, y)
+            y -= 0.18 * inch
+            c.setFont("Helvetica", 9)
+
+        c.drawString(col_x["line"], y, line_no)
+        c.drawString(col_x["sku"], y, sku)
+        c.drawString(col_x["desc"], y, desc)
+        c.drawString(col_x["strain"], y, strain)
+        c.drawString(col_x["size"], y, size)
+        c.drawRightString(col_x["qty"] + 0.3 * inch, y, qty)
+        c.drawRightString(col_x["unit"] + 0.7 * inch, y, unit)
+        c.drawRightString(col_x["total"] + 0.8 * inch, y, line_total)
+        y -= 0.18 * inch
+
+    # Totals
+    if y < 1.8 * inch:
+        c.showPage()
+        width, height = letter
+        left_margin = 0.7 * inch
+        right_margin = width - 0.7 * inch
+        y = height - 1.5 * inch
+
+    c.setFont("Helvetica-Bold", 10)
+    c.drawRightString(col_x["total"] + 0.8 * inch, y, f"Subtotal: ${subtotal:,.2f}")
+    y -= 0.2 * inch
+    if discount > 0:
+        c.drawRightString(col_x["total"] + 0.8 * inch, y, f"Discount: -${discount:,.2f}")
+        y -= 0.2 * inch
+    if tax_amount > 0:
+        c.drawRightString(col_x["total"] + 0.8 * inch, y, f"Tax: ${tax_amount:,.2f}")
+        y -= 0.2 * inch
+    if shipping > 0:
+        c.drawRightString(col_x["total"] + 0.8 * inch, y, f"Shipping / Fees: ${shipping:,.2f}")
+        y -= 0.2 * inch
+
+    c.setFont("Helvetica-Bold", 11)
+    c.drawRightString(col_x["total"] + 0.8 * inch, y, f"TOTAL: ${total:,.2f}")
+
+    c.showPage()
+    c.save()
+    pdf = buffer.getvalue()
+    buffer.close()
+    return pdf
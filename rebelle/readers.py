@@ -0,0 +1,290 @@
+"""
+Readers for POS exports (inventory CSV/Excel, product sales Excel).
+
+Headers are sniffed from a bounded preview and the body is parsed once,
+then shrunk with `compact_frame`. Excel sheets are loaded a single time by
+`rebelle.excel` (python-calamine when installed, else a streaming .xlsx
+reader) and the header scan reuses those rows. With a ColumnSchema, columns
+no alias could match are dropped at parse time. Parsed frames are memoized
+on a hash of the file bytes, so Streamlit reruns and re-uploads of the same
+export skip parsing entirely. `read_concurrently` parses several uploads
+side by side.
+"""
+import csv
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO, TextIOWrapper
+from itertools import islice
+
+import pandas as pd
+
+from rebelle.dtypes import compact_frame
+from rebelle import excel
+from rebelle.excel import preview_text, read_excel_rows, sheet_rows
+
+# Only this many leading rows are ever parsed while looking for the header
+HEADER_PREVIEW_ROWS = 15
+INVENTORY_HEADER_SCAN = 10
+SALES_HEADER_SCAN = 15
+
+# Parsed frames kept in memory, most recently used last
+FRAME_CACHE_SIZE = 8
+
+_frame_cache = OrderedDict()
+_frame_cache_lock = threading.Lock()
+
+
+def clear_frame_cache():
+    """Forget every memoized parse (used by benchmarks to time cold reads)."""
+    with _frame_cache_lock:
+        _frame_cache.clear()
+
+
+def source_bytes(source):
+    """Return (file name, raw bytes) for a path or an uploaded file object."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as fh:
+            return os.path.basename(source), fh.read()
+    if hasattr(source, "getvalue"):
+        return source.name, source.getvalue()
+    source.seek(0)
+    return getattr(source, "name", ""), source.read()
+
+
+def content_hash(data):
+    """Stable hex digest of a file's bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_csv_name(name):
+    return str(name).lower().endswith(".csv")
+
+
+def _parse(data, is_csv, **kwargs):
+    if is_csv:
+        return pd.read_csv(BytesIO(data), **kwargs)
+    return pd.read_excel(BytesIO(data), **kwargs)
+
+
+@contextmanager
+def open_source(source):
+    """Binary handle for a path (closed afterwards) or an uploaded file (rewound)."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as fh:
+            yield fh
+    else:
+        source.seek(0)
+        yield source
+
+
+def _csv_preview_rows(fh):
+    # csv.reader tolerates ragged preamble lines; blank lines are skipped
+    # so row numbers line up with pandas' `header=` counting.
+    lines = TextIOWrapper(fh, encoding="utf-8", errors="replace", newline="")
+    try:
+        rows = (row for row in csv.reader(lines) if row)
+        return [" ".join(row).lower() for row in islice(rows, HEADER_PREVIEW_ROWS)]
+    finally:
+        lines.detach()
+
+
+def _preview_rows(data, is_csv):
+    """Lowercased text of the first HEADER_PREVIEW_ROWS rows, one string per row."""
+    if is_csv:
+        return _csv_preview_rows(BytesIO(data))
+
+    preview = _parse(data, is_csv, header=None, nrows=HEADER_PREVIEW_ROWS)
+    return [" ".join(str(v) for v in row).lower() for row in preview.itertuples(index=False)]
+
+
+def inventory_header_row(rows):
+    """First row that looks like an inventory header (product / item / sku / name)."""
+    for i, row_text in enumerate(rows[:INVENTORY_HEADER_SCAN]):
+        if any(tok in row_text for tok in ["product", "item", "sku", "name"]):
+            return i
+    return 0
+
+
+def sales_header_row(rows):
+    """First row mentioning a category plus a product / name column."""
+    for i, row_text in enumerate(rows[:SALES_HEADER_SCAN]):
+        if "category" in row_text and ("product" in row_text or "name" in row_text):
+            return i
+    return 0
+
+
+_DATE = r"(\d{1,4}[/.-]\d{1,2}[/.-]\d{1,4})"
+_FROM_DATE = re.compile(r"(?:from|start)\s*date\W*" + _DATE)
+_TO_DATE = re.compile(r"(?:to|end)\s*date\W*" + _DATE)
+_DATE_RANGE = re.compile(_DATE + r"\s*(?:-|–|to)\s*" + _DATE)
+
+
+def _period_date(match, group=1):
+    if match is None:
+        return None
+    value = pd.to_datetime(match.group(group), errors="coerce")
+    return None if pd.isna(value) else value.date()
+
+
+def report_period(uploaded_file):
+    """
+    (start, end) dates of a report from its preamble ('From Date: ...' /
+    'To Date: ...' or 'Date Range: a - b'); (None, None) when not found.
+    """
+    name, data = source_bytes(uploaded_file)
+    try:
+        text = " | ".join(_preview_rows(data, is_csv_name(name)))
+    except Exception:
+        return None, None
+    start, end = _period_date(_FROM_DATE.search(text)), _period_date(_TO_DATE.search(text))
+    if start is None or end is None:
+        match = _DATE_RANGE.search(text)
+        start, end = _period_date(match, 1), _period_date(match, 2)
+    if start is None or end is None or start > end:
+        return None, None
+    return start, end
+
+
+def csv_header_row(fh):
+    """Inventory header row of an open binary CSV handle, which is left rewound."""
+    fh.seek(0)
+    header_row = inventory_header_row(_csv_preview_rows(fh))
+    fh.seek(0)
+    return header_row
+
+
+def _parse_with_header(data, is_csv, find_header, usecols=None):
+    """Sniff the header row from the preview, then parse the body once."""
+    if not is_csv:
+        rows = sheet_rows(data)
+        if rows is not None:
+            header_row = find_header(preview_text(rows, HEADER_PREVIEW_ROWS))
+            return read_excel_rows(rows, header=header_row, usecols=usecols)
+    header_row = find_header(_preview_rows(data, is_csv))
+    return _parse(data, is_csv, header=header_row, usecols=usecols)
+
+
+def _cached_read(kind, name, data, is_csv, find_header, store=None, pos="", schema=None):
+    digest = content_hash(data)
+    label = schema.label if schema is not None else None
+    key = (kind, str(pos).lower(), digest, is_csv, label)
+    with _frame_cache_lock:
+        if key in _frame_cache:
+            _frame_cache.move_to_end(key)
+            return _frame_cache[key].copy()
+
+    df = store.load(kind, pos, digest, label) if store is not None else None
+    if df is None:
+        usecols = schema.wants if schema is not None else None
+        df = compact_frame(_parse_with_header(data, is_csv, find_header, usecols))
+        if store is not None:
+            try:
+                store.save(kind, pos, digest, df, source_name=name, schema=label)
+            except Exception:
+                # A failed snapshot write must never block the upload itself
+                pass
+
+    with _frame_cache_lock:
+        _frame_cache[key] = df
+        _frame_cache.move_to_end(key)
+        while len(_frame_cache) > FRAME_CACHE_SIZE:
+            _frame_cache.popitem(last=False)
+    return df.copy()
+
+
+def read_inventory_file(uploaded_file, store=None, pos=""):
+    """
+    Read inventory CSV or Excel while being robust to 3–5 line headers
+    (e.g., Dutchie/BLAZE 'Export Date / From Date / To Date' at the top).
+    With a SnapshotStore, a previously parsed copy is loaded instead.
+    """
+    name, data = source_bytes(uploaded_file)
+    return _cached_read(
+        "inventory", name, data, is_csv_name(name), inventory_header_row, store, pos
+    )
+
+
+def read_sales_file(uploaded_file, store=None, pos="", kind="sales", schema=None):
+    """
+    Read Excel sales report with smart header detection.
+    Looks for a row that contains something like 'category' and 'product'
+    (Dutchie 'Total Sales by Product' style) and uses that as the header.
+    With a sales ColumnSchema, only columns it could match are parsed.
+    """
+    name, data = source_bytes(uploaded_file)
+    return _cached_read(kind, name, data, False, sales_header_row, store, pos, schema)
+
+
+def read_table_file(uploaded_file):
+    """Plain CSV / Excel read (header on the first row) for small lookup sheets."""
+    name, data = source_bytes(uploaded_file)
+    return _parse(data, is_csv_name(name))
+
+
+# -------------------------
+# Concurrent reads
+# -------------------------
+class NamedBytes(BytesIO):
+    """In-memory copy of an upload that keeps its name and pickles cleanly."""
+
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+
+
+def _timed(fn, args, kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def _gil_bound(source):
+    # Without calamine, Excel is parsed by the pure-Python streaming reader;
+    # CSV and calamine parse mostly outside the interpreter.
+    return not excel.CALAMINE_AVAILABLE and not is_csv_name(getattr(source, "name", source))
+
+
+def read_concurrently(jobs, max_workers=None, processes=False):
+    """
+    Run independent reads side by side. `jobs` is {name: (fn, source, kwargs)},
+    called as fn(source, **kwargs). Returns {name: (result, error, seconds)}:
+    a failed read comes back as its exception, so each file can report its own.
+
+    Jobs run on threads, which share the frame cache. With `processes=True`
+    (CLI / batch only: never fork inside the threaded Streamlit server), two
+    or more Excel files for the pure-Python reader run in processes instead
+    when there are cores to spare; those results do not fill the frame cache.
+    """
+    if not jobs:
+        return {}
+    cores = os.cpu_count() or 1
+    gil_bound = sum(_gil_bound(src) for _, src, _ in jobs.values())
+    if processes and cores > 1 and gil_bound > 1:
+        pool = ProcessPoolExecutor(max_workers=min(max_workers or cores, len(jobs)))
+        jobs = {
+            name: (fn, NamedBytes(*source_bytes(src)), kwargs)
+            for name, (fn, src, kwargs) in jobs.items()
+        }
+    else:
+        # Threads share the frame cache and need no copy of each upload
+        pool = ThreadPoolExecutor(max_workers=min(max_workers or len(jobs), len(jobs)))
+
+    results = {}
+    with pool:
+        futures = {
+            name: pool.submit(_timed, fn, (src,), kwargs)
+            for name, (fn, src, kwargs) in jobs.items()
+        }
+        for name, future in futures.items():
+            try:
+                result, seconds = future.result()
+                results[name] = (result, None, seconds)
+            except Exception as e:
+                results[name] = (None, e, None)
+    return results
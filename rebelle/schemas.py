@@ -0,0 +1,83 @@
+"""
+Versioned POS schema profiles.
+
+A profile puts one POS system's own export headers ahead of the generic
+aliases, so its exports match on the first alias tried and a header that
+means something else on that POS is not picked by accident. Bump `version`
+whenever a profile's aliases change; it is shown with detection errors so a
+report can be traced to the alias set that read it.
+"""
+from rebelle.columns import INVENTORY_SCHEMA, REVENUE_SCHEMA, SALES_SCHEMA
+
+GENERIC_POS = "Generic"
+
+
+class SchemaProfile:
+    """Inventory, product-sales and extra-sales ColumnSchemas for one POS version."""
+
+    def __init__(self, pos, version, inventory_aliases=None, sales_aliases=None,
+                 revenue_aliases=None):
+        self.pos = pos
+        self.version = version
+        self.label = f"{pos} v{version}"
+        self.inventory = INVENTORY_SCHEMA.extended(
+            f"{self.label} inventory", inventory_aliases or {}
+        )
+        self.sales = SALES_SCHEMA.extended(f"{self.label} product sales", sales_aliases or {})
+        # Extra sales reports share the product sales headers, plus dollars
+        self.revenue = REVENUE_SCHEMA.extended(
+            f"{self.label} extra sales",
+            {**(sales_aliases or {}), **(revenue_aliases or {})},
+        )
+
+
+PROFILES = {
+    profile.pos: profile
+    for profile in [
+        SchemaProfile(GENERIC_POS, 1),
+        SchemaProfile(
+            "BLAZE",
+            2,
+            inventory_aliases={
+                "itemname": ["product name"],
+                "subcategory": ["product category"],
+                "onhandunits": ["current quantity", "available quantity"],
+            },
+            sales_aliases={
+                "product_name": ["product name"],
+                "unitssold": ["units sold", "quantity sold"],
+                "mastercategory": ["product category"],
+            },
+            revenue_aliases={
+                "revenue": ["total sales", "net sales"],
+                "cost": ["cogs"],
+            },
+        ),
+        SchemaProfile(
+            "Dutchie",
+            2,
+            inventory_aliases={
+                "itemname": ["product", "product name"],
+                "subcategory": ["category", "master category"],
+                "onhandunits": ["available", "quantity available"],
+            },
+            sales_aliases={
+                "product_name": ["product", "product name"],
+                "unitssold": ["quantity sold", "items sold"],
+                "mastercategory": ["category", "master category"],
+            },
+            revenue_aliases={
+                "revenue": ["net sales", "total sales"],
+                "cost": ["cost", "total cost"],
+            },
+        ),
+    ]
+}
+
+
+def get_profile(pos=None):
+    """Profile for a POS name (case-insensitive); the generic one if unknown."""
+    for name, profile in PROFILES.items():
+        if pos is not None and name.lower() == str(pos).lower():
+            return profile
+    return PROFILES[GENERIC_POS]
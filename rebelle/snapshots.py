@@ -0,0 +1,159 @@
+"""
+Local columnar snapshot store for parsed POS exports.
+
+Each parsed inventory / sales frame is written once as an uncompressed
+Arrow IPC (Feather v2) file, keyed by report kind, POS type, the column
+schema it was trimmed to (label and version) and the hash of the source
+file. Loads are memory-mapped, so reopening an export is much
+cheaper than parsing the original CSV / Excel again. Point
+REBELLE_SNAPSHOT_DIR at a shared folder to share snapshots across buyers.
+"""
+import json
+import os
+import re
+import time
+import uuid
+
+import pandas as pd
+
+# ------------------------------------------------------------
+# OPTIONAL / SAFE IMPORT FOR PYARROW
+# ------------------------------------------------------------
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+DEFAULT_SNAPSHOT_DIR = os.environ.get(
+    "REBELLE_SNAPSHOT_DIR",
+    os.path.join(os.path.expanduser("~"), ".rebelle", "snapshots"),
+)
+MAX_SNAPSHOTS = 40
+MAX_SNAPSHOT_AGE_DAYS = 30
+
+
+def _arrow_safe(df):
+    """String column names, and mixed-type object columns cast to str (NaN kept)."""
+    out = df.reset_index(drop=True)
+    out.columns = [str(c) for c in out.columns]
+    for col in out.columns:
+        if out[col].dtype == object:
+            kind = pd.api.types.infer_dtype(out[col], skipna=True)
+            if kind not in ("string", "empty"):
+                out[col] = out[col].astype(str).where(out[col].notna(), None)
+    return out
+
+
+class SnapshotStore:
+    """Directory of `<key>.arrow` frames, each with a `<key>.json` sidecar."""
+
+    def __init__(
+        self,
+        root=DEFAULT_SNAPSHOT_DIR,
+        max_entries=MAX_SNAPSHOTS,
+        max_age_days=MAX_SNAPSHOT_AGE_DAYS,
+    ):
+        self.root = root
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+
+    @staticmethod
+    def make_key(kind, pos, source_hash, schema=None):
+        """`schema` is the ColumnSchema label, so a new alias set re-parses."""
+        key = f"{kind}-{str(pos).lower()}"
+        if schema:
+            key += "-" + re.sub(r"[^a-z0-9]+", "_", str(schema).lower()).strip("_")
+        return f"{key}-{source_hash[:24]}"
+
+    def _paths(self, key):
+        base = os.path.join(self.root, key)
+        return base + ".arrow", base + ".json"
+
+    def save(self, kind, pos, source_hash, df, source_name="", schema=None):
+        """Write a snapshot (atomically) and apply the retention policy."""
+        if not PYARROW_AVAILABLE:
+            return None
+        os.makedirs(self.root, exist_ok=True)
+        key = self.make_key(kind, pos, source_hash, schema)
+        data_path, meta_path = self._paths(key)
+
+        table = pa.Table.from_pandas(_arrow_safe(df), preserve_index=False)
+        tmp = f"{data_path}.{uuid.uuid4().hex}.tmp"
+        feather.write_feather(table, tmp, compression="uncompressed")
+        os.replace(tmp, data_path)
+
+        meta = {
+            "key": key,
+            "kind": kind,
+            "pos": pos,
+            "source_hash": source_hash,
+            "source_name": source_name,
+            "schema": schema,
+            "rows": int(len(df)),
+            "created": time.time(),
+        }
+        tmp = f"{meta_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(meta, fh)
+        os.replace(tmp, meta_path)
+
+        self.evict()
+        return key
+
+    def load_key(self, key):
+        """Memory-map a snapshot by key; None if it is missing or unreadable."""
+        if not PYARROW_AVAILABLE:
+            return None
+        data_path, meta_path = self._paths(key)
+        try:
+            table = feather.read_table(data_path, memory_map=True)
+            os.utime(meta_path)  # last access, for eviction
+        except (OSError, pa.ArrowInvalid):
+            return None
+        return table.to_pandas()
+
+    def load(self, kind, pos, source_hash, schema=None):
+        return self.load_key(self.make_key(kind, pos, source_hash, schema))
+
+    def entries(self, kind=None, pos=None):
+        """Snapshot metadata, most recently used first."""
+        if not os.path.isdir(self.root):
+            return []
+        out = []
+        for fname in os.listdir(self.root):
+            if not fname.endswith(".json"):
+                continue
+            path = os.path.join(self.root, fname)
+            try:
+                with open(path) as fh:
+                    meta = json.load(fh)
+                meta["last_access"] = os.path.getmtime(path)
+            except (OSError, ValueError):
+                continue
+            if kind is not None and meta.get("kind") != kind:
+                continue
+            if pos is not None and str(meta.get("pos", "")).lower() != str(pos).lower():
+                continue
+            out.append(meta)
+        return sorted(out, key=lambda m: m["last_access"], reverse=True)
+
+    def delete(self, key):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def evict(self):
+        """Drop snapshots past max_age_days, then the least recently used past max_entries."""
+        cutoff = time.time() - self.max_age_days * 86400
+        keep = []
+        for meta in self.entries():
+            if meta["last_access"] < cutoff:
+                self.delete(meta["key"])
+            else:
+                keep.append(meta)
+        for meta in keep[self.max_entries:]:
+            self.delete(meta["key"])
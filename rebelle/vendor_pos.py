@@ -0,0 +1,169 @@
+"""
+Bulk purchase orders: the forecast reorder table joined to a vendor / SKU /
+price mapping, split into one PO per vendor and rendered across a process
+pool into a single ZIP.
+
+The mapping is a CSV / Excel sheet with one row per SKU (vendor, SKU,
+product name, category, unit price; optionally vendor license / address /
+contact). Each SKU is keyed like the forecast (subcategory, strain_type,
+packagesize) by running its product name through the same normalizers.
+When several SKUs share a key, the first one listed is the one ordered.
+"""
+import io
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from rebelle.attributes import extract_attributes
+from rebelle.categories import normalize_categories
+from rebelle.columns import detect_vendor_map_columns
+from rebelle.engine import DETAIL_COLUMNS, INVENTORY_KEYS
+from rebelle.purchase_orders import DEFAULT_CLIENT_NAME, PO_LINE_COLUMNS, generate_po_pdf
+
+VENDOR_INFO_COLUMNS = ["vendor_license", "vendor_address", "vendor_contact"]
+SUMMARY_COLUMNS = ["vendor", "po_number", "lines", "units", "total", "file"]
+# Below this many lines, process start-up costs more than it saves
+POOL_MIN_LINES = 1000
+
+
+def prepare_vendor_map(raw):
+    """Normalize a raw vendor mapping sheet and key it like the forecast detail."""
+    mapping = detect_vendor_map_columns(raw.columns)
+    vm = raw[list(mapping)].rename(columns=mapping)
+
+    for col in ["vendor", "sku", "product_name"] + [
+        c for c in VENDOR_INFO_COLUMNS if c in vm.columns
+    ]:
+        vm[col] = vm[col].astype("string").fillna("").str.strip()
+    vm = vm[vm["vendor"] != ""]
+
+    vm["unitprice"] = pd.to_numeric(
+        vm["unitprice"].astype("string").str.replace(r"[$,]", "", regex=True),
+        errors="coerce",
+    ).fillna(0.0)
+    vm["subcategory"] = normalize_categories(vm["subcategory"])
+    attrs = extract_attributes(vm["product_name"])
+    vm["strain_type"] = attrs["strain_type"].to_numpy()
+    vm["packagesize"] = attrs["packagesize"].to_numpy()
+
+    for col in VENDOR_INFO_COLUMNS:
+        if col not in vm.columns:
+            vm[col] = ""
+    return vm.reset_index(drop=True)
+
+
+def vendor_po_lines(detail, vendor_map):
+    """
+    Reorder lines (reorderqty > 0) priced and assigned to a vendor.
+    Returns (lines with a leading `vendor` column, unmatched reorder lines).
+    """
+    reorder = detail[detail["reorderqty"] > 0]
+    reorder = reorder[[c for c in DETAIL_COLUMNS if c in reorder.columns]].copy()
+    for key in INVENTORY_KEYS:
+        reorder[key] = reorder[key].astype(str)
+
+    preferred = vendor_map.drop_duplicates(INVENTORY_KEYS, keep="first")
+    merged = reorder.merge(preferred, on=INVENTORY_KEYS, how="left")
+    matched = merged["vendor"].notna()
+
+    hit = merged[matched]
+    qty = hit["reorderqty"].astype("int64")
+    lines = pd.DataFrame(
+        {
+            "vendor": hit["vendor"].astype(str),
+            "SKU": hit["sku"].astype(str),
+            "Description": hit["product_name"].astype(str),
+            "Strain": hit["strain_type"],
+            "Size": hit["packagesize"],
+            "Qty": qty,
+            "Unit Price": hit["unitprice"].astype(float),
+            "Line Total": qty * hit["unitprice"].astype(float),
+        }
+    ).sort_values(["vendor", "SKU"], kind="stable")
+
+    unmatched = merged.loc[~matched, reorder.columns]
+    return lines.reset_index(drop=True), unmatched.reset_index(drop=True)
+
+
+def _slug(text):
+    return re.sub(r"[^A-Za-z0-9]+", "_", str(text)).strip("_") or "vendor"
+
+
+def render_vendor_po(job):
+    """Render one vendor's PO (process-pool worker). Returns (file name, PDF bytes)."""
+    vendor, info, lines, header = job
+    subtotal = float(lines["Line Total"].sum())
+    tax_amount = subtotal * header.get("tax_rate", 0.0) / 100.0
+    pdf = generate_po_pdf(
+        header.get("store_name", ""),
+        header.get("store_number", ""),
+        header.get("store_address", ""),
+        header.get("store_phone", ""),
+        header.get("store_contact", ""),
+        vendor,
+        info.get("vendor_license", ""),
+        info.get("vendor_address", ""),
+        info.get("vendor_contact", ""),
+        header["po_number"],
+        header["po_date"],
+        header.get("terms", ""),
+        header.get("notes", ""),
+        lines[PO_LINE_COLUMNS],
+        subtotal,
+        0.0,
+        tax_amount,
+        0.0,
+        subtotal + tax_amount,
+        client_name=header.get("client_name", DEFAULT_CLIENT_NAME),
+    )
+    return f"PO_{_slug(header['po_number'])}.pdf", pdf
+
+
+def vendor_jobs(lines, vendor_map, header):
+    """One render job per vendor, each with its own PO number (`<prefix>-<n>`)."""
+    info = (
+        vendor_map.drop_duplicates("vendor", keep="first")
+        .set_index("vendor")[VENDOR_INFO_COLUMNS]
+        .to_dict("index")
+    )
+    prefix = header.get("po_number") or "PO"
+    jobs = []
+    for n, (vendor, group) in enumerate(lines.groupby("vendor", sort=True), start=1):
+        vendor_header = dict(header, po_number=f"{prefix}-{n:02d}-{_slug(vendor)}")
+        jobs.append((vendor, info.get(vendor, {}), group.reset_index(drop=True), vendor_header))
+    return jobs
+
+
+def build_vendor_pos(lines, vendor_map, header, max_workers=None):
+    """
+    Render every vendor's PO and pack them into one ZIP.
+    `header` holds the store fields, po_date, terms, notes, tax_rate and the
+    PO number prefix. Returns (zip bytes, per-vendor summary frame).
+    """
+    jobs = vendor_jobs(lines, vendor_map, header)
+    max_workers = min(max_workers or os.cpu_count() or 1, max(len(jobs), 1))
+    if max_workers > 1 and len(lines) >= POOL_MIN_LINES:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            rendered = list(pool.map(render_vendor_po, jobs))
+    else:
+        rendered = [render_vendor_po(job) for job in jobs]
+
+    summary = []
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for (vendor, _, group, vendor_header), (fname, pdf) in zip(jobs, rendered):
+            zf.writestr(fname, pdf)
+            summary.append(
+                {
+                    "vendor": vendor,
+                    "po_number": vendor_header["po_number"],
+                    "lines": len(group),
+                    "units": int(group["Qty"].sum()),
+                    "total": float(group["Line Total"].sum()),
+                    "file": fname,
+                }
+            )
+    return buffer.getvalue(), pd.DataFrame(summary, columns=SUMMARY_COLUMNS)
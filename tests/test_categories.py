@@ -0,0 +1,65 @@
+"""
+Parity of the precompiled / vectorized category normalizer with the
+original rule-by-rule `normalize_rebelle_category`.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from rebelle.categories import (
+    classify_category,
+    normalize_categories,
+    normalize_rebelle_category,
+)
+
+# Raw POS spellings: canonical names, keyword hits in longer strings,
+# several keywords at once (first rule wins), case / whitespace noise and
+# values no rule matches.
+RAW_CATEGORIES = [
+    "Flower",
+    "  FLOWER  ",
+    "Cannabis Flower",
+    "Premium Buds",
+    "Pre-Rolls",
+    "Preroll Packs",
+    "Infused Pre Roll",
+    "Joints",
+    "Vape Cartridges",
+    "Disposable Vape Pen",
+    "Pods",
+    "Edibles - Gummies",
+    "Chocolate Bars",
+    "Cookies",
+    "Beverages",
+    "Drinkable Shot",
+    "Concentrates",
+    "Live Resin",
+    "Rosin Badder",
+    "Shatter / Wax",
+    "Tinctures",
+    "Sublingual Drops",
+    "Topical Balm",
+    "Lotion",
+    "Flower Pre-Roll Bundle",
+    "Vape + Edible Kit",
+    "Accessories",
+    "Apparel",
+    "All",
+    "",
+    "nan",
+]
+
+
+@pytest.mark.parametrize("raw", RAW_CATEGORIES)
+def test_classify_matches_rule_list(raw):
+    assert classify_category(raw) == normalize_rebelle_category(raw)
+
+
+def test_normalize_categories_matches_rule_list():
+    values = pd.Series(RAW_CATEGORIES * 3 + [None, np.nan], dtype=object)
+    expected = [normalize_rebelle_category(v) for v in values]
+
+    out = normalize_categories(values)
+
+    assert out.tolist() == expected
+    assert out.index.equals(values.index)
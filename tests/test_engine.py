@@ -0,0 +1,58 @@
+"""
+Forecast engine behavior: the required-size grid.
+"""
+import pandas as pd
+import pytest
+
+from rebelle.attributes import size_key
+from rebelle.engine import build_base, run_forecast
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [(".5g", "0.5g"), ("0.50g", "0.5g"), ("1.0g", "1g"), ("28.0g", "28g"),
+     ("100mg", "100mg"), ("unspecified", "unspecified")],
+)
+def test_size_key_spellings(raw, expected):
+    assert size_key(raw) == expected
+
+
+def test_required_sizes_accept_other_spellings():
+    inv = pd.DataFrame(
+        {
+            "Product": ["Kush Cart .5g", "Kush Cart 1.0g", "OG Flower 3.5g"],
+            "Category": ["Vapes", "Vapes", "Flower"],
+            "Available": [5, 5, 5],
+        }
+    )
+    sales = pd.DataFrame(
+        {
+            "Product": ["Kush Cart .5g", "Kush Cart 1.0g"],
+            "Category": ["Vapes", "Vapes"],
+            "Quantity Sold": [10, 3],
+        }
+    )
+    detail = run_forecast(inv, sales, pos="Dutchie")
+
+    vapes = detail[detail["subcategory"] == "vapes"]
+    assert sorted(vapes["packagesize"].astype(str)) == [".5g", "1.0g"]
+    assert (vapes["onhandunits"] > 0).all()
+
+    # Flower still gets zero-stock lines for the sizes it does not carry
+    flower = detail[detail["subcategory"] == "flower"]
+    assert sorted(flower["packagesize"].astype(str)) == ["14g", "28g", "3.5g", "7g"]
+
+
+def test_required_sizes_override():
+    inv_summary = pd.DataFrame(
+        {"subcategory": ["vapes"], "strain_type": ["indica"], "packagesize": ["1g"],
+         "onhandunits": [4]}
+    )
+    sales_summary = pd.DataFrame(
+        {"mastercategory": ["vapes"], "packagesize": ["1g"], "unitssold": [2.0]}
+    )
+    base = build_base(inv_summary, sales_summary, required_sizes={"vapes": ["1g", "2g"]})
+
+    gap = base[base["packagesize"] == "2g"]
+    assert len(base) == 2 and len(gap) == 1
+    assert gap["onhandunits"].iloc[0] == 0 and gap["unitssold"].iloc[0] == 0
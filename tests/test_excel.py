@@ -0,0 +1,56 @@
+"""
+Parity of the first-sheet Excel reader (calamine and streaming paths) with
+`pd.read_excel`.
+"""
+from datetime import datetime
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+from rebelle import excel
+
+openpyxl = pytest.importorskip("openpyxl")
+
+ENGINES = [False, pytest.param(True, marks=pytest.mark.skipif(
+    not excel.CALAMINE_AVAILABLE, reason="python-calamine not installed"))]
+
+
+@pytest.fixture
+def workbook():
+    """A POS-style export: title lines, a header, mixed cells and ragged rows."""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Product Sales Report"])
+    ws.append(["From Date: 01/01/2026", None, "To Date: 01/31/2026"])
+    ws.append([])
+    ws.append(["Product", "Category", "Quantity Sold", "Net Sales", "Sold On"])
+    ws.append(["OG Kush 3.5g", "Flower", 12, 240.5, datetime(2026, 1, 5)])
+    ws.append(["Kush Cart .5g", "Vapes", 3.0, None, datetime(2026, 1, 6, 14, 30)])
+    ws.append(["", None, None, None, None])
+    ws.append(["Gummies 100mg", "Edibles", 1e6, -0.25])
+    ws.append([None, None, None, None, None, "stray note"])
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("calamine", ENGINES)
+@pytest.mark.parametrize("header", [0, 3])
+def test_matches_pandas(workbook, monkeypatch, calamine, header):
+    monkeypatch.setattr(excel, "CALAMINE_AVAILABLE", calamine)
+    expected = pd.read_excel(BytesIO(workbook), header=header, engine="openpyxl")
+
+    out = excel.read_excel_rows(excel.sheet_rows(workbook), header=header)
+
+    pd.testing.assert_frame_equal(out, expected)
+
+
+@pytest.mark.parametrize("calamine", ENGINES)
+def test_preview_reads_title_lines(workbook, monkeypatch, calamine):
+    monkeypatch.setattr(excel, "CALAMINE_AVAILABLE", calamine)
+
+    preview = excel.preview_text(excel.sheet_rows(workbook), 4)
+
+    assert preview[1].startswith("from date: 01/01/2026")
+    assert "quantity sold" in preview[3]
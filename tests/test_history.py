@@ -0,0 +1,92 @@
+"""
+Sales history: overlapping uploads, prorated windows and re-upload dedupe.
+"""
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from rebelle.history import SalesHistory
+
+POS = "Dutchie"
+JAN_1 = date(2026, 1, 1)
+
+
+def _report(units, name="OG Kush 3.5g"):
+    return pd.DataFrame(
+        {
+            "mastercategory": ["flower"],
+            "packagesize": ["3.5g"],
+            "product_name": [name],
+            "unitssold": [float(units)],
+        }
+    )
+
+
+def _days(first, last):
+    return JAN_1 + timedelta(days=first - 1), JAN_1 + timedelta(days=last - 1)
+
+
+@pytest.fixture
+def history(tmp_path):
+    return SalesHistory(str(tmp_path / "history.sqlite"))
+
+
+def _units(history, window, as_of):
+    summary, covered = history.window_summary(window, POS, as_of=as_of)
+    return float(summary["unitssold"].sum()), covered
+
+
+def test_window_prorates_lines_by_days_inside(history):
+    history.ingest(_report(100), *_days(1, 10), POS, "a")
+
+    assert _units(history, 5, JAN_1 + timedelta(days=9)) == (50.0, 5)
+    assert _units(history, 30, None) == (100.0, 10)
+
+
+def test_new_upload_splits_an_older_period_around_it(history):
+    history.ingest(_report(300), *_days(1, 30), POS, "month")
+    history.ingest(_report(70), *_days(11, 20), POS, "middle")
+
+    periods = history.periods(POS).sort_values("start")
+    assert list(zip(periods["start"], periods["end"])) == [_days(1, 10), _days(11, 20), _days(21, 30)]
+    # The month keeps 10 + 10 of its 30 days: 200 units, plus the new 70
+    assert _units(history, 30, None) == (270.0, 30)
+
+
+def test_new_upload_replaces_a_period_it_covers(history):
+    history.ingest(_report(50), *_days(5, 9), POS, "week")
+    history.ingest(_report(20), *_days(1, 10), POS, "longer")
+
+    assert len(history.periods(POS)) == 1
+    assert _units(history, 10, None) == (20.0, 10)
+
+
+def test_reupload_is_ignored_even_after_being_trimmed_away(history):
+    assert history.ingest(_report(50), *_days(5, 9), POS, "week") == 1
+    assert history.ingest(_report(50), *_days(5, 9), POS, "week") == 0
+
+    history.ingest(_report(20), *_days(1, 10), POS, "longer")
+    # The week's days now belong to the newer upload; uploading it again
+    # must not take them back
+    assert history.ingest(_report(50), *_days(5, 9), POS, "week") == 0
+    assert _units(history, 10, None) == (20.0, 10)
+
+
+def test_same_file_counts_separately_per_pos(history):
+    history.ingest(_report(10), *_days(1, 10), POS, "a")
+
+    assert history.ingest(_report(10), *_days(1, 10), "BLAZE", "a") == 1
+    assert _units(history, 10, None) == (10.0, 10)
+
+
+def test_duplicate_lines_are_summed_on_ingest(history):
+    report = pd.concat([_report(4), _report(6)], ignore_index=True)
+
+    assert history.ingest(report, *_days(1, 10), POS, "a") == 1
+    assert _units(history, 10, None) == (10.0, 10)
+
+
+def test_period_must_not_end_before_it_starts(history):
+    with pytest.raises(ValueError):
+        history.ingest(_report(1), *_days(10, 1), POS, "a")
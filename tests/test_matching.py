@@ -0,0 +1,90 @@
+"""
+Inventory ↔ sales product matching and the SKU-level forecast base.
+"""
+import pandas as pd
+import pytest
+
+from rebelle.engine import build_sku_base
+from rebelle.matching import REORDERED_CONFIDENCE, match_products
+
+
+def _match(items, products):
+    return match_products(items, products).set_index("itemname")
+
+
+def test_exact_match_ignores_case_and_punctuation():
+    out = _match(["OG Kush - 3.5g"], ["og kush 3.5g", "Blue Dream 3.5g"])
+
+    assert out.loc["OG Kush - 3.5g", "product_name"] == "og kush 3.5g"
+    assert out.loc["OG Kush - 3.5g", "match_method"] == "exact"
+    assert out.loc["OG Kush - 3.5g", "match_confidence"] == 1.0
+
+
+def test_reordered_words_match():
+    out = _match(["3.5g OG Kush"], ["OG Kush 3.5g"])
+
+    assert out.loc["3.5g OG Kush", "match_method"] == "reordered"
+    assert out.loc["3.5g OG Kush", "match_confidence"] == REORDERED_CONFIDENCE
+
+
+def test_fuzzy_match_tolerates_small_differences():
+    out = _match(["Wedding Cake Indica Flower 3.5g"], ["Wedding Cake Indica Flowers 3.5g"])
+
+    assert out.iloc[0]["match_method"] == "fuzzy"
+    assert out.iloc[0]["match_confidence"] >= 0.6
+
+
+@pytest.mark.parametrize(
+    "item, other",
+    [
+        # Same name, different package size
+        ("Wedding Cake Indica Flower 3.5g", "Wedding Cake Indica Flower 7g"),
+        # Same name, different strain type
+        ("Wedding Cake Indica Flower 3.5g", "Wedding Cake Sativa Flower 3.5g"),
+        # Same name, different lot / item number
+        ("Wedding Cake Flower 3.5g Lot 1041", "Wedding Cake Flower 3.5g Lot 1042"),
+    ],
+)
+def test_fuzzy_match_rejects_contradicting_attributes(item, other):
+    out = _match([item], [other])
+
+    assert out.loc[item, "match_method"] == "none"
+    assert pd.isna(out.loc[item, "product_name"])
+
+
+def test_size_spellings_do_not_block_a_fuzzy_match():
+    out = _match(["Kush Mints Live Resin Cart .5g"], ["Kush Mint Live Resin Cart 0.5g"])
+
+    assert out.iloc[0]["match_method"] == "fuzzy"
+
+
+def _inventory(names):
+    return pd.DataFrame(
+        {
+            "itemname": names,
+            "subcategory": "flower",
+            "strain_type": "indica",
+            "packagesize": "3.5g",
+            "onhandunits": 5,
+        }
+    )
+
+
+def test_sku_base_pools_spelling_variants_of_one_product():
+    inv = _inventory(["OG Kush Indica 3.5g"])
+    sales = pd.DataFrame(
+        {"product_name": ["OG Kush Indica 3.5g", "og kush indica 3.5G"], "unitssold": [4.0, 6.0]}
+    )
+    base = build_sku_base(inv, sales)
+
+    assert base["unitssold"].tolist() == [10.0]
+
+
+def test_sku_base_counts_each_product_once():
+    # Both items match the same product equally well: its units are split
+    inv = _inventory(["OG Kush Indica 3.5g", "og-kush indica 3.5g"])
+    sales = pd.DataFrame({"product_name": ["OG Kush Indica 3.5g"], "unitssold": [10.0]})
+    base = build_sku_base(inv, sales)
+
+    assert base["unitssold"].tolist() == [5.0, 5.0]
+    assert base["unitssold"].sum() == 10.0
@@ -0,0 +1,81 @@
+"""
+Velocity models over the sales history's group x period matrix.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rebelle.history import SalesHistory
+from rebelle.velocity import (
+    ewma_velocity,
+    model_velocity,
+    period_matrix,
+    trend_velocity,
+)
+
+
+def test_ewma_weights_recent_periods_most():
+    rates = np.array([[1.0, 2.0, 4.0]])
+    covered = np.array([7, 7, 7])
+    weights = 0.5 ** np.array([2, 1, 0])
+
+    out = ewma_velocity(rates, covered, alpha=0.5)
+
+    assert out == pytest.approx([rates[0] @ weights / weights.sum()])
+    assert out[0] > rates.mean()
+
+
+def test_ewma_skips_uncovered_periods():
+    rates = np.array([[9.0, 0.0, 3.0]])
+
+    out = ewma_velocity(rates, np.array([0, 0, 7]), alpha=0.5)
+
+    assert out == pytest.approx([3.0])
+    assert ewma_velocity(rates, np.zeros(3)).tolist() == [0.0]
+
+
+def test_trend_follows_a_steady_slope():
+    rates = np.array([[1.0, 2.0, 3.0, 4.0, 5.0, 6.0], [6.0, 5.0, 4.0, 3.0, 2.0, 1.0]])
+    covered = np.full(6, 7)
+
+    rising, falling = trend_velocity(rates, covered, horizon=1.0)
+    ewma_rising, ewma_falling = ewma_velocity(rates, covered)
+
+    assert rising > ewma_rising and falling < ewma_falling
+    # No smoothing: the last rate plus one period of the last slope
+    assert trend_velocity(rates, covered, alpha=1.0, beta=1.0, horizon=1.0) == pytest.approx([7.0, 0.0])
+
+
+def test_trend_is_floored_at_zero():
+    rates = np.array([[10.0, 5.0, 0.0]])
+
+    assert trend_velocity(rates, np.full(3, 7), alpha=0.9, beta=0.9, horizon=5.0).tolist() == [0.0]
+
+
+def test_unknown_model_is_rejected():
+    keys = pd.DataFrame({"mastercategory": ["flower"], "packagesize": ["3.5g"]})
+    with pytest.raises(ValueError):
+        model_velocity(keys, np.zeros((1, 3)), np.full(3, 7), "Flat")
+
+
+def test_period_matrix_buckets_history_by_week(tmp_path):
+    history = SalesHistory(str(tmp_path / "history.sqlite"))
+    end = date(2026, 1, 14)
+    report = pd.DataFrame(
+        {
+            "mastercategory": ["flower"],
+            "packagesize": ["3.5g"],
+            "product_name": ["OG Kush 3.5g"],
+            "unitssold": [140.0],
+        }
+    )
+    # 14 days of sales, 10 units a day
+    history.ingest(report, end - timedelta(days=13), end, "Dutchie", "a")
+
+    keys, rates, covered = period_matrix(history, "Dutchie", periods=3, period_days=7)
+
+    assert keys.astype(str).values.tolist() == [["flower", "3.5g"]]
+    assert covered.tolist() == [0, 7, 7]
+    assert rates.tolist() == [[0.0, 10.0, 10.0]]